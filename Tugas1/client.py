@@ -1,39 +1,163 @@
+"""
+Klien echo server.
+
+* send  : kirim file dan baca kembali echo-nya (mode asli)
+* bench : probe kesehatan jaringan ke echo server
+          - latency   : --rounds round trip pesan --msg_size byte satu per satu,
+                        dilaporkan p50/p90/p99/p99.9/max
+          - bandwidth : --connections koneksi paralel, masing-masing mengirim
+                        --total_mb MB sambil thread lain membaca echo-nya
+                        dengan recv_into, dilaporkan MB/s gabungan
+
+Contoh di loopback:
+    python3 server.py --mode concurrent --splice
+    python3 client.py --server 127.0.0.1 --mode bench --connections 4
+"""
+
 import sys
+import math
+import time
 import socket
 import logging
+import argparse
+import threading
+
+BUFFER_SIZE = 256 * 1024
 
 #set basic logging
 logging.basicConfig(level=logging.INFO)
 
-try:
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Echo client")
+    parser.add_argument('--server', default='172.16.16.101', help='Echo server address (default: 172.16.16.101)')
+    parser.add_argument('--port', type=int, default=32434, help='Echo server port (default: 32434)')
+    parser.add_argument('--mode', choices=['send', 'bench'], default='send', help='send: echo a file once, bench: measure latency and bandwidth (default: send)')
+    parser.add_argument('--file', default='file.txt', help='File to send in send mode (default: file.txt)')
+    parser.add_argument('--rounds', type=int, default=10000, help='Round trips for the latency test (default: 10000)')
+    parser.add_argument('--msg_size', type=int, default=64, help='Message size for the latency test in bytes (default: 64)')
+    parser.add_argument('--connections', type=int, default=1, help='Parallel connections for the bandwidth test (default: 1)')
+    parser.add_argument('--total_mb', type=int, default=256, help='MB sent per connection in the bandwidth test (default: 256)')
+    return parser.parse_args()
+
+
+def send_file(server_address, filename):
     # Create a TCP/IP socket
     sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    try:
+        # Connect the socket to the port where the server is listening
+        logging.info(f"connecting to {server_address}")
+        sock.connect(server_address)
+
+        # Send data
+        # message = 'INI ADALAH DATA YANG DIKIRIM ABCDEFGHIJKLMNOPQ'
+        # logging.info(f"sending {message}")
+        with open(filename, 'rb') as f:
+            data = f.read()
+        sock.sendall(data)
+        logging.info(f"sending {filename} ({len(data)} bytes)")
+        # Look for the response
+        amount_received = 0
+        amount_expected = len(data)
+        buf = bytearray(BUFFER_SIZE)
+        while amount_received < amount_expected:
+            n = sock.recv_into(buf)
+            if not n:
+                break
+            amount_received += n
+            logging.debug(f"{bytes(buf[:n])!r}")
+        logging.info(f"received {amount_received} of {amount_expected} bytes back")
+
+    except Exception as ee:
+        logging.info(f"ERROR: {str(ee)}")
+        exit(0)
+    finally:
+        logging.info("closing")
+        sock.close()
+
+
+def percentile(sorted_values, p):
+    """Nearest rank: sampel ke-ceil(p/100 * n), pembulatan kecil meredam galat float (99.9 * 1000)."""
+    if not sorted_values:
+        return 0.0
+    rank = math.ceil(round(p * len(sorted_values) / 100.0, 9))
+    return sorted_values[min(len(sorted_values) - 1, max(0, rank - 1))]
+
+
+def latency_test(server_address, rounds, msg_size):
+    message = b"x" * msg_size
+    buf = bytearray(msg_size)
+    view = memoryview(buf)
+    samples = []
+    with socket.create_connection(server_address) as sock:
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        for _ in range(rounds):
+            start = time.perf_counter()
+            sock.sendall(message)
+            received = 0
+            while received < msg_size:
+                n = sock.recv_into(view[received:])
+                if not n:
+                    raise ConnectionError("echo server closed the connection")
+                received += n
+            samples.append(time.perf_counter() - start)
+    samples.sort()
+    return {p: percentile(samples, p) for p in (50, 90, 99, 99.9, 100)}
+
+
+def _stream(server_address, total_bytes, results, index):
+    block = b"\0" * BUFFER_SIZE
+    with socket.create_connection(server_address) as sock:
+        def reader():
+            buf = bytearray(BUFFER_SIZE)
+            received = 0
+            while received < total_bytes:
+                n = sock.recv_into(buf)
+                if not n:
+                    break
+                received += n
+            results[index] = received
+
+        t = threading.Thread(target=reader)
+        t.start()
+        sent = 0
+        while sent < total_bytes:
+            chunk = block[:min(BUFFER_SIZE, total_bytes - sent)]
+            sock.sendall(chunk)
+            sent += len(chunk)
+        sock.shutdown(socket.SHUT_WR)
+        t.join()
+
+
+def bandwidth_test(server_address, connections, total_mb):
+    total_bytes = total_mb * 1024 * 1024
+    results = [0] * connections
+    threads = [threading.Thread(target=_stream, args=(server_address, total_bytes, results, i))
+               for i in range(connections)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    return sum(results), total_bytes * connections, elapsed
+
+
+def run_bench(server_address, args):
+    lat = latency_test(server_address, args.rounds, args.msg_size)
+    logging.info(f"latency {args.msg_size}B x{args.rounds}: p50={lat[50] * 1e6:.0f}us p90={lat[90] * 1e6:.0f}us "
+                 f"p99={lat[99] * 1e6:.0f}us p99.9={lat[99.9] * 1e6:.0f}us max={lat[100] * 1e6:.0f}us")
+    echoed, expected, elapsed = bandwidth_test(server_address, args.connections, args.total_mb)
+    logging.info(f"bandwidth {args.connections} koneksi x {args.total_mb}MB: {echoed / elapsed / 1024 / 1024:.1f} MB/s "
+                 f"({echoed} of {expected} bytes echoed in {elapsed:.2f}s)")
+    if echoed != expected:
+        sys.exit(1)
+
 
-    # Connect the socket to the port where the server is listening
-    server_address = ('172.16.16.101', 32434)
-    logging.info(f"connecting to {server_address}")
-    sock.connect(server_address)
-
-    # Send data
-    # message = 'INI ADALAH DATA YANG DIKIRIM ABCDEFGHIJKLMNOPQ'
-    # logging.info(f"sending {message}")
-    with open('file.txt', 'rb') as f:
-        data = f.read()
-    sock.sendall(data)
-    logging.info(f"sending file.txt ({len(data)} bytes)")
-    # Look for the response
-    amount_received = 0
-    amount_expected = len(data)
-    while amount_received < amount_expected:
-        chunk = sock.recv(16)
-        amount_received += len(chunk)
-        logging.info(f"{chunk!r}")
-        if not chunk:
-            break
-        
-except Exception as ee:
-    logging.info(f"ERROR: {str(ee)}")
-    exit(0)
-finally:
-    logging.info("closing")
-    sock.close()
+if __name__ == '__main__':
+    args = parse_args()
+    server_address = (args.server, args.port)
+    if args.mode == 'bench':
+        run_bench(server_address, args)
+    else:
+        send_file(server_address, args.file)
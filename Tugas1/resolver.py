@@ -0,0 +1,242 @@
+"""
+Resolver DNS dengan cache untuk klien-klien di repo ini.
+
+socket_info.py memanggil gethostbyname/getaddrinfo setiap kali dipakai. Klien
+ETS dan Tugas3 terhubung berulang kali ke host yang sama, jadi hasil lookup
+disimpan di cache:
+
+* hasil positif disimpan selama ttl detik
+* kegagalan (socket.gaierror) disimpan selama negative_ttl detik, sehingga
+  host yang salah tidak di-lookup ulang di setiap percobaan
+* lookup yang sama yang sedang berjalan dipakai bersama (tidak di-lookup dua kali)
+
+Lookup banyak host bisa dijalankan bersamaan dengan resolve_many (thread pool)
+atau aresolve (asyncio). create_connection mencoba alamat-alamat hasil lookup
+ala happy eyeballs (RFC 8305): alamat IPv6 dan IPv4 diselang-seling, percobaan
+berikutnya dimulai jika percobaan sebelumnya belum tersambung setelah
+connect_delay detik, dan koneksi pertama yang berhasil yang dipakai.
+
+Fungsi lookup bisa diganti (resolve_fn, signature sama dengan
+socket.getaddrinfo), misalnya static_resolve_fn untuk resolver stub lokal.
+"""
+
+import os
+import time
+import errno
+import socket
+import asyncio
+import selectors
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+TTL = 60.0
+NEGATIVE_TTL = 5.0
+CONNECT_DELAY = 0.25
+MAX_WORKERS = 8
+
+
+def static_resolve_fn(table):
+    """
+    Resolver stub: table berisi {host: [ip, ...]}. Host yang tidak ada di table
+    gagal dengan socket.gaierror, sama seperti DNS yang tidak menemukan nama.
+    """
+    def resolve(host, port, family=0, type=0, proto=0, flags=0):
+        if host not in table:
+            raise socket.gaierror(socket.EAI_NONAME, f"{host} not in stub table")
+        results = []
+        for ip in table[host]:
+            fam = socket.AF_INET6 if ':' in ip else socket.AF_INET
+            if family and fam != family:
+                continue
+            sockaddr = (ip, port, 0, 0) if fam == socket.AF_INET6 else (ip, port)
+            results.append((fam, type or socket.SOCK_STREAM, proto or socket.IPPROTO_TCP, '', sockaddr))
+        return results
+    return resolve
+
+
+def interleave(addrinfos):
+    """Urutkan alamat berselang-seling antar family, dimulai dari family hasil pertama."""
+    by_family = {}
+    for info in addrinfos:
+        by_family.setdefault(info[0], []).append(info)
+    queues = list(by_family.values())
+    ordered = []
+    while any(queues):
+        for q in queues:
+            if q:
+                ordered.append(q.pop(0))
+    return ordered
+
+
+class Resolver:
+    def __init__(self, ttl=TTL, negative_ttl=NEGATIVE_TTL, resolve_fn=None, max_workers=MAX_WORKERS):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.resolve_fn = resolve_fn or socket.getaddrinfo
+        self.max_workers = max_workers
+        self.lock = threading.Lock()
+        self.cache = {}
+        self.inflight = {}
+        self.executor = None
+        self.hits = 0
+        self.misses = 0
+
+    def _lookup(self, key):
+        host, port = key
+        try:
+            result = self.resolve_fn(host, port, 0, socket.SOCK_STREAM)
+            entry = (time.monotonic() + self.ttl, result, None)
+        except socket.gaierror as e:
+            entry = (time.monotonic() + self.negative_ttl, None, e)
+        with self.lock:
+            self.cache[key] = entry
+        return entry
+
+    def resolve(self, host, port):
+        """Daftar addrinfo untuk (host, port), dari cache jika belum kedaluwarsa."""
+        key = (host, port)
+        with self.lock:
+            entry = self.cache.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self.hits += 1
+            else:
+                entry = None
+                self.misses += 1
+                waiter = self.inflight.get(key)
+                owner = waiter is None
+                if owner:
+                    waiter = self.inflight[key] = threading.Event()
+        if entry is None:
+            if owner:
+                try:
+                    entry = self._lookup(key)
+                finally:
+                    with self.lock:
+                        del self.inflight[key]
+                    waiter.set()
+            else:
+                waiter.wait()
+                with self.lock:
+                    entry = self.cache.get(key)
+                if entry is None:
+                    # lookup pemilik gagal dengan error selain gaierror, coba sendiri
+                    entry = self._lookup(key)
+        _, result, error = entry
+        if error is not None:
+            raise error
+        return result
+
+    def resolve_many(self, addresses):
+        """Resolve banyak (host, port) bersamaan, kembalikan {address: addrinfo atau exception}."""
+        if self.executor is None:
+            with self.lock:
+                if self.executor is None:
+                    self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='Resolver')
+        futures = {address: self.executor.submit(self.resolve, *address) for address in set(addresses)}
+        results = {}
+        for address, future in futures.items():
+            try:
+                results[address] = future.result()
+            except OSError as e:
+                results[address] = e
+        return results
+
+    async def aresolve(self, host, port):
+        """Versi asyncio dari resolve; lookup yang tidak ada di cache berjalan di executor default loop."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.resolve, host, port)
+
+    def create_connection(self, address, timeout=None, connect_delay=CONNECT_DELAY, setup=None):
+        """
+        Seperti socket.create_connection, tetapi memakai cache dan mencoba alamat
+        secara paralel ala happy eyeballs. Socket yang dikembalikan sudah blocking
+        dengan timeout yang diminta. setup(sock), jika diisi, dipanggil untuk setiap
+        socket sebelum connect (misalnya SocketOptions.apply).
+        """
+        host, port = address
+        candidates = interleave(self.resolve(host, port))
+        deadline = None if timeout is None else time.monotonic() + timeout
+        sel = selectors.DefaultSelector()
+        attempts = []
+        errors = []
+        winner = None
+        try:
+            while winner is None:
+                if candidates:
+                    family, type_, proto, _, sockaddr = candidates.pop(0)
+                    try:
+                        sock = socket.socket(family, type_, proto)
+                    except OSError as e:
+                        # family tidak didukung host ini (misalnya IPv6 dimatikan), lanjut ke alamat berikutnya
+                        errors.append(e)
+                        continue
+                    if setup is not None:
+                        try:
+                            setup(sock)
+                        except OSError as e:
+                            # opsi socket ditolak untuk alamat ini, socket belum masuk attempts
+                            errors.append(e)
+                            sock.close()
+                            continue
+                        except BaseException:
+                            sock.close()
+                            raise
+                    sock.setblocking(False)
+                    err = sock.connect_ex(sockaddr)
+                    if err in (0, errno.EINPROGRESS, errno.EWOULDBLOCK):
+                        sel.register(sock, selectors.EVENT_WRITE, sockaddr)
+                        attempts.append(sock)
+                    else:
+                        errors.append(OSError(err, os.strerror(err), sockaddr))
+                        sock.close()
+                        continue
+                if not attempts:
+                    break
+
+                wait = connect_delay if candidates else None
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        errors.append(socket.timeout(f"connect to {host}:{port} timed out"))
+                        break
+                    wait = remaining if wait is None else min(wait, remaining)
+                for key, _ in sel.select(wait):
+                    sock = key.fileobj
+                    err = sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+                    sel.unregister(sock)
+                    attempts.remove(sock)
+                    if err == 0:
+                        winner = sock
+                        break
+                    errors.append(OSError(err, os.strerror(err), key.data))
+                    sock.close()
+        finally:
+            for sock in attempts:
+                if sock is not winner:
+                    sock.close()
+            sel.close()
+
+        if winner is None:
+            if errors:
+                raise errors[-1]
+            raise OSError(f"no addresses for {host}:{port}")
+        winner.setblocking(True)
+        winner.settimeout(timeout)
+        return winner
+
+
+_default = None
+_default_pid = None
+
+
+def default_resolver():
+    """Resolver bersama per proses (dibuat ulang setelah fork, karena thread tidak ikut ter-fork)."""
+    global _default, _default_pid
+    if _default is None or _default_pid != os.getpid():
+        _default = Resolver()
+        _default_pid = os.getpid()
+    return _default
+
+
+def create_connection(address, timeout=None, setup=None):
+    return default_resolver().create_connection(address, timeout, setup=setup)
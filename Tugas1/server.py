@@ -1,24 +1,38 @@
+"""
+Echo server.
+
+* single     : satu klien dalam satu waktu, recv 32 byte dengan log setiap chunk (mode asli)
+* concurrent : satu thread per klien, recv_into ke buffer besar yang dipakai ulang
+               lalu sendall dari memoryview buffer itu, tanpa log per chunk.
+               Dengan --splice data direlay di kernel lewat pipe (os.splice,
+               Linux) sehingga tidak pernah disalin ke user space.
+
+Dipakai juga sebagai probe kesehatan jaringan, lihat client.py --mode bench.
+"""
+
+import os
 import sys
 import socket
 import logging
+import argparse
+import threading
+
+BUFFER_SIZE = 256 * 1024
 
 logging.basicConfig(level=logging.INFO)
 
-try:
-    # Create a TCP/IP socket
-    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    #sock.settimeout(10)
-    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR,1 )
-
-    # Bind the socket to the port
-    server_address = ('0.0.0.0', 32434) #--> gunakan 0.0.0.0 agar binding ke seluruh ip yang tersedia
-
-    logging.info(f"starting up on {server_address}")
-    sock.bind(server_address)
-    # Listen for incoming connections
-    sock.listen(1)
-    #1 = backlog, merupakan jumlah dari koneksi yang belum teraccept/dilayani yang bisa ditampung, diluar jumlah
-    #             tsb, koneks akan direfuse
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Echo server")
+    parser.add_argument('--host', default='0.0.0.0', help='Host IP to bind the server (default: 0.0.0.0)')
+    parser.add_argument('--port', type=int, default=32434, help='TCP port to listen on (default: 32434)')
+    parser.add_argument('--mode', choices=['single', 'concurrent'], default='single', help='single: one client at a time, concurrent: one thread per client (default: single)')
+    parser.add_argument('--buffer', type=int, default=BUFFER_SIZE, help=f'recv_into buffer size for concurrent mode (default: {BUFFER_SIZE})')
+    parser.add_argument('--splice', action='store_true', help='Relay data in the kernel with os.splice through a pipe (Linux, concurrent mode)')
+    return parser.parse_args()
+
+
+def serve_single(sock):
     while True:
         # Wait for a connection
         logging.info("waiting for a connection")
@@ -39,8 +53,90 @@ try:
                break
         # Clean up the connection
         connection.close()
-except Exception as ee:
-    logging.info(f"ERROR: {str(ee)}")
-finally:
-    logging.info('closing')
-    sock.close()
+
+
+def echo_copy(connection, buffer_size):
+    """recv_into ke satu buffer per koneksi, kirim balik langsung dari memoryview-nya."""
+    buf = bytearray(buffer_size)
+    view = memoryview(buf)
+    total = 0
+    while True:
+        n = connection.recv_into(buf)
+        if not n:
+            return total
+        connection.sendall(view[:n])
+        total += n
+
+
+def echo_splice(connection, buffer_size):
+    """socket -> pipe -> socket dengan os.splice, data tidak masuk ke user space."""
+    fd = connection.fileno()
+    r, w = os.pipe()
+    total = 0
+    try:
+        while True:
+            n = os.splice(fd, w, buffer_size)
+            if not n:
+                return total
+            while n:
+                moved = os.splice(r, fd, n)
+                n -= moved
+                total += moved
+    finally:
+        os.close(r)
+        os.close(w)
+
+
+def handle_client(connection, client_address, buffer_size, splice):
+    echo = echo_splice if splice else echo_copy
+    try:
+        total = echo(connection, buffer_size)
+        logging.debug(f"echoed {total} bytes to {client_address}")
+    except OSError as e:
+        logging.info(f"ERROR: {client_address}: {str(e)}")
+    finally:
+        connection.close()
+
+
+def serve_concurrent(sock, buffer_size, splice):
+    if splice and not hasattr(os, 'splice'):
+        logging.info("os.splice not available, falling back to recv_into")
+        splice = False
+    logging.info(f"concurrent echo, buffer {buffer_size} bytes, {'splice' if splice else 'recv_into'}")
+    while True:
+        connection, client_address = sock.accept()
+        connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        threading.Thread(target=handle_client, args=(connection, client_address, buffer_size, splice),
+                         daemon=True).start()
+
+
+def main():
+    args = parse_args()
+    try:
+        # Create a TCP/IP socket
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        #sock.settimeout(10)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR,1 )
+
+        # Bind the socket to the port
+        server_address = (args.host, args.port) #--> gunakan 0.0.0.0 agar binding ke seluruh ip yang tersedia
+
+        logging.info(f"starting up on {server_address}")
+        sock.bind(server_address)
+        # Listen for incoming connections
+        sock.listen(1 if args.mode == 'single' else 128)
+        #1 = backlog, merupakan jumlah dari koneksi yang belum teraccept/dilayani yang bisa ditampung, diluar jumlah
+        #             tsb, koneks akan direfuse
+        if args.mode == 'single':
+            serve_single(sock)
+        else:
+            serve_concurrent(sock, args.buffer, args.splice)
+    except Exception as ee:
+        logging.info(f"ERROR: {str(ee)}")
+    finally:
+        logging.info('closing')
+        sock.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,5 @@
 import socket
+from resolver import default_resolver
 
 
 def get_my_socket():
@@ -8,7 +9,8 @@ def get_my_socket():
     s.settimeout(10)
     timeout = s.gettimeout()
     print(f"timeout : {timeout}")
-    koneksi = socket.getaddrinfo('www.its.ac.id',80, proto=socket.IPPROTO_TCP)
+    # lewat resolver bercache, lookup berikutnya ke host yang sama tidak ke DNS lagi
+    koneksi = default_resolver().resolve('www.its.ac.id', 80)
     print(koneksi)
 
 
@@ -16,13 +18,13 @@ def get_my_info():
     hostname = socket.gethostname()
     print(f"hostname : {hostname}")
 
-    ip_address = socket.gethostbyname(hostname)
+    ip_address = next(info[4][0] for info in default_resolver().resolve(hostname, None) if info[0] == socket.AF_INET)
     print(f"ipaddress: {ip_address}")
 
 def get_remote_info():
     remote_host = 'www.espnfc.com'
     try:
-        remote_host_ip = socket.gethostbyname(remote_host)
+        remote_host_ip = next(info[4][0] for info in default_resolver().resolve(remote_host, None) if info[0] == socket.AF_INET)
         print(f"ip address dari {remote_host} adalah {remote_host_ip}")
     except Exception as ee:
         print(f"ERROR : {str(ee)}")
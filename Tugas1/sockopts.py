@@ -0,0 +1,124 @@
+"""
+Opsi socket bersama untuk server dan klien di repo ini (ETS, Tugas3, Tugas4).
+
+Setiap opsi bisa diisi lewat CLI (add_socket_args) atau environment variable
+SOCK_*; CLI yang tidak diisi memakai nilai dari environment, dan nilai 0 /
+kosong berarti default kernel atau default program:
+
+    --sock_nodelay     SOCK_NODELAY=1       TCP_NODELAY (--no-sock_nodelay mematikannya)
+    --sock_sndbuf N    SOCK_SNDBUF=N        SO_SNDBUF (byte)
+    --sock_rcvbuf N    SOCK_RCVBUF=N        SO_RCVBUF (byte)
+    --sock_keepalive   SOCK_KEEPALIVE=1     SO_KEEPALIVE (--no-sock_keepalive mematikannya)
+    --sock_keepidle N  SOCK_KEEPIDLE=N      TCP_KEEPIDLE/KEEPINTVL/KEEPCNT (Linux)
+    --sock_keepintvl N SOCK_KEEPINTVL=N
+    --sock_keepcnt N   SOCK_KEEPCNT=N
+    --backlog N        SOCK_BACKLOG=N       backlog listen()
+    --chunk_size N     SOCK_CHUNK_SIZE=N    ukuran recv/baca per potongan data
+
+Server memasang opsi di socket listening sebelum listen(); di Linux socket
+hasil accept mewarisi TCP_NODELAY, keepalive, dan ukuran buffer dari socket
+listening (buffer harus diset sebelum listen agar window scaling ikut).
+Klien memasang opsi sebelum connect lewat parameter setup di
+resolver.create_connection.
+
+export() menulis opsi kembali ke environment, sehingga proses anak (worker
+process, forkserver pool klien, server yang dijalankan bench.py) memakai
+opsi yang sama.
+"""
+
+import os
+import socket
+import argparse
+
+ENV_PREFIX = 'SOCK_'
+FIELDS = ('nodelay', 'sndbuf', 'rcvbuf', 'keepalive', 'keepidle', 'keepintvl', 'keepcnt', 'backlog', 'chunk_size')
+FLAGS = ('nodelay', 'keepalive')
+
+
+def _env_value(name, environ=None):
+    value = (environ if environ is not None else os.environ).get(ENV_PREFIX + name.upper(), '')
+    if name in FLAGS:
+        return value.lower() in ('1', 'true', 'yes', 'on')
+    try:
+        return int(value) if value else 0
+    except ValueError:
+        raise ValueError(f"Invalid {ENV_PREFIX + name.upper()} value: {value}")
+
+
+class SocketOptions:
+    def __init__(self, nodelay=False, sndbuf=0, rcvbuf=0, keepalive=False, keepidle=0, keepintvl=0, keepcnt=0,
+                 backlog=0, chunk_size=0):
+        self.nodelay = nodelay
+        self.sndbuf = sndbuf
+        self.rcvbuf = rcvbuf
+        self.keepalive = keepalive
+        self.keepidle = keepidle
+        self.keepintvl = keepintvl
+        self.keepcnt = keepcnt
+        self.backlog = backlog
+        self.chunk_size = chunk_size
+
+    def apply(self, sock):
+        """Pasang opsi ke sock (sebelum listen/connect), kembalikan sock."""
+        if sock.family in (socket.AF_INET, socket.AF_INET6) and self.nodelay:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        if self.sndbuf:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, self.sndbuf)
+        if self.rcvbuf:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.rcvbuf)
+        if self.keepalive:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+            for name, value in (('TCP_KEEPIDLE', self.keepidle), ('TCP_KEEPINTVL', self.keepintvl),
+                                ('TCP_KEEPCNT', self.keepcnt)):
+                if value and hasattr(socket, name):
+                    sock.setsockopt(socket.IPPROTO_TCP, getattr(socket, name), value)
+        return sock
+
+    def listen(self, sock, default_backlog):
+        self.apply(sock)
+        sock.listen(self.backlog or default_backlog)
+
+    def chunk(self, default):
+        return self.chunk_size or default
+
+    def export(self, environ=None):
+        """Tulis opsi ke environment (os.environ jika environ None) untuk proses anak."""
+        environ = os.environ if environ is None else environ
+        for name in FIELDS:
+            value = getattr(self, name)
+            key = ENV_PREFIX + name.upper()
+            if value:
+                environ[key] = '1' if value is True else str(value)
+            else:
+                environ.pop(key, None)
+        return environ
+
+    def __str__(self):
+        values = [f"{name}={getattr(self, name)}" for name in FIELDS if getattr(self, name)]
+        return ' '.join(values) or 'defaults'
+
+
+def options_from_env(environ=None):
+    return SocketOptions(**{name: _env_value(name, environ) for name in FIELDS})
+
+
+def add_socket_args(parser):
+    env = options_from_env()
+    group = parser.add_argument_group('socket options (default from SOCK_* environment variables)')
+    # BooleanOptionalAction: --no-sock_nodelay mematikan flag yang dinyalakan lewat SOCK_NODELAY=1
+    group.add_argument('--sock_nodelay', action=argparse.BooleanOptionalAction, default=env.nodelay,
+                       help='Set TCP_NODELAY')
+    group.add_argument('--sock_sndbuf', type=int, default=env.sndbuf, help='SO_SNDBUF in bytes, 0 keeps the kernel default')
+    group.add_argument('--sock_rcvbuf', type=int, default=env.rcvbuf, help='SO_RCVBUF in bytes, 0 keeps the kernel default')
+    group.add_argument('--sock_keepalive', action=argparse.BooleanOptionalAction, default=env.keepalive,
+                       help='Enable SO_KEEPALIVE')
+    group.add_argument('--sock_keepidle', type=int, default=env.keepidle, help='Idle seconds before keepalive probes (TCP_KEEPIDLE)')
+    group.add_argument('--sock_keepintvl', type=int, default=env.keepintvl, help='Seconds between keepalive probes (TCP_KEEPINTVL)')
+    group.add_argument('--sock_keepcnt', type=int, default=env.keepcnt, help='Failed probes before the connection is dropped (TCP_KEEPCNT)')
+    group.add_argument('--backlog', type=int, default=env.backlog, help='listen() backlog, 0 keeps the program default')
+    group.add_argument('--chunk_size', type=int, default=env.chunk_size, help='Bytes per recv/read chunk, 0 keeps the program default')
+
+
+def options_from_args(args):
+    return SocketOptions(args.sock_nodelay, args.sock_sndbuf, args.sock_rcvbuf, args.sock_keepalive,
+                         args.sock_keepidle, args.sock_keepintvl, args.sock_keepcnt, args.backlog, args.chunk_size)
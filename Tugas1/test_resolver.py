@@ -0,0 +1,162 @@
+"""
+Test resolver.py dengan resolver stub lokal (static_resolve_fn), tanpa DNS.
+
+Jalankan dari folder ini: python -m pytest -q  (atau python -m unittest)
+"""
+
+import time
+import socket
+import asyncio
+import unittest
+
+from resolver import Resolver, static_resolve_fn, interleave
+
+
+class CountingStub:
+    """static_resolve_fn yang menghitung berapa kali lookup benar-benar dijalankan."""
+
+    def __init__(self, table):
+        self.resolve = static_resolve_fn(table)
+        self.calls = 0
+
+    def __call__(self, *args):
+        self.calls += 1
+        return self.resolve(*args)
+
+
+def listener(family=socket.AF_INET, host='127.0.0.1'):
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.bind((host, 0))
+    sock.listen(8)
+    return sock
+
+
+class CacheTest(unittest.TestCase):
+    def test_hit(self):
+        stub = CountingStub({'ets': ['127.0.0.1']})
+        resolver = Resolver(resolve_fn=stub)
+        first = resolver.resolve('ets', 6666)
+        second = resolver.resolve('ets', 6666)
+        self.assertEqual(first, second)
+        self.assertEqual(first[0][4], ('127.0.0.1', 6666))
+        self.assertEqual(stub.calls, 1)
+        self.assertEqual((resolver.hits, resolver.misses), (1, 1))
+
+    def test_port_is_part_of_key(self):
+        stub = CountingStub({'ets': ['127.0.0.1']})
+        resolver = Resolver(resolve_fn=stub)
+        resolver.resolve('ets', 6666)
+        resolver.resolve('ets', 6667)
+        self.assertEqual(stub.calls, 2)
+
+    def test_expiry(self):
+        stub = CountingStub({'ets': ['127.0.0.1']})
+        resolver = Resolver(ttl=0.05, resolve_fn=stub)
+        resolver.resolve('ets', 6666)
+        time.sleep(0.1)
+        resolver.resolve('ets', 6666)
+        self.assertEqual(stub.calls, 2)
+        self.assertEqual(resolver.hits, 0)
+
+    def test_negative_cache(self):
+        stub = CountingStub({})
+        resolver = Resolver(negative_ttl=0.05, resolve_fn=stub)
+        for _ in range(3):
+            with self.assertRaises(socket.gaierror):
+                resolver.resolve('missing', 6666)
+        self.assertEqual(stub.calls, 1)
+        time.sleep(0.1)
+        with self.assertRaises(socket.gaierror):
+            resolver.resolve('missing', 6666)
+        self.assertEqual(stub.calls, 2)
+
+    def test_resolve_many(self):
+        stub = CountingStub({'a': ['127.0.0.1'], 'b': ['127.0.0.2']})
+        resolver = Resolver(resolve_fn=stub)
+        results = resolver.resolve_many([('a', 1), ('b', 1), ('a', 1), ('c', 1)])
+        self.assertEqual(results[('a', 1)][0][4], ('127.0.0.1', 1))
+        self.assertEqual(results[('b', 1)][0][4], ('127.0.0.2', 1))
+        self.assertIsInstance(results[('c', 1)], socket.gaierror)
+        self.assertEqual(stub.calls, 3)
+
+
+class AsyncTest(unittest.TestCase):
+    def test_aresolve_uses_cache(self):
+        stub = CountingStub({'ets': ['127.0.0.1', '::1']})
+        resolver = Resolver(resolve_fn=stub)
+
+        async def lookup():
+            return await asyncio.gather(*(resolver.aresolve('ets', 6666) for _ in range(4)))
+
+        results = asyncio.run(lookup())
+        self.assertTrue(all(r == results[0] for r in results))
+        self.assertEqual(len(results[0]), 2)
+        # lookup bersamaan untuk key yang sama dipakai bersama
+        self.assertEqual(stub.calls, 1)
+
+    def test_aresolve_error(self):
+        resolver = Resolver(resolve_fn=static_resolve_fn({}))
+        with self.assertRaises(socket.gaierror):
+            asyncio.run(resolver.aresolve('missing', 6666))
+
+
+class HappyEyeballsTest(unittest.TestCase):
+    def test_interleave(self):
+        infos = static_resolve_fn({'h': ['::1', '::2', '127.0.0.1', '127.0.0.2']})('h', 1)
+        order = [info[4][0] for info in interleave(infos)]
+        self.assertEqual(order, ['::1', '127.0.0.1', '::2', '127.0.0.2'])
+
+    def test_fallback_to_next_family(self):
+        # hanya IPv4 yang listen: percobaan ::1 gagal (ditolak atau IPv6 tidak tersedia), IPv4 dipakai
+        server = listener()
+        port = server.getsockname()[1]
+        resolver = Resolver(resolve_fn=static_resolve_fn({'ets': ['::1', '127.0.0.1']}))
+        try:
+            sock = resolver.create_connection(('ets', port), timeout=2, connect_delay=0.05)
+            with sock:
+                self.assertEqual(sock.family, socket.AF_INET)
+                self.assertEqual(sock.getpeername(), ('127.0.0.1', port))
+                self.assertEqual(sock.gettimeout(), 2)
+        finally:
+            server.close()
+
+    def test_setup_called_for_each_attempt(self):
+        server = listener()
+        port = server.getsockname()[1]
+        resolver = Resolver(resolve_fn=static_resolve_fn({'ets': ['::1', '127.0.0.1']}))
+        seen = []
+        try:
+            sock = resolver.create_connection(('ets', port), timeout=2, setup=lambda s: seen.append(s.family))
+            sock.close()
+        finally:
+            server.close()
+        self.assertIn(socket.AF_INET, seen)
+
+    def test_setup_error_closes_socket(self):
+        server = listener()
+        port = server.getsockname()[1]
+        resolver = Resolver(resolve_fn=static_resolve_fn({'ets': ['127.0.0.1']}))
+        created = []
+
+        def setup(sock):
+            created.append(sock)
+            raise OSError('setsockopt ditolak')
+
+        try:
+            with self.assertRaises(OSError):
+                resolver.create_connection(('ets', port), timeout=2, setup=setup)
+        finally:
+            server.close()
+        self.assertEqual([s.fileno() for s in created], [-1])
+
+    def test_all_addresses_fail(self):
+        server = listener()
+        port = server.getsockname()[1]
+        server.close()
+        resolver = Resolver(resolve_fn=static_resolve_fn({'ets': ['::1', '127.0.0.1']}))
+        with self.assertRaises(OSError):
+            resolver.create_connection(('ets', port), timeout=2, connect_delay=0.05)
+
+
+if __name__ == '__main__':
+    unittest.main()
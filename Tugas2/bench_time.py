@@ -0,0 +1,255 @@
+"""
+Benchmark time server (server.py): mode thread vs selectors.
+
+Untuk setiap mode server dijalankan sebagai subprocess di loopback, lalu diukur:
+
+* idle : buka --connections koneksi dan biarkan semuanya terbuka, lalu kirim
+         satu TIME di setiap koneksi; dicatat berapa koneksi yang berhasil
+         dibuka dan dibalas dalam --timeout detik
+* rps  : --clients koneksi per proses klien (--procs proses), masing-masing
+         mengirim --pipeline baris TIME sekaligus lalu menunggu semua JAM,
+         berulang selama --duration detik
+* saturate : seperti rps, tetapi jumlah proses klien dinaikkan 1, 2, 4, ...
+         sampai --max_procs atau sampai throughput naik kurang dari
+         SATURATION_GAIN; baris yang dicatat adalah titik throughput tertinggi
+
+--configs memilih opsi server tambahan (CONFIGS), misalnya untuk melihat efek
+cache jam dan log per request:
+    python3 bench_time.py --tests saturate --modes selectors \\
+        --configs baseline cached cached-quiet
+
+Contoh:
+    python3 bench_time.py --modes thread selectors --connections 1000 5000 10000 \\
+        --clients 100 --pipeline 1 16 --duration 5
+"""
+
+import os
+import sys
+import csv
+import time
+import socket
+import signal
+import logging
+import argparse
+import itertools
+import selectors
+import subprocess
+import multiprocessing
+
+from server import raise_fd_limit
+
+SERVER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "server.py")
+FIELDS = ["mode", "config", "test", "connections", "pipeline", "opened", "answered", "requests", "seconds", "rps"]
+CONFIGS = {
+    "default": [],
+    "baseline": ["--clock", "now", "--log_mode", "requests"],
+    "cached": ["--clock", "cached", "--log_mode", "requests"],
+    "cached-quiet": ["--clock", "cached", "--log_mode", "quiet"],
+}
+# kenaikan throughput minimum agar penambahan proses klien dianggap belum jenuh
+SATURATION_GAIN = 0.05
+
+
+def free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class LocalTimeServer:
+    def __init__(self, mode, backlog, extra_args=()):
+        self.mode = mode
+        self.port = free_port()
+        self.cmd = [sys.executable, SERVER, "--host", "127.0.0.1", "--port", str(self.port),
+                    "--mode", mode, "--backlog", str(backlog)] + list(extra_args)
+        self.process = None
+
+    def __enter__(self):
+        self.process = subprocess.Popen(self.cmd, start_new_session=True,
+                                        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        deadline = time.time() + 10
+        while time.time() < deadline:
+            try:
+                socket.create_connection(("127.0.0.1", self.port), timeout=0.5).close()
+                return self
+            except OSError:
+                time.sleep(0.1)
+        self.__exit__()
+        raise RuntimeError(f"Server {self.mode} tidak listen di port {self.port}")
+
+    def __exit__(self, *exc):
+        try:
+            os.killpg(self.process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        self.process.wait()
+
+
+def idle_test(port, connections, timeout):
+    """Buka banyak koneksi sekaligus, lalu satu TIME per koneksi."""
+    socks = []
+    start = time.perf_counter()
+    try:
+        for _ in range(connections):
+            try:
+                socks.append(socket.create_connection(("127.0.0.1", port), timeout=timeout))
+            except OSError:
+                break
+        opened = len(socks)
+
+        sel = selectors.DefaultSelector()
+        pending = {}
+        for s in socks:
+            s.setblocking(False)
+            try:
+                s.send(b"TIME\r\n")
+            except OSError:
+                continue
+            sel.register(s, selectors.EVENT_READ)
+            pending[s] = b""
+
+        answered = 0
+        deadline = time.perf_counter() + timeout
+        while pending and time.perf_counter() < deadline:
+            for key, _ in sel.select(timeout=max(0.0, deadline - time.perf_counter())):
+                s = key.fileobj
+                try:
+                    data = s.recv(64)
+                except BlockingIOError:
+                    continue
+                except OSError:
+                    data = b""
+                buf = pending[s] + data
+                if data and b"\r\n" not in buf:
+                    pending[s] = buf
+                    continue
+                answered += buf.startswith(b"JAM ")
+                sel.unregister(s)
+                del pending[s]
+        sel.close()
+        return opened, answered, time.perf_counter() - start
+    finally:
+        for s in socks:
+            s.close()
+
+
+def _rps_worker(port, clients, pipeline, duration, results):
+    raise_fd_limit()
+    request = b"TIME\r\n" * pipeline
+    sel = selectors.DefaultSelector()
+    waiting = {}
+    for _ in range(clients):
+        s = socket.create_connection(("127.0.0.1", port))
+        s.setblocking(False)
+        sel.register(s, selectors.EVENT_READ)
+        s.sendall(request)
+        waiting[s] = pipeline
+
+    done = 0
+    end = time.perf_counter() + duration
+    while time.perf_counter() < end:
+        for key, _ in sel.select(timeout=0.5):
+            s = key.fileobj
+            try:
+                data = s.recv(65536)
+            except BlockingIOError:
+                continue
+            if not data:
+                sel.unregister(s)
+                continue
+            replies = data.count(b"\n")
+            done += replies
+            waiting[s] -= replies
+            if waiting[s] <= 0:
+                waiting[s] += pipeline
+                s.sendall(request)
+    for s in waiting:
+        s.close()
+    results.put(done)
+
+
+def rps_test(port, clients, pipeline, duration, procs):
+    results = multiprocessing.Queue()
+    workers = [multiprocessing.Process(target=_rps_worker, args=(port, clients, pipeline, duration, results))
+               for _ in range(procs)]
+    start = time.perf_counter()
+    for w in workers:
+        w.start()
+    done = sum(results.get() for _ in workers)
+    for w in workers:
+        w.join()
+    return done, time.perf_counter() - start
+
+
+def saturate_test(port, clients, pipeline, duration, max_procs):
+    """Naikkan jumlah proses klien sampai throughput server tidak naik lagi."""
+    best = (0, 0, 1.0)
+    procs = 1
+    while procs <= max_procs:
+        done, seconds = rps_test(port, clients, pipeline, duration, procs)
+        rps = done / seconds
+        logging.info(f"  {procs} proses klien x {clients} koneksi: {rps:.0f} req/s")
+        if rps < best[1] / best[2] * (1 + SATURATION_GAIN):
+            if rps > best[1] / best[2]:
+                best = (procs, done, seconds)
+            break
+        best = (procs, done, seconds)
+        procs *= 2
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark time server mode thread vs selectors.")
+    parser.add_argument("--modes", nargs="+", choices=["thread", "selectors"], default=["thread", "selectors"], help="Mode server yang diuji (default: thread selectors)")
+    parser.add_argument("--configs", nargs="+", choices=list(CONFIGS), default=["default"], help="Opsi server tambahan yang diuji (default: default)")
+    parser.add_argument("--tests", nargs="+", choices=["idle", "rps", "saturate"], default=["idle", "rps"], help="Tes yang dijalankan (default: idle rps)")
+    parser.add_argument("--connections", nargs="+", type=int, default=[1000, 5000, 10000], help="Jumlah koneksi idle (default: 1000 5000 10000)")
+    parser.add_argument("--timeout", type=float, default=10.0, help="Batas waktu connect dan balasan tes idle (default: 10)")
+    parser.add_argument("--clients", type=int, default=50, help="Koneksi per proses klien untuk tes rps (default: 50)")
+    parser.add_argument("--procs", type=int, default=1, help="Jumlah proses klien untuk tes rps (default: 1)")
+    parser.add_argument("--max_procs", type=int, default=os.cpu_count(), help=f"Batas proses klien untuk tes saturate (default: {os.cpu_count()})")
+    parser.add_argument("--pipeline", nargs="+", type=int, default=[1, 16], help="Baris TIME per kiriman untuk tes rps (default: 1 16)")
+    parser.add_argument("--duration", type=float, default=5.0, help="Lama tes rps dalam detik (default: 5)")
+    parser.add_argument("--backlog", type=int, default=4096, help="Backlog listen server untuk kedua mode (default: 4096)")
+    parser.add_argument("--output", default="bench_time.csv", help="File hasil CSV (default: bench_time.csv)")
+    args = parser.parse_args()
+    logging.info(f"File descriptor limit klien: {raise_fd_limit()}")
+
+    rows = []
+    for mode, config in itertools.product(args.modes, args.configs):
+        extra_args = CONFIGS[config]
+        if "idle" in args.tests:
+            for n in args.connections:
+                with LocalTimeServer(mode, args.backlog, extra_args) as server:
+                    opened, answered, seconds = idle_test(server.port, n, args.timeout)
+                logging.info(f"[{mode} {config}] idle {n}: dibuka {opened}, dibalas {answered} ({seconds:.2f}s)")
+                rows.append({"mode": mode, "config": config, "test": "idle", "connections": n, "pipeline": 1,
+                             "opened": opened, "answered": answered, "requests": answered,
+                             "seconds": round(seconds, 3), "rps": round(answered / seconds, 1) if seconds else 0})
+        for pipeline in args.pipeline:
+            if "rps" in args.tests:
+                with LocalTimeServer(mode, args.backlog, extra_args) as server:
+                    done, seconds = rps_test(server.port, args.clients, pipeline, args.duration, args.procs)
+                logging.info(f"[{mode} {config}] rps pipeline {pipeline}: {done} request, {done / seconds:.0f} req/s")
+                rows.append({"mode": mode, "config": config, "test": "rps", "connections": args.clients * args.procs,
+                             "pipeline": pipeline, "opened": args.clients * args.procs, "answered": "",
+                             "requests": done, "seconds": round(seconds, 3), "rps": round(done / seconds, 1)})
+            if "saturate" in args.tests:
+                logging.info(f"[{mode} {config}] saturate pipeline {pipeline}")
+                with LocalTimeServer(mode, args.backlog, extra_args) as server:
+                    procs, done, seconds = saturate_test(server.port, args.clients, pipeline, args.duration,
+                                                         args.max_procs)
+                logging.info(f"[{mode} {config}] puncak {done / seconds:.0f} req/s dengan {procs} proses klien")
+                rows.append({"mode": mode, "config": config, "test": "saturate", "connections": args.clients * procs,
+                             "pipeline": pipeline, "opened": args.clients * procs, "answered": "",
+                             "requests": done, "seconds": round(seconds, 3), "rps": round(done / seconds, 1)})
+
+    with open(args.output, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+    logging.info(f"Hasil disimpan ke {args.output}")
+
+
+if __name__ == "__main__":
+    main()
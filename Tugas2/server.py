@@ -1,20 +1,66 @@
+"""
+Time server: setiap baris TIME\r\n dibalas JAM hh:mm:ss\r\n, QUIT\r\n menutup koneksi.
+
+Dua mode:
+* thread    : satu thread ProcessTheClient per koneksi (mode asli)
+* selectors : satu thread dengan event loop selectors (epoll di Linux), cukup
+              untuk puluhan ribu koneksi TIME yang kebanyakan idle. Setiap
+              koneksi punya bytearray masuk/keluar sendiri; semua baris TIME
+              yang datang bersamaan (pipelining) dibalas dengan satu send.
+
+Balasan JAM berubah hanya sekali per detik, jadi secara default (--clock cached)
+bytes balasan dirender sekali per detik oleh ClockCache dan dipakai bersama semua
+koneksi; --clock now memformat ulang setiap request seperti semula.
+--log_mode quiet tidak mencatat log per request TIME (log koneksi tetap ada).
+"""
+
 from socket import *
 import socket
 import threading
+import selectors
+import argparse
+import resource
 import logging
 import time
 import sys
 from datetime import datetime
 
+RECV_SIZE = 65536
+
+
+class ClockCache:
+    """Balasan JAM hh:mm:ss\r\n yang dirender sekali per detik."""
+
+    def __init__(self):
+        # (detik, bytes) diganti sebagai satu tuple agar thread lain tidak melihat pasangan yang campur
+        self.current = (None, b"")
+
+    def reply(self):
+        now = int(time.time())
+        second, reply = self.current
+        if second != now:
+            reply = f"JAM {time.strftime('%H:%M:%S', time.localtime(now))}\r\n".encode('utf-8')
+            self.current = (now, reply)
+        return reply
+
+
+class SystemClock:
+    """Format ulang jam di setiap request (perilaku awal server)."""
+
+    def reply(self):
+        return f"JAM {datetime.now().strftime('%H:%M:%S')}\r\n".encode('utf-8')
+
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
 
 class ProcessTheClient(threading.Thread):
-    def __init__(self, connection, address):
+    def __init__(self, connection, address, clock=None, log_requests=True):
         self.connection = connection
         self.address = address
+        self.clock = clock or SystemClock()
+        self.log_requests = log_requests
         threading.Thread.__init__(self)
 
     def run(self):
@@ -30,11 +76,10 @@ class ProcessTheClient(threading.Thread):
                         line, buffer = buffer.split(b'\r\n', 1)
 
                         if line == b'TIME':
-                            now = datetime.now()
-                            time_str = now.strftime("%H:%M:%S")
-                            response = f"JAM {time_str}\r\n".encode('utf-8')
+                            response = self.clock.reply()
                             self.connection.sendall(response)
-                            logging.info(f"Sent time {time_str} to {self.address}")
+                            if self.log_requests:
+                                logging.info(f"Sent time {response[4:-2].decode()} to {self.address}")
 
                         elif line == b'QUIT':
                             logging.info(f"Client {self.address} requested to quit")
@@ -53,22 +98,27 @@ class ProcessTheClient(threading.Thread):
         self.connection.close()
 
 class Server(threading.Thread):
-    def __init__(self):
+    def __init__(self, host='0.0.0.0', port=45000, backlog=5, clock=None, log_requests=True):
         self.the_clients = []
+        self.host = host
+        self.port = port
+        self.backlog = backlog
+        self.clock = clock or SystemClock()
+        self.log_requests = log_requests
         self.my_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         threading.Thread.__init__(self)
 
     def run(self):
         try:
             self.my_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-            self.my_socket.bind(('0.0.0.0', 45000))
-            self.my_socket.listen(5)
-            logging.info(f"Time server started on port 45000")
+            self.my_socket.bind((self.host, self.port))
+            self.my_socket.listen(self.backlog)
+            logging.info(f"Time server started on port {self.port}")
 
             while True:
                 self.connection, self.client_address = self.my_socket.accept()
                 logging.info(f"Connection from {self.client_address}")
-                clt = ProcessTheClient(self.connection, self.client_address)
+                clt = ProcessTheClient(self.connection, self.client_address, self.clock, self.log_requests)
                 clt.start()
                 self.the_clients.append(clt)
                 self.the_clients = [c for c in self.the_clients if c.is_alive()]
@@ -81,8 +131,164 @@ class Server(threading.Thread):
             if hasattr(self, 'my_socket'):
                 self.my_socket.close()
 
+class ClientState:
+    __slots__ = ('address', 'inbuf', 'outbuf', 'closing', 'waiting_write')
+
+    def __init__(self, address):
+        self.address = address
+        self.inbuf = bytearray()
+        self.outbuf = bytearray()
+        self.closing = False
+        self.waiting_write = False
+
+
+class EventLoopServer:
+    def __init__(self, host='0.0.0.0', port=45000, backlog=5, clock=None, log_requests=True):
+        self.host = host
+        self.port = port
+        self.backlog = backlog
+        self.clock = clock or SystemClock()
+        self.log_requests = log_requests
+        self.selector = selectors.DefaultSelector()
+        self.my_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+
+    def run(self):
+        try:
+            self.my_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            self.my_socket.bind((self.host, self.port))
+            self.my_socket.listen(self.backlog)
+            self.my_socket.setblocking(False)
+            self.selector.register(self.my_socket, selectors.EVENT_READ)
+            logging.info(f"Time server started on port {self.port} ({type(self.selector).__name__})")
+
+            while True:
+                for key, mask in self.selector.select():
+                    if key.data is None:
+                        self.accept()
+                        continue
+                    if mask & selectors.EVENT_READ:
+                        self.read(key.fileobj, key.data)
+                    if mask & selectors.EVENT_WRITE and key.fileobj.fileno() != -1:
+                        self.write(key.fileobj, key.data)
+
+        except KeyboardInterrupt:
+            logging.info("Server shutting down...")
+        except Exception as e:
+            logging.error(f"Server error: {str(e)}")
+        finally:
+            self.selector.close()
+            self.my_socket.close()
+
+    def accept(self):
+        # accept sebanyak mungkin per event, koneksi baru datang bergelombang
+        while True:
+            try:
+                connection, address = self.my_socket.accept()
+            except BlockingIOError:
+                return
+            except OSError as e:
+                # misal EMFILE: koneksi tetap di backlog sampai ada fd yang bebas
+                logging.error(f"Accept failed: {e}")
+                return
+            logging.info(f"Connection from {address}")
+            connection.setblocking(False)
+            self.selector.register(connection, selectors.EVENT_READ, ClientState(address))
+
+    def read(self, connection, state):
+        try:
+            data = connection.recv(RECV_SIZE)
+        except BlockingIOError:
+            return
+        except OSError as e:
+            logging.error(f"Error processing client request: {str(e)}")
+            self.close(connection, state)
+            return
+        if not data:
+            self.close(connection, state)
+            return
+
+        state.inbuf += data
+        start = 0
+        while True:
+            end = state.inbuf.find(b'\r\n', start)
+            if end < 0:
+                break
+            line = state.inbuf[start:end]
+            start = end + 2
+
+            if line == b'TIME':
+                response = self.clock.reply()
+                state.outbuf += response
+                if self.log_requests:
+                    logging.info(f"Sent time {response[4:-2].decode()} to {state.address}")
+            elif line == b'QUIT':
+                logging.info(f"Client {state.address} requested to quit")
+                state.closing = True
+                break
+            else:
+                logging.warning(f"Unknown request from {state.address}: {bytes(line)}")
+        del state.inbuf[:start]
+
+        if state.outbuf:
+            self.write(connection, state)
+        elif state.closing:
+            self.close(connection, state)
+
+    def write(self, connection, state):
+        try:
+            sent = connection.send(state.outbuf)
+        except BlockingIOError:
+            sent = 0
+        except OSError as e:
+            logging.error(f"Error sending to {state.address}: {str(e)}")
+            self.close(connection, state)
+            return
+        del state.outbuf[:sent]
+
+        if state.outbuf:
+            if not state.waiting_write:
+                # klien lambat membaca: tunggu socket bisa ditulis, berhenti membaca request baru dulu
+                state.waiting_write = True
+                self.selector.modify(connection, selectors.EVENT_WRITE, state)
+        elif state.closing:
+            self.close(connection, state)
+        elif state.waiting_write:
+            state.waiting_write = False
+            self.selector.modify(connection, selectors.EVENT_READ, state)
+
+    def close(self, connection, state):
+        logging.info(f"Closing connection with {state.address}")
+        self.selector.unregister(connection)
+        connection.close()
+
+
+def raise_fd_limit():
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    return hard
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Time server (TIME -> JAM hh:mm:ss)")
+    parser.add_argument('--host', default='0.0.0.0', help='Host IP to bind the server (default: 0.0.0.0)')
+    parser.add_argument('--port', type=int, default=45000, help='TCP port to listen on (default: 45000)')
+    parser.add_argument('--mode', choices=['thread', 'selectors'], default='thread', help='thread per connection or a single-threaded selectors event loop (default: thread)')
+    parser.add_argument('--backlog', type=int, default=5, help='listen() backlog (default: 5)')
+    parser.add_argument('--clock', choices=['cached', 'now'], default='cached', help='cached: render the JAM reply once per second, now: format it on every request (default: cached)')
+    parser.add_argument('--log_mode', choices=['requests', 'quiet'], default='requests', help='quiet drops the per-request log line, connection logs are kept (default: requests)')
+    return parser.parse_args()
+
+
 def main():
-    svr = Server()
+    args = parse_args()
+    logging.info(f"File descriptor limit: {raise_fd_limit()}")
+    clock = ClockCache() if args.clock == 'cached' else SystemClock()
+    log_requests = args.log_mode == 'requests'
+    if args.mode == 'selectors':
+        EventLoopServer(args.host, args.port, args.backlog, clock, log_requests).run()
+        return
+    svr = Server(args.host, args.port, args.backlog, clock, log_requests)
     svr.start()
 
 if __name__ == "__main__":
@@ -0,0 +1,163 @@
+"""
+* class FileCatalog menyimpan daftar file (nama, ukuran, mtime, hash)
+di memori sehingga LIST tidak perlu melakukan scan direktori setiap kali
+
+* catalog diperbarui secara incremental oleh upload/delete dan
+direkonsiliasi secara periodik dengan isi disk oleh thread background
+
+* nama file disimpan terurut sehingga filter prefix dan pagination
+cukup memakai binary search (bisect), tidak tergantung jumlah file
+"""
+
+import os
+import bisect
+import hashlib
+import logging
+import threading
+import time
+
+
+class FileCatalog:
+    def __init__(self, directory='.', with_hash=False, reconcile_interval=30):
+        self.directory = directory
+        self.with_hash = with_hash
+        self.reconcile_interval = reconcile_interval
+        self.entries = {}
+        self.names = []
+        # generation naik setiap update/remove; changed mencatat generation terakhir per nama
+        # agar reconcile tidak menimpa perubahan yang terjadi selama scan berjalan
+        self.generation = 0
+        self.changed = {}
+        self.lock = threading.Lock()
+        self.reconcile()
+        if reconcile_interval and reconcile_interval > 0:
+            t = threading.Thread(target=self._reconcile_loop, name='CatalogReconciler', daemon=True)
+            t.start()
+
+    def _stat_entry(self, name, digest=None):
+        path = os.path.join(self.directory, name)
+        st = os.stat(path)
+        if digest is None and self.with_hash:
+            digest = self._hash_file(path)
+        return dict(name=name, size=st.st_size, mtime=st.st_mtime, hash=digest)
+
+    def _hash_file(self, path):
+        h = hashlib.sha256()
+        with open(path, 'rb') as fp:
+            while True:
+                chunk = fp.read(1024 * 1024)
+                if not chunk:
+                    break
+                h.update(chunk)
+        return h.hexdigest()
+
+    def _scan(self):
+        # file tersembunyi (diawali titik) dan direktori tidak ikut dilayani
+        hasil = {}
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.name.startswith('.') or not entry.is_file():
+                    continue
+                st = entry.stat()
+                hasil[entry.name] = (st.st_size, st.st_mtime)
+        return hasil
+
+    def reconcile(self):
+        """
+        Samakan isi catalog dengan isi direktori di disk. Scan dan hash
+        dilakukan tanpa lock; nama yang diubah update/remove selama itu
+        dibiarkan seperti isi catalog saat ini.
+        """
+        with self.lock:
+            start = self.generation
+            current = dict(self.entries)
+        on_disk = self._scan()
+        updated = {}
+        for name, (size, mtime) in on_disk.items():
+            old = current.get(name)
+            if old and old['size'] == size and old['mtime'] == mtime:
+                updated[name] = old
+                continue
+            digest = None
+            if self.with_hash:
+                try:
+                    digest = self._hash_file(os.path.join(self.directory, name))
+                except OSError:
+                    continue
+            updated[name] = dict(name=name, size=size, mtime=mtime, hash=digest)
+        with self.lock:
+            for name, gen in list(self.changed.items()):
+                if gen <= start:
+                    del self.changed[name]
+                elif name in self.entries:
+                    updated[name] = self.entries[name]
+                else:
+                    updated.pop(name, None)
+            self.entries = updated
+            self.names = sorted(updated)
+        return len(updated)
+
+    def _reconcile_loop(self):
+        while True:
+            time.sleep(self.reconcile_interval)
+            try:
+                self.reconcile()
+            except Exception as e:
+                logging.error(f"Rekonsiliasi catalog gagal: {str(e)}")
+
+    def update(self, name, digest=None):
+        """Dipanggil setelah file ditulis (upload)"""
+        try:
+            entry = self._stat_entry(name, digest)
+        except OSError:
+            self.remove(name)
+            return None
+        with self.lock:
+            self._touch(name)
+            if name not in self.entries:
+                bisect.insort(self.names, name)
+            self.entries[name] = entry
+        return entry
+
+    def remove(self, name):
+        """Dipanggil setelah file dihapus (delete)"""
+        with self.lock:
+            self._touch(name)
+            if self.entries.pop(name, None) is None:
+                return False
+            idx = bisect.bisect_left(self.names, name)
+            if idx < len(self.names) and self.names[idx] == name:
+                del self.names[idx]
+            return True
+
+    def _touch(self, name):
+        # dipanggil dengan self.lock dipegang
+        self.generation += 1
+        self.changed[name] = self.generation
+
+    def get(self, name):
+        with self.lock:
+            return self.entries.get(name)
+
+    def list(self, prefix='', offset=0, limit=None):
+        """
+        Kembalikan (total, entries) untuk nama yang diawali prefix,
+        mulai dari posisi offset sebanyak maksimal limit entry
+        """
+        with self.lock:
+            start = bisect.bisect_left(self.names, prefix)
+            if prefix:
+                # nama terurut, begitu pula potongan sepanjang prefix-nya
+                end = bisect.bisect_right(self.names, prefix, lo=start, key=lambda n: n[:len(prefix)])
+            else:
+                end = len(self.names)
+            total = end - start
+            lo = min(start + offset, end)
+            hi = end if limit is None else min(lo + limit, end)
+            return total, [dict(self.entries[n]) for n in self.names[lo:hi]]
+
+
+if __name__ == '__main__':
+    c = FileCatalog('files', with_hash=True, reconcile_interval=0)
+    print(c.list())
+    print(c.list(prefix='p', offset=0, limit=1))
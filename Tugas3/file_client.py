@@ -1,14 +1,21 @@
+import os
+import sys
 import socket
 import json
+import shlex
 import base64
 import logging
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Tugas1"))
+from resolver import create_connection
+from sockopts import options_from_env
+
 server_address=('172.16.16.101',8889)
 
 def send_command(command_str=""):
     global server_address
-    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    sock.connect(server_address)
+    sock_options = options_from_env()
+    sock = create_connection(server_address, setup=sock_options.apply)
     logging.warning(f"connecting to {server_address}")
     try:
         logging.warning(f"sending message ")
@@ -17,7 +24,7 @@ def send_command(command_str=""):
         data_received="" #empty string
         while True:
             #socket does not receive all data at once, data comes in part, need to be concatenated at the end of process
-            data = sock.recv(16)
+            data = sock.recv(sock_options.chunk(16))
             if data:
                 #data is not empty, concat with previous content
                 data_received += data.decode()
@@ -36,13 +43,17 @@ def send_command(command_str=""):
         return False
 
 
-def remote_list():
+def remote_list(prefix="", offset=0, limit=None):
     command_str=f"LIST"
+    if prefix or offset or limit is not None:
+        command_str=f"LIST {shlex.quote(prefix)} {offset}"
+        if limit is not None:
+            command_str += f" {limit}"
     hasil = send_command(command_str)
     if (hasil['status']=='OK'):
-        print("daftar file : ")
-        for nmfile in hasil['data']:
-            print(f"- {nmfile}")
+        print(f"daftar file ({hasil.get('total', len(hasil['data']))} file): ")
+        for info in hasil.get('files', []):
+            print(f"- {info['name']} ({info['size']} bytes)")
         return True
     else:
         print("Gagal")
@@ -1,19 +1,51 @@
 import os
 import json
+import uuid
 import base64
-from glob import glob
+import hashlib
+import threading
+
+from file_catalog import FileCatalog
+
+BACKENDS = ('plain', 'dedup')
+# digest blob disimpan di xattr inode-nya, sehingga terbaca lewat nama file manapun
+DIGEST_XATTR = 'user.sha256'
 
 
 class FileInterface:
-    def __init__(self):
+    def __init__(self, with_hash=False, reconcile_interval=30, backend='plain'):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend: {backend}")
         if not os.path.exists('files/'):
             os.makedirs('files/')
         os.chdir('files/')
+        # backend 'dedup': isi file yang sama hanya disimpan sekali di .blobs/
+        self.backend = backend
+        # link/hapus blob dilakukan di bawah lock agar blob yatim tidak dihapus saat sedang di-link ulang
+        self.blob_lock = threading.Lock()
+        self.catalog = FileCatalog('.', with_hash=with_hash, reconcile_interval=reconcile_interval)
+        if backend == 'dedup':
+            self._sweep_blobs()
 
     def list(self,params=[]):
+        """LIST [prefix] [offset] [limit], prefix '*' atau '' berarti semua file"""
         try:
-            filelist = glob('*.*')
-            return dict(status='OK',data=filelist)
+            prefix = params[0] if len(params) > 0 and params[0] != '*' else ''
+            offset = int(params[1]) if len(params) > 1 else 0
+            limit = int(params[2]) if len(params) > 2 else None
+            if offset < 0 or (limit is not None and limit < 0):
+                return dict(status='ERROR', data='offset dan limit tidak boleh negatif')
+
+            total, entries = self.catalog.list(prefix, offset, limit)
+            return dict(
+                status='OK',
+                data=[e['name'] for e in entries],
+                files=entries,
+                total=total,
+                offset=offset
+            )
+        except ValueError:
+            return dict(status='ERROR', data='offset dan limit harus berupa angka')
         except Exception as e:
             return dict(status='ERROR',data=str(e))
 
@@ -62,14 +94,106 @@ class FileInterface:
                 return dict(status='ERROR', data=f'Error decoding base64: {str(e)}')
             
             # Simpan file
-            with open(filename, 'wb') as f:
-                f.write(file_content)
+            if self.backend == 'dedup':
+                digest = self._save_dedup(filename, file_content)
+                self.catalog.update(filename, digest)
+            else:
+                with open(filename, 'wb') as f:
+                    f.write(file_content)
+                self.catalog.update(filename)
             
             return dict(status='OK', data=f'{filename} uploaded successfully')
             
         except Exception as e:
             return dict(status='ERROR', data=str(e))
 
+    def _save_dedup(self, filename, file_content):
+        """Simpan isi file sebagai blob .blobs/<sha256> lalu hardlink nama file ke blob"""
+        digest = hashlib.sha256(file_content).hexdigest()
+        blob_dir = os.path.join('.blobs', digest[:2])
+        os.makedirs(blob_dir, exist_ok=True)
+        blob_path = os.path.join(blob_dir, digest)
+        if not os.path.exists(blob_path):
+            tmp_path = os.path.join('.blobs', f"incoming-{uuid.uuid4().hex}")
+            with open(tmp_path, 'wb') as f:
+                f.write(file_content)
+            self._tag_blob(tmp_path, digest)
+            try:
+                os.link(tmp_path, blob_path)
+            except FileExistsError:
+                pass
+            finally:
+                os.remove(tmp_path)
+
+        tmp_link = os.path.join('.blobs', f"link-{uuid.uuid4().hex}")
+        with self.blob_lock:
+            if not os.path.exists(blob_path):
+                # blob yatim dihapus delete/overwrite lain sejak dicek di atas, tulis ulang
+                with open(blob_path, 'wb') as f:
+                    f.write(file_content)
+                self._tag_blob(blob_path, digest)
+            old = self._stat(filename)
+            old_digest = self._blob_digest(filename, old)
+            os.link(blob_path, tmp_link)
+            os.replace(tmp_link, filename)
+            if os.path.lexists(tmp_link):
+                os.remove(tmp_link)
+            self._release_blob(old, old_digest)
+        return digest
+
+    def _stat(self, filename):
+        try:
+            return os.stat(filename)
+        except FileNotFoundError:
+            return None
+
+    def _tag_blob(self, path, digest):
+        try:
+            os.setxattr(path, DIGEST_XATTR, digest.encode())
+        except (OSError, AttributeError):
+            # filesystem tanpa xattr: digest dihitung ulang dari isi file saat dibutuhkan
+            pass
+
+    def _blob_digest(self, filename, st):
+        """Digest blob yang dirujuk filename (stat st), None jika bukan hardlink blob"""
+        if st is None or st.st_nlink < 2:
+            return None
+        try:
+            return os.getxattr(filename, DIGEST_XATTR).decode()
+        except (OSError, AttributeError):
+            pass
+        entry = self.catalog.get(filename)
+        if entry and entry.get('hash') and entry['mtime'] == st.st_mtime:
+            return entry['hash']
+        with open(filename, 'rb') as fp:
+            return hashlib.sha256(fp.read()).hexdigest()
+
+    def _release_blob(self, old, digest):
+        """
+        Nama dengan stat old baru saja dihapus atau ditimpa. Jika isinya blob
+        digest dan blob itu tidak lagi punya nama lain (link count 1), hapus blobnya.
+        """
+        if digest is None:
+            return
+        blob_path = os.path.join('.blobs', digest[:2], digest)
+        try:
+            st = os.stat(blob_path)
+        except FileNotFoundError:
+            return
+        if (st.st_ino, st.st_dev) == (old.st_ino, old.st_dev) and st.st_nlink == 1:
+            os.remove(blob_path)
+
+    def _sweep_blobs(self):
+        """Scan penuh .blobs saat start, hapus blob yatim sisa proses sebelumnya"""
+        for dirpath, _, filenames in os.walk('.blobs'):
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                try:
+                    if os.stat(path).st_nlink == 1:
+                        os.remove(path)
+                except OSError:
+                    pass
+
     def delete(self, params=[]):
         try:
             if not params or params[0] == '':
@@ -81,8 +205,13 @@ class FileInterface:
             if not os.path.exists(filename):
                 return dict(status='ERROR', data=f'File {filename} tidak ditemukan')
             
-            # Hapus file
-            os.remove(filename)
+            # Hapus file, blob dedup ikut dihapus jika tidak dipakai nama lain
+            with self.blob_lock:
+                old = self._stat(filename)
+                old_digest = self._blob_digest(filename, old)
+                os.remove(filename)
+                self._release_blob(old, old_digest)
+            self.catalog.remove(filename)
             
             return dict(status='OK', data=f'{filename} deleted successfully')
             
@@ -94,4 +223,5 @@ class FileInterface:
 if __name__=='__main__':
     f = FileInterface()
     print(f.list())
+    print(f.list(['p', '0', '10']))
     print(f.get(['pokijan.jpg']))
\ No newline at end of file
@@ -19,8 +19,8 @@ string
 
 
 class FileProtocol:
-    def __init__(self):
-        self.file = FileInterface()
+    def __init__(self, backend='plain'):
+        self.file = FileInterface(backend=backend)
         
         logging.basicConfig(
             level=logging.WARNING,
@@ -28,7 +28,8 @@ class FileProtocol:
         )
         
     def proses_string(self, string_datamasuk=''):
-        logging.warning(f"String diproses: {string_datamasuk}")
+        # request UPLOAD membawa isi file base64, jadi hanya awal string yang dicatat
+        logging.debug(f"String diproses: {string_datamasuk[:100]}")
         
         try:
             # Parse command menggunakan shlex untuk handle quoted strings
@@ -40,7 +41,7 @@ class FileProtocol:
             command = parsed_command[0].strip().lower()
             params = [x for x in parsed_command[1:]]
             
-            logging.warning(f"Memproses request: {command} dengan parameter: {params}")
+            logging.debug(f"Memproses request: {command} dengan {len(params)} parameter")
             
             supported_commands = ['list', 'get', 'upload', 'delete']
             if command not in supported_commands:
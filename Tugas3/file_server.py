@@ -2,12 +2,16 @@ from socket import *
 import socket
 import threading
 import logging
+import os
 import time
 import sys
+import argparse
 
 
 from file_protocol import  FileProtocol
-fp = FileProtocol()
+from file_interface import BACKENDS
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Tugas1"))
+from sockopts import SocketOptions, add_socket_args, options_from_args
 
 logging.basicConfig(
     level=logging.WARNING,
@@ -16,10 +20,11 @@ logging.basicConfig(
 
 
 class ProcessTheClient(threading.Thread):
-    def __init__(self, connection, address):
+    def __init__(self, connection, address, protocol, buffer_size=1060):
         self.connection = connection
         self.address = address
-        self.buffer_size = 1060
+        self.protocol = protocol
+        self.buffer_size = buffer_size
         threading.Thread.__init__(self)
         self.daemon = True  
 
@@ -42,7 +47,7 @@ class ProcessTheClient(threading.Thread):
                     logging.warning(f"Received from {self.address}: {request_string[:100]}...")  # Log first 100 chars
                     
                     # Proses request menggunakan FileProtocol
-                    response = fp.proses_string(request_string)
+                    response = self.protocol.proses_string(request_string)
                     
                     # Tambahkan terminator sesuai protokol
                     response_with_terminator = response + "\r\n\r\n"
@@ -77,8 +82,10 @@ class ProcessTheClient(threading.Thread):
                 pass
 
 class Server(threading.Thread):
-    def __init__(self, ipaddress='0.0.0.0', port=8889):
+    def __init__(self, ipaddress='0.0.0.0', port=8889, sock_options=None, protocol=None):
         self.ip_info = (ipaddress, port)
+        self.protocol = protocol or FileProtocol()
+        self.sock_options = sock_options or SocketOptions()
         self.the_clients = []
         self.running = True
         
@@ -98,7 +105,7 @@ class Server(threading.Thread):
             print("-" * 50)
             
             self.my_socket.bind(self.ip_info)
-            self.my_socket.listen(5) 
+            self.sock_options.listen(self.my_socket, 5)
             
             while self.running:
                 try:
@@ -109,7 +116,7 @@ class Server(threading.Thread):
                     print(f"Client connected: {client_address}")
                     
                     # Create new thread for this client
-                    client_thread = ProcessTheClient(connection, client_address)
+                    client_thread = ProcessTheClient(connection, client_address, self.protocol, self.sock_options.chunk(1060))
                     client_thread.start()
                     
                     # Add to client list (cleanup old threads)
@@ -160,21 +167,17 @@ class Server(threading.Thread):
 
 
 def main():
-    ip_address = '0.0.0.0'
-    port = 8889
-    
-    if len(sys.argv) > 1:
-        try:
-            port = int(sys.argv[1])
-        except ValueError:
-            print("Error: Port must be a number")
-            sys.exit(1)
-    
-    if len(sys.argv) > 2:
-        ip_address = sys.argv[2]
+    parser = argparse.ArgumentParser(description="File server Tugas3")
+    parser.add_argument('port', nargs='?', type=int, default=8889, help='Port to listen on (default: 8889)')
+    parser.add_argument('ip', nargs='?', default='0.0.0.0', help='Address to bind (default: 0.0.0.0)')
+    parser.add_argument('--backend', choices=BACKENDS, default='plain',
+                        help='Storage backend: plain copies or content-addressed dedup (default: plain)')
+    add_socket_args(parser)
+    args = parser.parse_args()
     
     try:
-        server = Server(ipaddress=ip_address, port=port)
+        server = Server(ipaddress=args.ip, port=args.port, sock_options=options_from_args(args),
+                        protocol=FileProtocol(backend=args.backend))
         server.start()
         
         while server.is_alive():
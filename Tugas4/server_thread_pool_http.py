@@ -1,12 +1,17 @@
 from socket import *
 import socket
 import time
+import os
 import sys
 import logging
+import argparse
 import multiprocessing
 from concurrent.futures import ThreadPoolExecutor
 from http import HttpServer
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Tugas1"))
+from sockopts import SocketOptions, add_socket_args, options_from_args
+
 httpserver = HttpServer()
 
 logging.basicConfig(
@@ -18,11 +23,11 @@ logging.basicConfig(
 #untuk menggunakan processpoolexecutor, karena tidak mendukung subclassing pada process,
 #maka class ProcessTheClient dirubah dulu menjadi function, tanpda memodifikasi behaviour didalamnya
 
-def ProcessTheClient(connection, address):
+def ProcessTheClient(connection, address, buffer_size=65536):
     logging.info(f"[Connection] Diterima dari {address}")
     try:
         # Baca seluruh payload dari client 
-        data = connection.recv(65536)
+        data = connection.recv(buffer_size)
         if not data:
             logging.warning(f"[Connection] Tidak ada data yang diterima dari {address}")
             return
@@ -60,18 +65,19 @@ def ProcessTheClient(connection, address):
         connection.close()
         logging.info(f"[Connection] Closed {address}")
 
-def Server(host='0.0.0.0', port=8885, pool_size=20):
+def Server(host='0.0.0.0', port=8885, pool_size=20, sock_options=None):
+    sock_options = sock_options or SocketOptions()
     logging.info(f"[Startup] Server berjalan di {host}:{port} dengan pool size {pool_size}")
     with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as my_socket:
         my_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
         my_socket.bind((host, port))
-        my_socket.listen(5)
+        sock_options.listen(my_socket, 5)
         
         with ThreadPoolExecutor(max_workers=pool_size) as executor:
             try:
                 while True:
                     connection, client_address = my_socket.accept()
-                    executor.submit(ProcessTheClient, connection, client_address)
+                    executor.submit(ProcessTheClient, connection, client_address, sock_options.chunk(65536))
             
             except KeyboardInterrupt:
                 logging.info("[Shutdown] Server dihentikan oleh pengguna")
@@ -81,7 +87,12 @@ def Server(host='0.0.0.0', port=8885, pool_size=20):
     logging.info("[Shutdown] Server socket ditutup")
 
 def main():
-    Server()
+    parser = argparse.ArgumentParser(description="HTTP file server")
+    parser.add_argument('--port', type=int, default=8885, help='Port to listen on (default: 8885)')
+    parser.add_argument('--pool_size', type=int, default=20, help='Number of pool workers (default: 20)')
+    add_socket_args(parser)
+    args = parser.parse_args()
+    Server(port=args.port, pool_size=args.pool_size, sock_options=options_from_args(args))
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,353 @@
+"""
+Benchmark matrix untuk server ETS, pengganti script_upload.sh / script_download.sh.
+
+Untuk setiap kombinasi mode server (thread/process) x jumlah worker server, server
+dijalankan sendiri di loopback dengan --workers yang sesuai dan storage baru, lalu
+setiap kombinasi operasi x ukuran file x mode pool klien x jumlah klien diukur
+dengan loadgen.run_load. Pool klien (per mode thread/process) dibuat sekali dengan
+ukuran jumlah klien terbesar dan dipakai ulang di semua titik matriks, dan file
+upload di-encode base64 sekali (kecuali dengan --checksum/--compress). Semua hasil ditulis ke satu file (CSV atau JSON Lines,
+ditentukan dari ekstensi --output), satu baris per titik matriks.
+
+--get_modes menambah dimensi cara server mengirim file GET (read loop, mmap
+bersama, sendfile), misalnya untuk membandingkan 50 downloader file besar:
+    python3 bench.py --operations download --sizes 100 --clients 50 \
+        --server_workers 50 --get_modes read mmap sendfile
+
+--bufsizes dan --chunk_sizes menambah dimensi opsi socket (Tugas1/sockopts.py):
+ukuran SO_SNDBUF/SO_RCVBUF dan ukuran potongan recv/read, dipakai bersama oleh
+server dan klien lewat environment SOCK_SNDBUF, SOCK_RCVBUF, SOCK_CHUNK_SIZE
+(0 = default kernel/program). Opsi socket lain (misalnya SOCK_NODELAY=1) bisa
+diisi di environment sebelum bench dijalankan. Pool klien dibuat ulang untuk
+setiap kombinasi buffer x chunk. Contoh sweep:
+    python3 bench.py --operations upload download --sizes 100 --clients 5 \
+        --server_workers 5 --bufsizes 0 65536 1048576 --chunk_sizes 0 16384 262144
+
+File uji dibuat oleh generate_files.py (streaming, isi deterministik dari --seed,
+--content random/mixed/text untuk data yang sulit/mudah dikompresi). --profiles
+menambah workload berupa kumpulan file dengan distribusi ukuran tertentu (small:
+banyak file kecil, heavy: campuran heavy-tailed, large: file multi-GB); setiap
+request memakai file berikutnya dari urutan acak ber-seed, jadi run yang sama
+mengirim urutan file yang sama. Contoh 2000 request ke 1000 file kecil yang
+mudah dikompresi:
+    python3 bench.py --sizes --profiles small --content text --compress zlib --requests 2000
+
+Contoh:
+    python3 bench.py --operations upload download --sizes 10 50 100 \
+        --clients 1 5 50 --server_workers 1 5 50 --server_modes thread process
+"""
+
+import os
+import sys
+import csv
+import time
+import json
+import shutil
+import signal
+import socket
+import random
+import logging
+import argparse
+import itertools
+import subprocess
+from datetime import datetime
+from functools import partial
+
+from download import download_once
+from upload import worker_task
+from generate_files import CONTENTS, PROFILES, SEED, generate_b64_file, generate_profile, parse_size
+from loadgen import run_load, format_summary, add_load_args, fetch_stats, worker_delta
+from worker_pool import create_pool, encoded_source
+
+SERVER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "server")
+SERVER_SCRIPTS = {"thread": "thread_pool.py", "process": "processing_pool.py"}
+GET_MODES = ["read", "mmap", "sendfile"]
+STARTUP_TIMEOUT = 15.0
+# jeda sebelum STATS diambil: server mencatat metrik setelah respons terakhir terkirim
+STATS_SETTLE = 0.2
+
+FIELDS = [
+    "timestamp", "operation", "workload", "files", "content", "seed", "size_mb", "file_bytes", "server_mode", "server_workers", "get_mode",
+    "bufsize", "chunk_size", "client_mode", "clients", "loop", "checksum", "compress",
+    "requests", "success", "failed", "elapsed", "rps", "bytes_per_sec",
+    "latency_mean", "latency_p50", "latency_p90", "latency_p99", "latency_p99_9", "latency_max",
+    "server_success", "server_failed", "server_workers_active", "server_bytes_in", "server_bytes_out",
+    "server_latency_p50", "server_latency_p99",
+]
+
+
+def free_port(host):
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind((host, 0))
+        return s.getsockname()[1]
+
+
+def wait_for_port(host, port, process, timeout=STARTUP_TIMEOUT):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server berhenti saat startup (exit code {process.returncode})")
+        try:
+            with socket.create_connection((host, port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Server tidak listen di {host}:{port} setelah {timeout} detik")
+
+
+class LocalServer:
+    """Menjalankan thread_pool.py / processing_pool.py sebagai subprocess di loopback."""
+
+    def __init__(self, mode, workers, workdir, host="127.0.0.1", extra_args=()):
+        self.mode = mode
+        self.workers = workers
+        self.host = host
+        self.port = free_port(host)
+        self.storage = os.path.abspath(os.path.join(workdir, f"storage_{mode}_{workers}"))
+        self.log = os.path.abspath(os.path.join(workdir, f"server_{mode}_{workers}.log"))
+        self.extra_args = list(extra_args)
+        self.process = None
+
+    def start(self):
+        shutil.rmtree(self.storage, ignore_errors=True)
+        os.makedirs(self.storage)
+        cmd = [sys.executable, SERVER_SCRIPTS[self.mode], "--host", self.host, "--port", str(self.port),
+               "--workers", str(self.workers), "--storage", self.storage, "--log", self.log] + self.extra_args
+        logging.info(f"Menjalankan server: {' '.join(cmd)}")
+        # session baru agar worker process server ikut dihentikan lewat killpg
+        self.process = subprocess.Popen(cmd, cwd=SERVER_DIR, start_new_session=True,
+                                        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            wait_for_port(self.host, self.port, self.process)
+        except Exception:
+            self.stop()
+            raise
+        return self
+
+    def stop(self):
+        if self.process is None or self.process.poll() is not None:
+            return
+        try:
+            os.killpg(self.process.pid, signal.SIGTERM)
+            self.process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            os.killpg(self.process.pid, signal.SIGKILL)
+            self.process.wait()
+        except ProcessLookupError:
+            pass
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+        shutil.rmtree(self.storage, ignore_errors=True)
+
+
+def ensure_test_file(doc_dir, size_mb, seed=SEED, content="random"):
+    suffix = ("" if content == "random" else f"_{content}") + ("" if seed == SEED else f"_s{seed}")
+    filename = f"file_{size_mb}mb{suffix}.txt"
+    path = os.path.join(doc_dir, filename)
+    if not os.path.exists(path):
+        logging.info(f"Membuat file uji {path}")
+        generate_b64_file(doc_dir, filename, size_mb, seed, content)
+    return path
+
+
+class Workload:
+    """File uji satu titik matriks: satu file dari --sizes, atau kumpulan file profil dari --profiles."""
+
+    def __init__(self, label, paths, size_mb=None, seed=SEED):
+        self.label = label
+        self.paths = paths
+        self.size_mb = size_mb
+        self.seed = seed
+        self.file_bytes = sum(os.path.getsize(p) for p in paths) // len(paths)
+
+    def requests(self):
+        """Path file untuk setiap request: semua file dalam urutan acak ber-seed, lalu diulang."""
+        rng = random.Random(f"{self.seed}:{self.label}:order")
+        while True:
+            order = list(self.paths)
+            rng.shuffle(order)
+            yield from order
+
+
+def create_workloads(args):
+    workloads = [Workload(f"{size}MB", [ensure_test_file(args.doc_dir, size, args.seed, args.content)], size, args.seed)
+                 for size in args.sizes]
+    for profile in args.profiles:
+        paths = generate_profile(args.doc_dir, profile, args.seed, args.content, count=args.profile_count,
+                                 max_size=args.profile_max_size)
+        workloads.append(Workload(profile, paths, seed=args.seed))
+    return workloads
+
+
+class ResultWriter:
+    """Menulis satu baris per titik matriks ke CSV atau JSON Lines (dari ekstensi file)."""
+
+    def __init__(self, path):
+        self.path = path
+        self.jsonl = path.endswith((".jsonl", ".json"))
+
+    def write(self, row):
+        if self.jsonl:
+            with open(self.path, "a") as f:
+                f.write(json.dumps(row) + "\n")
+            return
+        new_file = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+        with open(self.path, "a", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=FIELDS)
+            if new_file:
+                writer.writeheader()
+            writer.writerow(row)
+
+
+def server_columns(before, after, operation):
+    """Kolom metrik server untuk satu titik matriks, dari selisih dua snapshot STATS."""
+    if not before or not after:
+        return {}
+    delta = worker_delta(before, after)
+    latency = after["commands"].get("UPLOAD" if operation == "upload" else "GET", {}).get("latency", {})
+    return {
+        "server_success": sum(c["success"] for c in delta.values()),
+        "server_failed": sum(c["failed"] for c in delta.values()),
+        "server_workers_active": len(delta),
+        "server_bytes_in": after["bytes_in"] - before["bytes_in"],
+        "server_bytes_out": after["bytes_out"] - before["bytes_out"],
+        # percentile server bersifat kumulatif sejak server dijalankan
+        "server_latency_p50": round(latency.get("p50", 0.0), 6),
+        "server_latency_p99": round(latency.get("p99", 0.0), 6),
+    }
+
+
+def run_point(server, operation, workload, clients, args, download_dir, executor, encoded):
+    if operation == "upload":
+        request_fn = partial(worker_task, server.host, server.port, "upload",
+                             checksum_algo=args.checksum, compress_algo=args.compress)
+        request_kwargs = ({"filepath": path, "encoded_path": encoded.get(path)} for path in workload.requests())
+        on_error = lambda e: (False, 0.0, 0, 0.0, 0, 0.0)
+    else:
+        request_fn = partial(download_once, server.host, server.port, download_folder=download_dir,
+                             checksum_algo=args.checksum, compress_algo=args.compress)
+        request_kwargs = ({"filename": os.path.basename(path)} for path in workload.requests())
+        on_error = lambda e: (False, 0.0, 0, str(e), 0.0, 0, 0.0)
+    return run_load(request_fn, loop=args.loop, concurrency=clients, rate=args.rate,
+                    duration=args.duration, requests=args.requests, warmup=args.warmup,
+                    executor=executor, on_error=on_error, request_kwargs=request_kwargs)
+
+
+def run_matrix(args):
+    workdir = os.path.abspath(args.workdir)
+    os.makedirs(workdir, exist_ok=True)
+    workloads = create_workloads(args)
+    writer = ResultWriter(args.output)
+    extra_args = ["--backend", args.backend]
+    encoded = {}
+    if "upload" in args.operations and not args.checksum and not args.compress:
+        cache_dir = os.path.join(workdir, "upload_cache")
+        encoded = {path: encoded_source(path, cache_dir) for w in workloads for path in w.paths}
+    for bufsize, chunk_size in itertools.product(args.bufsizes, args.chunk_sizes):
+        # server (subprocess) dan klien thread membaca os.environ, worker process lewat env create_pool
+        env = {"SOCK_SNDBUF": str(bufsize), "SOCK_RCVBUF": str(bufsize), "SOCK_CHUNK_SIZE": str(chunk_size)}
+        os.environ.update(env)
+        pools = {mode: create_pool(mode, max(args.clients), env=env) for mode in args.client_modes}
+        try:
+            _run_servers(args, workdir, workloads, encoded, pools, writer, extra_args, bufsize, chunk_size)
+        finally:
+            for pool in pools.values():
+                pool.shutdown(wait=True)
+    print(f"Benchmark selesai. Hasil di {args.output}")
+
+
+def _run_servers(args, workdir, workloads, encoded, pools, writer, extra_args, bufsize=0, chunk_size=0):
+    for server_mode, server_workers, get_mode in itertools.product(args.server_modes, args.server_workers,
+                                                                   args.get_modes):
+        server_args = extra_args + ["--get_mode", get_mode]
+        with LocalServer(server_mode, server_workers, workdir, extra_args=server_args) as server:
+            # file untuk download disiapkan di storage server sebelum diukur
+            if "download" in args.operations:
+                for path in {path for w in workloads for path in w.paths}:
+                    shutil.copy(path, os.path.join(server.storage, os.path.basename(path)))
+
+            for operation, workload, client_mode, clients in itertools.product(
+                    args.operations, workloads, args.client_modes, args.clients):
+                download_dir = os.path.join(workdir, "downloads")
+                print(f"[{server_mode} x{server_workers} {get_mode} buf={bufsize} chunk={chunk_size}] {operation} {workload.label}, "
+                      f"klien {client_mode} x{clients}")
+                stats_before = fetch_stats(server.host, server.port)
+                try:
+                    load = run_point(server, operation, workload, clients, args, download_dir,
+                                     pools[client_mode], encoded)
+                finally:
+                    shutil.rmtree(download_dir, ignore_errors=True)
+                print(f"  {format_summary(load)}")
+                time.sleep(STATS_SETTLE)
+                stats_after = fetch_stats(server.host, server.port)
+                server_row = server_columns(stats_before, stats_after, operation)
+
+                s = load.summary()
+                writer.write({
+                    "timestamp": datetime.now().isoformat(timespec="seconds"),
+                    "operation": operation,
+                    "workload": workload.label,
+                    "files": len(workload.paths),
+                    "content": args.content,
+                    "seed": args.seed,
+                    "size_mb": workload.size_mb,
+                    "file_bytes": workload.file_bytes,
+                    "server_mode": server_mode,
+                    "server_workers": server_workers,
+                    "get_mode": get_mode,
+                    "bufsize": bufsize,
+                    "chunk_size": chunk_size,
+                    "client_mode": client_mode,
+                    "clients": clients,
+                    "loop": args.loop,
+                    "checksum": args.checksum or "",
+                    "compress": args.compress or "",
+                    "requests": s["count"],
+                    "success": s["success"],
+                    "failed": s["failed"],
+                    "elapsed": round(s["elapsed"], 6),
+                    "rps": round(s["rps"], 4),
+                    "bytes_per_sec": round(s["bytes_per_sec"], 2),
+                    "latency_mean": round(s["mean"], 6),
+                    "latency_p50": round(s["p50"], 6),
+                    "latency_p90": round(s["p90"], 6),
+                    "latency_p99": round(s["p99"], 6),
+                    "latency_p99_9": round(s["p99.9"], 6),
+                    "latency_max": round(s["max"], 6),
+                    **server_row,
+                })
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark matrix server ETS di loopback.")
+    parser.add_argument("--operations", nargs="+", choices=["upload", "download"], default=["upload", "download"], help="Operasi yang diuji (default: upload download)")
+    parser.add_argument("--sizes", nargs="*", type=int, default=[10, 50, 100], help="Ukuran file uji dalam MB, kosongkan untuk hanya memakai --profiles (default: 10 50 100)")
+    parser.add_argument("--profiles", nargs="+", choices=list(PROFILES), default=[], help="Workload kumpulan file: small, heavy, large (lihat generate_files.py)")
+    parser.add_argument("--profile_count", type=int, help="Jumlah file per profil (default: tergantung profil)")
+    parser.add_argument("--profile_max_size", type=parse_size, help="Ukuran data file profil terbesar, misal 64M atau 4G (default: tergantung profil)")
+    parser.add_argument("--content", choices=list(CONTENTS), default="random", help="Isi file uji: random (tidak bisa dikompresi), mixed, text (mudah dikompresi) (default: random)")
+    parser.add_argument("--seed", type=int, default=SEED, help=f"Seed isi file uji dan urutan file per request (default: {SEED})")
+    parser.add_argument("--clients", nargs="+", type=int, default=[1, 5, 50], help="Jumlah worker klien (default: 1 5 50)")
+    parser.add_argument("--client_modes", nargs="+", choices=["thread", "process"], default=["thread"], help="Mode pool klien (default: thread)")
+    parser.add_argument("--server_workers", nargs="+", type=int, default=[1, 5, 50], help="Jumlah worker server (default: 1 5 50)")
+    parser.add_argument("--server_modes", nargs="+", choices=list(SERVER_SCRIPTS), default=["thread", "process"], help="Mode server (default: thread process)")
+    parser.add_argument("--get_modes", nargs="+", choices=GET_MODES, default=["read"], help="Cara server mengirim file untuk GET: read, mmap, sendfile (default: read)")
+    parser.add_argument("--bufsizes", nargs="+", type=int, default=[0], help="Ukuran SO_SNDBUF/SO_RCVBUF server dan klien dalam byte, 0 = default kernel (default: 0)")
+    parser.add_argument("--chunk_sizes", nargs="+", type=int, default=[0], help="Ukuran potongan recv/read server dan klien dalam byte, 0 = default program (default: 0)")
+    parser.add_argument("--backend", choices=["plain", "dedup"], default="plain", help="Storage backend server (default: plain)")
+    parser.add_argument("--checksum", help="Checksum end-to-end untuk setiap transfer")
+    parser.add_argument("--compress", help="Kompresi stream untuk setiap transfer")
+    parser.add_argument("--doc_dir", default="doc", help="Folder file uji, dibuat jika belum ada (default: doc)")
+    parser.add_argument("--workdir", default="bench_run", help="Folder storage dan log server sementara (default: bench_run)")
+    parser.add_argument("--output", default="bench_results.csv", help="File hasil, .csv atau .jsonl (default: bench_results.csv)")
+    add_load_args(parser)
+    args = parser.parse_args()
+    run_matrix(args)
+
+
+if __name__ == "__main__":
+    main()
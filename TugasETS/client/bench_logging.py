@@ -0,0 +1,84 @@
+"""
+Benchmark overhead logging server ETS.
+
+Server dijalankan ulang di loopback untuk setiap konfigurasi logging, lalu diberi
+banyak GET file kecil (closed loop) sehingga biaya per koneksi, termasuk beberapa
+baris log INFO per koneksi, mendominasi. Throughput tiap konfigurasi dibandingkan
+dengan --log_mode off.
+"""
+
+import os
+import csv
+import shutil
+import logging
+import argparse
+from functools import partial
+
+from bench import LocalServer
+from download import download_once
+from loadgen import run_load, format_summary
+
+CONFIGS = {
+    "off": ["--log_mode", "off"],
+    "sync": ["--log_mode", "sync"],
+    "async": ["--log_mode", "async"],
+    "async-sample": ["--log_mode", "async", "--log_sample", "0.1"],
+    "async-ratelimit": ["--log_mode", "async", "--log_rate", "INFO=100"],
+}
+
+
+def run_config(name, server_mode, workers, clients, duration, file_size, workdir):
+    with LocalServer(server_mode, workers, workdir, extra_args=CONFIGS[name]) as server:
+        with open(os.path.join(server.storage, "small.bin"), "wb") as f:
+            f.write(os.urandom(file_size))
+        download_dir = os.path.join(workdir, "downloads")
+        request_fn = partial(download_once, server.host, server.port, "small.bin", download_dir)
+        try:
+            load = run_load(request_fn, loop="closed", concurrency=clients, duration=duration, warmup=1.0,
+                            on_error=lambda e: (False, 0.0, 0, str(e), 0.0, 0, 0.0))
+        finally:
+            shutil.rmtree(download_dir, ignore_errors=True)
+        log_bytes = os.path.getsize(server.log) if os.path.exists(server.log) else 0
+    if os.path.exists(server.log):
+        os.remove(server.log)
+    return load, log_bytes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bandingkan throughput server ETS dengan berbagai mode logging.")
+    parser.add_argument("--configs", nargs="+", choices=list(CONFIGS), default=list(CONFIGS), help="Konfigurasi logging yang diuji (default: semua)")
+    parser.add_argument("--server_mode", choices=["thread", "process"], default="thread", help="Mode server (default: thread)")
+    parser.add_argument("--server_workers", type=int, default=8, help="Jumlah worker server (default: 8)")
+    parser.add_argument("--clients", type=int, default=8, help="Jumlah worker klien (default: 8)")
+    parser.add_argument("--duration", type=float, default=5.0, help="Lama pengukuran per konfigurasi dalam detik (default: 5)")
+    parser.add_argument("--file_size", type=int, default=4096, help="Ukuran file yang di-GET dalam byte (default: 4096)")
+    parser.add_argument("--workdir", default="bench_run", help="Folder storage dan log server sementara (default: bench_run)")
+    parser.add_argument("--output", default="bench_logging.csv", help="File hasil CSV (default: bench_logging.csv)")
+    args = parser.parse_args()
+    # log INFO per download di sisi klien tidak ikut diukur
+    logging.getLogger().setLevel(logging.WARNING)
+
+    os.makedirs(args.workdir, exist_ok=True)
+    rows = []
+    for name in args.configs:
+        load, log_bytes = run_config(name, args.server_mode, args.server_workers, args.clients,
+                                     args.duration, args.file_size, args.workdir)
+        print(f"{name:16s} {format_summary(load)} log={log_bytes / 1024:.0f}KB")
+        s = load.summary()
+        rows.append({"config": name, "server_mode": args.server_mode, "server_workers": args.server_workers,
+                     "clients": args.clients, "requests": s["count"], "failed": s["failed"],
+                     "rps": round(s["rps"], 2), "latency_p50": round(s["p50"], 6),
+                     "latency_p99": round(s["p99"], 6), "log_bytes": log_bytes})
+
+    baseline = next((r["rps"] for r in rows if r["config"] == "off"), None)
+    for row in rows:
+        row["rps_vs_off"] = round(row["rps"] / baseline, 3) if baseline else ""
+    with open(args.output, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+    print(f"Hasil disimpan ke {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,20 @@
 import os
+import sys
 import socket
 import logging
 import argparse
 import time
-import csv
-from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from functools import partial
+# modul checksum dan kompresi dipakai bersama dengan server
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "server"))
+from integrity import CHECKSUMS, TimedChecksum, parse_options, parse_trailer
+from compression import COMPRESSIONS, TimedDecompressor
+from net import connect, options_from_env
+# opsi socket bersama dengan server (Tugas1/sockopts.py)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "Tugas1"))
+from sockopts import add_socket_args, options_from_args as socket_options_from_args
+from loadgen import (run_load, format_summary, add_load_args, fetch_stats, worker_delta, format_worker_delta,
+                     append_report_row)
 
 logging.basicConfig(
     level=logging.INFO,
@@ -14,15 +24,23 @@ logging.basicConfig(
 CHUNK_SIZE = 8192  # Ukuran chunk untuk menerima data
 SOCKET_TIMEOUT = 60.0 # Timeout untuk operasi socket dalam detik
 
-def download_once(server_ip, server_port, filename, download_folder):
+def download_once(server_ip, server_port, filename, download_folder, checksum_algo=None, compress_algo=None):
     """
     Menangani proses download satu file dari server.
+    Jika checksum_algo diisi (misal 'sha256' atau 'crc32'), isi file diverifikasi
+    dengan trailer CHECKSUM yang dikirim server setelah data file.
+    Jika compress_algo diisi ('zlib' atau 'lzma'), server diminta mengirim data
+    terkompresi dan klien mendekompresi secara streaming.
     """
     start_time = time.time()
     sock = None
     downloaded_bytes = 0
+    wire_bytes = 0
+    decompressor = None
     error_message = None
     success = False
+    checksum = TimedChecksum(checksum_algo) if checksum_algo else None
+    chunk_size = options_from_env().chunk(CHUNK_SIZE)
 
     try:
         os.makedirs(download_folder, exist_ok=True)
@@ -36,11 +54,14 @@ def download_once(server_ip, server_port, filename, download_folder):
 
         logging.info(f"Mencoba mengunduh '{filename}' ke '{output_filepath}' dari {server_ip}:{server_port}")
 
-        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        sock.settimeout(SOCKET_TIMEOUT)
-        sock.connect((server_ip, server_port))
+        sock = connect(server_ip, server_port, SOCKET_TIMEOUT)
 
-        command_str = f"GET {filename}\r\n\r\n"
+        command_str = f"GET {filename}"
+        if checksum:
+            command_str += f" checksum={checksum.name}"
+        if compress_algo:
+            command_str += f" compress={compress_algo}"
+        command_str += "\r\n\r\n"
         logging.debug(f"Mengirim perintah: {command_str.strip()}")
         sock.sendall(command_str.encode())
 
@@ -65,27 +86,70 @@ def download_once(server_ip, server_port, filename, download_folder):
             except ValueError:
                 raise ValueError(f"Format ukuran file di header tidak valid: {header_parts[1]}")
 
+            # Kompresi hanya dipakai jika server menyetujuinya di header
+            server_options = parse_options(header_parts[2:])
+            if 'compress' in server_options:
+                decompressor = TimedDecompressor(server_options['compress'])
+
+            # Tanpa kompresi, data setelah isi file adalah trailer checksum
+            trailer_data = b""
+            if not decompressor:
+                trailer_data = initial_payload[expected_size:]
+                initial_payload = initial_payload[:expected_size]
+
             # 3. Terima data file
             with open(output_filepath, 'wb') as f:
-                # Tulis payload awal jika ada
-                if initial_payload:
-                    f.write(initial_payload)
-                    downloaded_bytes += len(initial_payload)
-                
-                while downloaded_bytes < expected_size:
-                    bytes_to_receive = min(CHUNK_SIZE, expected_size - downloaded_bytes)
-                    chunk = sock.recv(bytes_to_receive)
-                    if not chunk:
+                # Proses payload awal jika ada
+                wire_data = initial_payload
+                while True:
+                    if wire_data or decompressor and decompressor.pending:
+                        data = decompressor.decompress(wire_data) if decompressor else wire_data
+                        if data:
+                            f.write(data)
+                            if checksum:
+                                checksum.update(data)
+                            downloaded_bytes += len(data)
+                    if decompressor.eof if decompressor else downloaded_bytes >= expected_size:
+                        break
+                    if decompressor and decompressor.pending:
+                        # output dibatasi max_length, ambil sisanya sebelum menerima data baru
+                        wire_data = b""
+                        continue
+
+                    bytes_to_receive = chunk_size if decompressor else min(chunk_size, expected_size - downloaded_bytes)
+                    wire_data = sock.recv(bytes_to_receive)
+                    if not wire_data:
                         logging.warning(f"Koneksi terputus saat mengunduh. Diterima {downloaded_bytes}/{expected_size} bytes.")
-                        break 
-                    f.write(chunk)
-                    downloaded_bytes += len(chunk)
-            
-            if downloaded_bytes == expected_size:
+                        break
+
+            if decompressor:
+                trailer_data = decompressor.unused_data
+                wire_bytes = decompressor.wire_bytes
+                logging.info(f"Dekompresi {decompressor.name}: {wire_bytes} -> {downloaded_bytes} bytes "
+                             f"(rasio {decompressor.ratio:.2f}, cpu {decompressor.seconds:.3f}s)")
+            else:
+                wire_bytes = downloaded_bytes
+
+            checksum_ok = True
+            if downloaded_bytes == expected_size and checksum:
+                while b"\r\n\r\n" not in trailer_data:
+                    chunk = sock.recv(CHUNK_SIZE)
+                    if not chunk:
+                        raise ConnectionError("Koneksi ditutup server sebelum trailer checksum diterima.")
+                    trailer_data += chunk
+                algo, digest = parse_trailer(trailer_data.split(b"\r\n\r\n", 1)[0])
+                checksum_ok = algo == checksum.name and digest == checksum.hexdigest()
+                if checksum_ok:
+                    logging.info(f"Checksum {algo} cocok ({checksum.seconds:.3f}s untuk hashing).")
+
+            if downloaded_bytes == expected_size and checksum_ok:
                 logging.info(f"File '{filename}' berhasil diunduh ({downloaded_bytes} bytes).")
                 success = True
             else:
-                error_message = f"Ukuran file tidak sesuai. Diharapkan {expected_size}, diterima {downloaded_bytes}."
+                if not checksum_ok:
+                    error_message = f"Checksum tidak cocok. Server {algo}={digest}, klien {checksum.name}={checksum.hexdigest()}."
+                else:
+                    error_message = f"Ukuran file tidak sesuai. Diharapkan {expected_size}, diterima {downloaded_bytes}."
                 logging.error(error_message)
                 if os.path.exists(output_filepath): # Hapus file parsial
                     os.remove(output_filepath)
@@ -117,39 +181,41 @@ def download_once(server_ip, server_port, filename, download_folder):
         duration = time.time() - start_time
         logging.debug(f"Operasi download_once untuk '{filename}' selesai dalam {duration:.3f}s. Sukses: {success}")
 
-    return success, duration, downloaded_bytes, error_message
+    checksum_seconds = checksum.seconds if checksum else 0.0
+    compression_seconds = decompressor.seconds if decompressor else 0.0
+    return success, duration, downloaded_bytes, error_message, checksum_seconds, wire_bytes, compression_seconds
 
 def stress_test(server_ip, server_port, filename_to_download, volume_label,
                   client_pool_mode, num_client_workers, num_server_workers_reported,
-                  test_case_num, output_csv_file):
+                  test_case_num, output_csv_file, checksum_algo=None, compress_algo=None,
+                  loop="closed", rate=None, duration=None, requests=None, warmup=0.0):
     """
     Menjalankan stress test download dan menyimpan hasilnya ke file CSV.
+    Default-nya closed loop dengan satu request per worker klien (seperti sebelumnya),
+    lihat loadgen.run_load untuk mode open loop, durasi tetap dan warmup.
     """
-    executor_cls = ThreadPoolExecutor if client_pool_mode == "thread" else ProcessPoolExecutor
     download_target_folder = "downloaded_files_stress"
 
     logging.info(f"--- Memulai Tes Download #{test_case_num} ---")
     logging.info(f"Mode Pool Klien: {client_pool_mode}, Jumlah Worker Klien: {num_client_workers}, File: {filename_to_download}, Volume: {volume_label}")
 
-   
-    results = []
-    
-    with executor_cls(max_workers=num_client_workers) as executor:
-        futures = [executor.submit(download_once, server_ip, server_port, filename_to_download, download_target_folder)
-                   for _ in range(num_client_workers)]
-        for i, f in enumerate(futures):
-            try:
-                logging.debug(f"Menunggu hasil dari tugas klien #{i+1}/{num_client_workers}")
-                results.append(f.result(timeout=300)) # Timeout 5 menit per tugas download
-            except Exception as e:
-                logging.error(f"Sebuah tugas klien gagal dengan exception: {e}")
-                results.append((False, 300.0, 0, str(e))) # Catat sebagai gagal dengan durasi timeout
+    request_fn = partial(download_once, server_ip, server_port, filename_to_download, download_target_folder,
+                         checksum_algo, compress_algo)
+    stats_before = fetch_stats(server_ip, server_port)
+    load = run_load(request_fn, loop=loop, concurrency=num_client_workers, rate=rate, duration=duration,
+                    requests=requests, warmup=warmup, pool_mode=client_pool_mode,
+                    on_error=lambda e: (False, 300.0, 0, str(e), 0.0, 0, 0.0))
+    server_workers_result = format_worker_delta(worker_delta(stats_before, fetch_stats(server_ip, server_port)))
+    results = load.results
+    latency = load.summary()
+    logging.info(f"Hasil load: {format_summary(load)}")
+    num_requests = len(results)
 
     successful_tasks = sum(1 for r in results if r[0])
-    failed_tasks = num_client_workers - successful_tasks
+    failed_tasks = num_requests - successful_tasks
     
     sum_of_durations = sum(r[1] for r in results)
-    avg_time_per_worker = sum_of_durations / num_client_workers if num_client_workers > 0 else 0
+    avg_time_per_worker = sum_of_durations / num_requests if num_requests > 0 else 0
     
     total_bytes_successful = sum(r[2] for r in results if r[0])
     total_duration_successful_tasks = sum(r[1] for r in results if r[0]) # Hanya durasi dari tugas sukses
@@ -157,13 +223,30 @@ def stress_test(server_ip, server_port, filename_to_download, volume_label,
 
     first_error_message = next((r[3] for r in results if not r[0] and r[3]), "")
 
+    # Overhead verifikasi: porsi waktu transfer yang habis untuk hashing
+    sum_of_checksum_seconds = sum(r[4] for r in results)
+    avg_checksum_seconds = sum_of_checksum_seconds / num_requests if num_requests > 0 else 0
+    checksum_overhead_pct = (sum_of_checksum_seconds / sum_of_durations * 100) if sum_of_durations > 0 else 0
+
+    # Throughput efektif (byte file) vs throughput di jaringan (byte terkompresi)
+    total_wire_bytes_successful = sum(r[5] for r in results if r[0])
+    avg_wire_throughput_kbs = (total_wire_bytes_successful / total_duration_successful_tasks / 1024) if total_duration_successful_tasks > 0 else 0
+    compression_ratio = (total_bytes_successful / total_wire_bytes_successful) if total_wire_bytes_successful > 0 else 0
+    avg_compression_seconds = sum(r[6] for r in results) / num_requests if num_requests > 0 else 0
+
     # --- Penulisan Laporan CSV ---
     header = [
         "Nomor", "Operasi (Client Pool Mode)", "Volume (Label)", "Jumlah client worker pool", 
         "Jumlah server worker pool (Reported)", "Waktu rata-rata per tugas klien (s)", 
         "Throughput rata-rata per tugas klien sukses (KB/s)", 
         "Jumlah worker client sukses", "Jumlah worker client gagal", 
-        "Pesan Error Pertama (jika ada)"
+        "Pesan Error Pertama (jika ada)",
+        "Checksum", "Waktu checksum rata-rata per tugas (s)", "Overhead checksum (%)",
+        "Kompresi", "Throughput wire rata-rata per tugas klien sukses (KB/s)", "Rasio kompresi",
+        "Waktu dekompresi rata-rata per tugas (s)",
+        "Loop", "Jumlah request terukur", "Request per detik",
+        "Latency p50 (s)", "Latency p90 (s)", "Latency p99 (s)", "Latency p99.9 (s)",
+        "Jumlah worker server yang sukses dan gagal"
     ]
     
     row_data = [
@@ -176,16 +259,26 @@ def stress_test(server_ip, server_port, filename_to_download, volume_label,
         f"{avg_throughput_per_successful_worker_kbs:.2f}", # Diformat sebagai string dengan 2 desimal
         successful_tasks,
         failed_tasks,
-        first_error_message
+        first_error_message,
+        checksum_algo or "-",
+        f"{avg_checksum_seconds:.3f}",
+        f"{checksum_overhead_pct:.2f}",
+        compress_algo or "-",
+        f"{avg_wire_throughput_kbs:.2f}",
+        f"{compression_ratio:.2f}",
+        f"{avg_compression_seconds:.3f}",
+        loop,
+        num_requests,
+        f"{latency['rps']:.2f}",
+        f"{latency['p50']:.3f}",
+        f"{latency['p90']:.3f}",
+        f"{latency['p99']:.3f}",
+        f"{latency['p99.9']:.3f}",
+        server_workers_result
     ]
     
     # Tulis ke file CSV
-    write_header = not os.path.exists(output_csv_file) or os.path.getsize(output_csv_file) == 0
-    with open(output_csv_file, mode="a", newline="", encoding="utf-8") as csvfile:
-        writer = csv.writer(csvfile)
-        if write_header:
-            writer.writerow(header)
-        writer.writerow(row_data)
+    append_report_row(output_csv_file, header, row_data)
 
     logging.info(f"--- Laporan Tes Download #{test_case_num} disimpan ke {output_csv_file} ---")
     logging.debug(f"Data baris CSV: {row_data}")
@@ -203,9 +296,14 @@ def main():
     parser.add_argument("--pool_size", type=int, default=1, help="Jumlah worker klien konkuren untuk stress test (default: 1).")
     parser.add_argument("--server_workers", type=int, default=1, help="Jumlah worker server (hanya untuk tujuan pelaporan di CSV).")
     parser.add_argument("--nomor", type=int, help="Nomor urut tes untuk laporan CSV (diperlukan untuk mode 'stress').")
+    parser.add_argument("--checksum", choices=CHECKSUMS, help="Verifikasi isi file end-to-end dengan checksum ini (default: tanpa checksum).")
+    parser.add_argument("--compress", choices=COMPRESSIONS, help="Minta server mengirim file terkompresi (default: tanpa kompresi).")
+    add_load_args(parser)
     parser.add_argument("--output", default="download_stress_report.csv", help="Nama file output CSV untuk hasil stress test (default: download_stress_report.csv).")
-    
+    add_socket_args(parser)
+
     args = parser.parse_args()
+    socket_options_from_args(args).export()
 
     if args.mode == "download":
         if not args.filename:
@@ -214,10 +312,11 @@ def main():
             return
         
         download_folder = "downloaded_files_single" # Folder terpisah untuk download tunggal
-        success, duration, bytes_downloaded, error_msg = download_once(args.server, args.port, args.filename, download_folder)
+        success, duration, bytes_downloaded, error_msg, _, wire_bytes, _ = download_once(
+            args.server, args.port, args.filename, download_folder, args.checksum, args.compress)
         
         if success:
-            print(f"File '{args.filename}' berhasil diunduh ({bytes_downloaded} bytes) dalam {duration:.3f} detik.")
+            print(f"File '{args.filename}' berhasil diunduh ({bytes_downloaded} bytes, {wire_bytes} bytes di jaringan) dalam {duration:.3f} detik.")
             logging.info(f"Download tunggal '{args.filename}' sukses.")
         else:
             print(f"Gagal mengunduh file '{args.filename}'. Error: {error_msg}")
@@ -240,7 +339,8 @@ def main():
         stress_test(
             args.server, args.port, args.filename, args.volume,
             args.pool_mode, args.pool_size, args.server_workers,
-            args.nomor, args.output
+            args.nomor, args.output, args.checksum, args.compress,
+            args.loop, args.rate, args.duration, args.requests, args.warmup
         )
     else:
         print(f"Mode tidak dikenal: {args.mode}")
@@ -1,24 +1,215 @@
+"""
+Generator file uji untuk benchmark ETS.
+
+Data ditulis per blok BLOCK byte (streaming), jadi file multi-GB tidak perlu
+muat di RAM, dan isinya deterministik: file dengan seed, nama, ukuran, dan
+content yang sama selalu berisi byte yang sama.
+
+content menentukan seberapa mudah data dikompresi:
+
+* random : byte acak (tidak bisa dikompresi)
+* text   : potongan teks dari kosakata tetap (mudah dikompresi)
+* mixed  : setengah blok teks, setengah blok acak
+
+Dengan encoding b64 (default, sama dengan file uji sebelumnya) data di-encode
+base64 per blok, sehingga ukuran file 4/3 ukuran data; raw menulis data apa adanya.
+
+Selain file tunggal (generate_b64_file, dipakai bench.py untuk --sizes), ada
+profil kumpulan file dengan distribusi ukuran tertentu (generate_profile):
+
+* small : banyak file kecil, ukuran log-uniform antara min_size dan max_size
+* heavy : campuran heavy-tailed (Pareto dengan alpha), kebanyakan kecil,
+          sebagian kecil sangat besar (dibatasi max_size)
+* large : sedikit file multi-GB
+
+Profil ditulis ke folder <dir>/<profil>_<seed>_<content> (ditambah _raw untuk
+encoding raw) beserta manifest.json;
+jika manifest dengan parameter yang sama sudah ada, file tidak dibuat ulang.
+"""
+
 import os
+import json
+import math
 import base64
+import random
+import argparse
+
+KB = 1024
+MB = 1024 * KB
+GB = 1024 * MB
+
+BLOCK = 3 * 256 * KB  # kelipatan 3 agar setiap blok base64 bisa di-encode terpisah
+PIECE = 64 * KB
+POOL_PIECES = 16
+SEED = 0
+CONTENTS = {'random': 0.0, 'mixed': 0.5, 'text': 1.0}
+ENCODINGS = ('b64', 'raw')
+PROFILES = {
+    'small': {'count': 1000, 'min_size': 1 * KB, 'max_size': 64 * KB, 'alpha': None},
+    'heavy': {'count': 200, 'min_size': 16 * KB, 'max_size': 256 * MB, 'alpha': 1.2},
+    'large': {'count': 2, 'min_size': 2 * GB, 'max_size': 2 * GB, 'alpha': None},
+}
+WORDS = (
+    "the server client file upload download thread process pool worker socket buffer chunk "
+    "request response header status error timeout stream data byte block cache queue "
+    "latency throughput benchmark storage base64 decode encode connection network "
+    "data file server dan yang untuk dengan dari ke di ini itu akan tidak sudah"
+).split()
+
+_pools = {}
+
+
+def parse_size(text):
+    """'512', '64K', '10M', '2G' -> byte."""
+    text = str(text).strip().upper().rstrip('B')
+    units = {'K': KB, 'M': MB, 'G': GB}
+    if text and text[-1] in units:
+        return int(float(text[:-1]) * units[text[-1]])
+    return int(text)
+
+
+def _text_pool(seed):
+    """POOL_PIECES potongan teks PIECE byte, dibuat sekali per seed."""
+    if seed not in _pools:
+        rng = random.Random(f"{seed}:text")
+        pieces = []
+        for _ in range(POOL_PIECES):
+            words = []
+            length = 0
+            while length < PIECE:
+                word = rng.choice(WORDS)
+                words.append(word + ("\n" if rng.random() < 0.1 else " "))
+                length += len(word) + 1
+            pieces.append("".join(words).encode()[:PIECE])
+        _pools[seed] = pieces
+    return _pools[seed]
 
-def generate_b64_file(directory, filename, size_in_mb):
+
+def content_blocks(size, seed=SEED, name="", content='random'):
+    """Generator blok data (masing-masing <= BLOCK byte) sebanyak size byte, deterministik."""
+    fraction = CONTENTS[content]
+    rng = random.Random(f"{seed}:{name}:{size}")
+    pool = _text_pool(seed) if fraction else None
+    remaining = size
+    while remaining > 0:
+        n = min(BLOCK, remaining)
+        if fraction and rng.random() < fraction:
+            parts = []
+            left = n
+            while left > 0:
+                piece = pool[rng.randrange(POOL_PIECES)]
+                offset = rng.randrange(PIECE // 2)
+                part = piece[offset:offset + left]
+                parts.append(part)
+                left -= len(part)
+            yield b"".join(parts)
+        else:
+            yield rng.randbytes(n)
+        remaining -= n
+
+
+def write_file(path, size, seed=SEED, content='random', encoding='b64'):
+    """Tulis size byte data (sebelum encoding) ke path secara streaming, kembalikan ukuran file."""
+    name = os.path.basename(path)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'wb') as f:
+        for block in content_blocks(size, seed, name, content):
+            f.write(base64.b64encode(block) if encoding == 'b64' else block)
+    os.replace(tmp, path)
+    return os.path.getsize(path)
+
+
+def generate_b64_file(directory, filename, size_in_mb, seed=SEED, content='random'):
     os.makedirs(directory, exist_ok=True)
     filepath = os.path.join(directory, filename)
-    
-    size_in_bytes = size_in_mb * 1024 * 1024
-    
-    # 1. Buat data biner acak
-    random_binary_data = os.urandom(size_in_bytes)
-    
-    # 2. Encode data biner tersebut ke Base64
-    encoded_data = base64.b64encode(random_binary_data)
-    
-    # 3. Simpan data yang sudah di-encode ke dalam file
-    with open(filepath, 'wb') as f:
-        f.write(encoded_data)
-        
-    print(f"File Base64 '{filepath}' ({size_in_mb}MB data asli) berhasil dibuat.")
-
-generate_b64_file("doc", "file_10mb.txt", 10)
-generate_b64_file("doc", "file_50mb.txt", 50)
-generate_b64_file("doc", "file_100mb.txt", 100)
\ No newline at end of file
+    write_file(filepath, int(size_in_mb * MB), seed, content)
+    print(f"File Base64 '{filepath}' ({size_in_mb:g}MB data asli, {content}) berhasil dibuat.")
+    return filepath
+
+
+def profile_sizes(profile, seed=SEED, count=None, min_size=None, max_size=None, alpha=None):
+    """Daftar ukuran data (byte) untuk profil, deterministik dari seed."""
+    params = dict(PROFILES[profile])
+    for key, value in (('count', count), ('min_size', min_size), ('max_size', max_size), ('alpha', alpha)):
+        if value is not None:
+            params[key] = value
+    rng = random.Random(f"{seed}:{profile}:sizes")
+    low, high = params['min_size'], max(params['min_size'], params['max_size'])
+    sizes = []
+    for _ in range(params['count']):
+        if profile == 'small':
+            size = math.exp(rng.uniform(math.log(low), math.log(high)))
+        elif profile == 'heavy':
+            size = min(high, low * rng.paretovariate(params['alpha']))
+        else:
+            size = rng.uniform(low, high)
+        sizes.append(int(size))
+    return sizes, params
+
+
+def generate_profile(directory, profile, seed=SEED, content='random', encoding='b64', count=None,
+                     min_size=None, max_size=None, alpha=None):
+    """
+    Buat kumpulan file profil di folder profil (lihat docstring modul) dan
+    kembalikan daftar path-nya (urut nama). File yang sudah ada dengan manifest
+    yang sama dipakai ulang.
+    """
+    sizes, params = profile_sizes(profile, seed, count, min_size, max_size, alpha)
+    folder = os.path.join(directory, f"{profile}_{seed}_{content}" + ("" if encoding == 'b64' else f"_{encoding}"))
+    ext = "txt" if encoding == 'b64' else "bin"
+    names = [f"{profile}_{i:05d}.{ext}" for i in range(len(sizes))]
+    manifest = {
+        'profile': profile, 'seed': seed, 'content': content, 'encoding': encoding, **params,
+        'files': [{'name': name, 'data_bytes': size} for name, size in zip(names, sizes)],
+    }
+    manifest_path = os.path.join(folder, "manifest.json")
+    paths = [os.path.join(folder, name) for name in names]
+    try:
+        with open(manifest_path) as f:
+            if json.load(f) == manifest and all(os.path.exists(p) for p in paths):
+                return paths
+    except (OSError, ValueError):
+        pass
+
+    os.makedirs(folder, exist_ok=True)
+    total = 0
+    for path, size in zip(paths, sizes):
+        total += write_file(path, size, seed, content, encoding)
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f, indent=1)
+    print(f"Profil '{profile}' ({len(paths)} file, {total / MB:.1f}MB, {content}, seed {seed}) dibuat di {folder}")
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generator file uji (streaming, deterministik) untuk benchmark ETS.")
+    parser.add_argument("--dir", default="doc", help="Folder tujuan (default: doc)")
+    parser.add_argument("--sizes", nargs="+", type=float, default=[10, 50, 100], help="Ukuran file tunggal dalam MB data asli, dipakai tanpa --profile (default: 10 50 100)")
+    parser.add_argument("--profile", choices=list(PROFILES), help="Buat kumpulan file dengan distribusi ukuran profil ini")
+    parser.add_argument("--count", type=int, help="Jumlah file profil (default: tergantung profil)")
+    parser.add_argument("--min_size", type=parse_size, help="Ukuran data terkecil, misal 1K (default: tergantung profil)")
+    parser.add_argument("--max_size", type=parse_size, help="Ukuran data terbesar, misal 256M atau 4G (default: tergantung profil)")
+    parser.add_argument("--alpha", type=float, help="Parameter Pareto profil heavy, makin kecil makin berat ekornya (default: 1.2)")
+    parser.add_argument("--seed", type=int, default=SEED, help=f"Seed isi dan ukuran file (default: {SEED})")
+    parser.add_argument("--content", choices=list(CONTENTS), default="random", help="random: tidak bisa dikompresi, text: mudah dikompresi, mixed: setengahnya (default: random)")
+    parser.add_argument("--encoding", choices=ENCODINGS, default="b64", help="b64: isi file di-encode base64 seperti file uji lama, raw: data apa adanya (default: b64)")
+    args = parser.parse_args()
+
+    if args.profile:
+        generate_profile(args.dir, args.profile, args.seed, args.content, args.encoding, args.count,
+                         args.min_size, args.max_size, args.alpha)
+        return
+    for size in args.sizes:
+        label = f"{size:g}"
+        suffix = "" if args.content == "random" else f"_{args.content}"
+        if args.encoding == 'b64':
+            generate_b64_file(args.dir, f"file_{label}mb{suffix}.txt", size, args.seed, args.content)
+        else:
+            os.makedirs(args.dir, exist_ok=True)
+            path = os.path.join(args.dir, f"file_{label}mb{suffix}.bin")
+            write_file(path, int(size * MB), args.seed, args.content, 'raw')
+            print(f"File '{path}' ({size}MB, {args.content}) berhasil dibuat.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,340 @@
+"""
+Load generator untuk stress test ETS (dan server HTTP Tugas4).
+
+Dua mode:
+* closed loop : N worker, setiap worker langsung mengirim request berikutnya begitu
+                request sebelumnya selesai (perilaku stress_test lama)
+* open loop   : request dijadwalkan dengan laju tetap (RPS) tanpa peduli apakah
+                request sebelumnya sudah selesai. Latency dihitung dari waktu
+                request SEHARUSNYA dikirim, bukan saat benar-benar dikirim, sehingga
+                antrean di sisi klien tetap terlihat (coordinated omission).
+
+Request function dipanggil tanpa argumen dan harus mengembalikan tuple dengan
+status sukses di indeks 0 dan jumlah byte di indeks 2, sama seperti download_once
+di download.py dan worker_task di upload.py.
+"""
+
+import os
+import sys
+import csv
+import time
+import json
+import logging
+import argparse
+import threading
+from functools import partial
+from worker_pool import create_pool
+from net import connect
+
+# histogram latency yang sama dengan metrik server
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "server"))
+from metrics import Histogram
+
+
+class LoadResult:
+    def __init__(self):
+        self.histogram = Histogram()
+        self.results = []
+        self.success = 0
+        self.failed = 0
+        self.bytes = 0
+        self.warmup_requests = 0
+        self.started = 0.0
+        self.elapsed = 0.0
+        self.lock = threading.Lock()
+
+    def add(self, latency, result):
+        with self.lock:
+            self.histogram.record(latency)
+            self.results.append(result)
+            if result[0]:
+                self.success += 1
+                self.bytes += result[2]
+            else:
+                self.failed += 1
+
+    @property
+    def throughput_rps(self):
+        return self.histogram.count / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def throughput_bytes(self):
+        return self.bytes / self.elapsed if self.elapsed > 0 else 0.0
+
+    def summary(self):
+        data = self.histogram.summary()
+        data.update({
+            "success": self.success,
+            "failed": self.failed,
+            "warmup_requests": self.warmup_requests,
+            "elapsed": self.elapsed,
+            "rps": self.throughput_rps,
+            "bytes_per_sec": self.throughput_bytes,
+        })
+        return data
+
+
+def _failed(error):
+    return (False, 0.0, 0, str(error))
+
+
+def run_load(request_fn, loop="closed", concurrency=1, rate=None, duration=None,
+             requests=None, warmup=0.0, pool_mode="thread", executor=None, on_error=_failed, request_kwargs=None):
+    """
+    Jalankan request_fn berulang-ulang dan kembalikan LoadResult.
+
+    * loop="closed": concurrency worker mengirim request back-to-back
+    * loop="open"  : request dijadwalkan setiap 1/rate detik
+    * run berhenti setelah `requests` request (di luar warmup) atau setelah
+      `duration` detik, mana yang lebih dulu
+    * request yang dijadwalkan sebelum `warmup` detik pertama tidak dihitung
+    * on_error(exception) membentuk tuple hasil untuk request yang melempar exception
+    * executor dari worker_pool.create_pool bisa diberikan agar pool dipakai ulang
+      antar pemanggilan, jika tidak pool dibuat dan dipanaskan di sini
+    * request_kwargs (iterator dict) memberi argumen tambahan untuk setiap request
+      sesuai urutan submit, misalnya file berikutnya dari workload bench.py
+    """
+    if loop == "open" and not rate:
+        raise ValueError("open loop membutuhkan rate (request per detik)")
+    if requests is None and duration is None:
+        requests = concurrency
+
+    own_executor = executor is None
+    if own_executor:
+        executor = create_pool(pool_mode, concurrency)
+
+    result = LoadResult()
+    state = {"scheduled": 0, "outstanding": 0}
+    cond = threading.Condition()
+    start = time.perf_counter()
+    warmup_end = start + warmup
+    stop_at = start + warmup + duration if duration is not None else None
+    result.started = time.time()
+
+    def reserve(intended):
+        # dipanggil dengan cond terkunci, agar pengecekan batas dan penambahan counter atomik
+        if stop_at is not None and intended >= stop_at:
+            return False
+        if requests is not None and intended >= warmup_end and state["scheduled"] - result.warmup_requests >= requests:
+            return False
+        state["scheduled"] += 1
+        state["outstanding"] += 1
+        if intended < warmup_end:
+            result.warmup_requests += 1
+        return True
+
+    def on_done(intended, future):
+        finished = time.perf_counter()
+        try:
+            value = future.result()
+        except Exception as e:
+            value = on_error(e)
+        if intended >= warmup_end:
+            result.add(finished - intended, value)
+        # di closed loop slot berikutnya dipesan sebelum outstanding turun,
+        # supaya run tidak dianggap selesai di antara dua request
+        now = time.perf_counter()
+        with cond:
+            next_allowed = loop == "closed" and reserve(now)
+            state["outstanding"] -= 1
+            cond.notify_all()
+        if next_allowed:
+            submit(now)
+
+    def submit(intended):
+        kwargs = {}
+        if request_kwargs is not None:
+            with cond:
+                kwargs = next(request_kwargs)
+        try:
+            future = executor.submit(request_fn, **kwargs)
+        except RuntimeError as e:
+            logging.error(f"Gagal menjadwalkan request: {e}")
+            with cond:
+                state["outstanding"] -= 1
+                cond.notify_all()
+            return
+        future.add_done_callback(partial(on_done, intended))
+
+    def schedule_next():
+        now = time.perf_counter()
+        with cond:
+            allowed = reserve(now)
+        if allowed:
+            submit(now)
+
+    try:
+        if loop == "closed":
+            for _ in range(concurrency):
+                schedule_next()
+        else:
+            interval = 1.0 / rate
+            i = 0
+            while True:
+                intended = start + i * interval
+                now = time.perf_counter()
+                if intended > now:
+                    time.sleep(intended - now)
+                with cond:
+                    allowed = reserve(intended)
+                if not allowed:
+                    break
+                submit(intended)
+                i += 1
+
+        with cond:
+            while state["outstanding"] > 0:
+                cond.wait(timeout=1.0)
+    finally:
+        if own_executor:
+            executor.shutdown(wait=True)
+
+    result.elapsed = max(time.perf_counter() - max(start, warmup_end), 1e-9)
+    return result
+
+
+def format_summary(result):
+    s = result.summary()
+    return (f"requests={s['count']} sukses={s['success']} gagal={s['failed']} "
+            f"elapsed={s['elapsed']:.2f}s rps={s['rps']:.2f} "
+            f"throughput={s['bytes_per_sec'] / 1024:.2f} KB/s | latency "
+            f"p50={s['p50']:.4f}s p90={s['p90']:.4f}s p99={s['p99']:.4f}s "
+            f"p99.9={s['p99.9']:.4f}s max={s['max']:.4f}s")
+
+
+def http_request_once(server_ip, server_port, command, target, timeout=60.0):
+    """
+    Adapter untuk server Tugas4 (server_thread_pool_http.py / server_process_pool_http.py)
+    yang menerima satu baris '<COMMAND> <nama_file>' dan membalas respons HTTP/1.0.
+    """
+    start_time = time.time()
+    sock = None
+    try:
+        sock = connect(server_ip, server_port, timeout)
+        sock.sendall(f"{command} {target}\n".encode())
+        data = b""
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            data += chunk
+        header, _, body = data.partition(b"\r\n\r\n")
+        status_line = header.split(b"\r\n", 1)[0].decode(errors='ignore').split()
+        status = int(status_line[1]) if len(status_line) > 1 else 0
+        ok = 200 <= status < 300
+        return (ok, time.time() - start_time, len(body), None if ok else f"HTTP {status}")
+    except Exception as e:
+        return (False, time.time() - start_time, 0, str(e))
+    finally:
+        if sock:
+            sock.close()
+
+
+def fetch_stats(server_ip, server_port, timeout=10.0):
+    """Ambil metrik server ETS lewat command STATS, kembalikan dict atau None jika gagal."""
+    try:
+        with connect(server_ip, server_port, timeout) as sock:
+            sock.sendall(b"STATS\r\n\r\n")
+            data = b""
+            while b"\r\n\r\n" not in data:
+                chunk = sock.recv(65536)
+                if not chunk:
+                    break
+                data += chunk
+        response = data.split(b"\r\n\r\n", 1)[0].decode()
+        if not response.startswith("OK "):
+            return None
+        return json.loads(response[3:])
+    except (OSError, ValueError) as e:
+        logging.warning(f"Gagal mengambil STATS dari server: {e}")
+        return None
+
+
+def worker_delta(before, after):
+    """Selisih sukses/gagal per worker server antara dua snapshot STATS."""
+    if not before or not after:
+        return {}
+    delta = {}
+    for name, counts in after["workers"].items():
+        prev = before["workers"].get(name, {"success": 0, "failed": 0})
+        success = counts["success"] - prev["success"]
+        failed = counts["failed"] - prev["failed"]
+        if success or failed:
+            delta[name] = {"success": success, "failed": failed}
+    return delta
+
+
+def format_worker_delta(delta):
+    if not delta:
+        return "STATS tidak tersedia"
+    success = sum(c["success"] for c in delta.values())
+    failed = sum(c["failed"] for c in delta.values())
+    return f"{success} sukses, {failed} gagal ({len(delta)} worker aktif)"
+
+
+def append_report_row(path, header, row):
+    """
+    Tambahkan satu baris ke laporan CSV upload.py/download.py. Header ditulis ulang
+    jika header terakhir di file berbeda (kolom bertambah, atau laporan upload dan
+    download digabung di satu file), agar report.py membaca baris dengan layout yang benar.
+    """
+    last_header = None
+    if os.path.exists(path):
+        with open(path, newline='', encoding='utf-8') as f:
+            for existing in csv.reader(f):
+                if existing and existing[0] == header[0]:
+                    last_header = existing
+    with open(path, mode='a', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        if last_header != header:
+            writer.writerow(header)
+        writer.writerow(row)
+
+
+def build_request(protocol, server_ip, server_port, target, checksum=None, compress=None):
+    if protocol == "ets-get":
+        from download import download_once
+        return partial(download_once, server_ip, server_port, target, "downloaded_files_stress", checksum, compress)
+    if protocol == "ets-upload":
+        from upload import worker_task
+        return partial(worker_task, server_ip, server_port, "upload", target, checksum, compress)
+    if protocol == "http-get":
+        return partial(http_request_once, server_ip, server_port, "GET", target)
+    raise ValueError(f"Protokol tidak dikenal: {protocol}")
+
+
+def add_load_args(parser):
+    parser.add_argument("--loop", choices=["closed", "open"], default="closed", help="closed: worker back-to-back, open: laju tetap --rate (default: closed)")
+    parser.add_argument("--rate", type=float, help="Target request per detik untuk open loop")
+    parser.add_argument("--duration", type=float, help="Lama pengukuran dalam detik (default: berhenti setelah --requests)")
+    parser.add_argument("--requests", type=int, help="Jumlah request yang diukur (default: sama dengan jumlah worker)")
+    parser.add_argument("--warmup", type=float, default=0.0, help="Detik awal yang tidak ikut diukur (default: 0)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load generator untuk server ETS dan HTTP Tugas4.")
+    parser.add_argument("--protocol", choices=["ets-get", "ets-upload", "http-get"], required=True)
+    parser.add_argument("--server", required=True, help="Alamat IP server.")
+    parser.add_argument("--port", type=int, default=8889, help="Port server (default: 8889).")
+    parser.add_argument("--target", required=True, help="Nama file (GET) atau path file lokal (upload).")
+    parser.add_argument("--concurrency", type=int, default=1, help="Jumlah worker klien (default: 1).")
+    parser.add_argument("--pool_mode", choices=["thread", "process"], default="thread")
+    parser.add_argument("--checksum", help="Checksum end-to-end untuk protokol ETS")
+    parser.add_argument("--compress", help="Kompresi stream untuk protokol ETS")
+    parser.add_argument("--json", help="Simpan ringkasan hasil ke file JSON ini")
+    add_load_args(parser)
+    args = parser.parse_args()
+
+    request_fn = build_request(args.protocol, args.server, args.port, args.target, args.checksum, args.compress)
+    result = run_load(request_fn, loop=args.loop, concurrency=args.concurrency, rate=args.rate,
+                      duration=args.duration, requests=args.requests, warmup=args.warmup,
+                      pool_mode=args.pool_mode)
+    print(format_summary(result))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result.summary(), f, indent=2)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s - %(levelname)s - %(message)s")
+    main()
@@ -0,0 +1,29 @@
+"""
+Koneksi klien ETS lewat resolver bercache di Tugas1/resolver.py: hasil lookup
+nama server disimpan (TTL positif/negatif) dan alamat-alamatnya dicoba ala
+happy eyeballs. Resolver bisa diganti dengan use_resolver, misalnya
+Resolver(resolve_fn=static_resolve_fn({...})) sebagai stub lokal.
+
+Opsi socket (TCP_NODELAY, ukuran buffer, keepalive) dibaca dari environment
+SOCK_* setiap kali connect, lihat Tugas1/sockopts.py. upload.py dan
+download.py mengisi environment dari CLI sehingga worker process ikut memakainya.
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "Tugas1"))
+from resolver import Resolver, default_resolver
+from sockopts import options_from_env
+
+_resolver = None
+
+
+def use_resolver(resolver):
+    global _resolver
+    _resolver = resolver
+
+
+def connect(host, port, timeout=None):
+    resolver = _resolver or default_resolver()
+    return resolver.create_connection((host, port), timeout, setup=options_from_env().apply)
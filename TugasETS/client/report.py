@@ -0,0 +1,487 @@
+"""
+Ringkasan dan perbandingan hasil benchmark ETS dengan NumPy.
+
+File yang bisa dibaca (boleh dicampur, berapa pun jumlahnya):
+
+* report_thread.csv / report_process.csv dari upload.py / download.py --mode stress,
+  termasuk format lama yang nilainya berupa teks ("0.627s", "21772.08 KB/s",
+  "1 sukses, 0 gagal"), header yang terulang, dan baris download yang ditambahkan
+  tanpa header ke file yang sama (layout dikenali dari jumlah kolomnya)
+* hasil bench.py (.csv atau .jsonl)
+
+Setiap file diubah menjadi RunTable: satu np.ndarray bertipe per kolom. Kolom
+konfigurasi (KEYS) menjadi kunci grup, metrik (METRICS) menjadi float64 dengan
+nan untuk nilai yang tidak ada di format tersebut. throughput selalu KB/s per
+klien dan time detik per request. Untuk laporan lama yang tidak mencatat mode
+server, server_mode diambil dari nama file (report_thread.csv -> thread).
+
+Mode ringkasan: semua baris dengan konfigurasi yang sama (dari beberapa run/file)
+digabung menjadi mean, std, min, max, n per metrik. --speedup KOLOM menambahkan
+rasio setiap nilai KOLOM terhadap nilai dasarnya (default nilai terkecil) untuk
+konfigurasi lain yang sama; speedup > 1 selalu berarti lebih baik, juga untuk
+metrik yang lebih kecil lebih baik (time, latency).
+
+Mode perbandingan (--baseline ... --candidate ...): untuk setiap konfigurasi yang
+ada di keduanya, perubahan rata-rata kandidat terhadap baseline dihitung per
+metrik. Konfigurasi ditandai REGRESI jika memburuk lebih dari --threshold dan
+uji permutasi satu arah (selisih rata-rata, --permutations kali, --seed tetap
+sehingga hasilnya bisa diulang) memberi p < --alpha. Uji hanya bisa dilakukan
+jika kedua sisi punya >= 2 sampel (jalankan benchmark beberapa kali ke file yang
+sama); dengan 1 sampel hanya --threshold yang dipakai. Exit code 1 jika ada
+regresi, sehingga bisa dipakai sebagai gate seperti di CI (lihat script_perf_gate.sh).
+
+Contoh:
+    python3 report.py report_thread.csv report_process.csv --speedup server_workers
+    python3 report.py --baseline base.csv --candidate new.csv --metrics throughput p99
+"""
+
+import os
+import re
+import sys
+import csv
+import json
+import argparse
+
+import numpy as np
+
+KEYS = ('operation', 'workload', 'content', 'server_mode', 'client_mode', 'size_mb', 'clients', 'server_workers',
+        'get_mode', 'bufsize', 'chunk_size', 'loop', 'checksum', 'compress')
+# nama metrik -> True jika nilai lebih besar lebih baik
+METRICS = {
+    'time': False,
+    'throughput': True,
+    'rps': True,
+    'p50': False,
+    'p99': False,
+    'success': True,
+    'failed': False,
+}
+NUMERIC_KEYS = ('size_mb', 'clients', 'server_workers', 'bufsize', 'chunk_size')
+
+THRESHOLD = 0.05
+ALPHA = 0.05
+PERMUTATIONS = 10000
+SEED = 0
+
+# kolom laporan upload.py/download.py -> kolom RunTable
+REPORT_COLUMNS = {
+    "Operasi": "client_mode",
+    "Operasi (Client Pool Mode)": "client_mode",
+    "Volume": "size_mb",
+    "Volume (Label)": "size_mb",
+    "Jumlah client worker pool": "clients",
+    "Jumlah server worker pool": "server_workers",
+    "Jumlah server worker pool (Reported)": "server_workers",
+    "Waktu total per client": "time",
+    "Waktu rata-rata per tugas klien (s)": "time",
+    "Throughput per client": "throughput",
+    "Throughput rata-rata per tugas klien sukses (KB/s)": "throughput",
+    "Jumlah worker client yang sukses dan gagal": "success_failed",
+    "Jumlah worker client sukses": "success",
+    "Jumlah worker client gagal": "failed",
+    "Checksum": "checksum",
+    "Kompresi": "compress",
+    "Loop": "loop",
+    "Request per detik": "rps",
+    "Latency p50 (s)": "p50",
+    "Latency p99 (s)": "p99",
+}
+# header format lama, untuk baris yang ditambahkan tanpa header (dikenali dari jumlah kolom)
+LEGACY_HEADERS = {
+    9: ["Nomor", "Operasi", "Volume", "Jumlah client worker pool", "Jumlah server worker pool",
+        "Waktu total per client", "Throughput per client",
+        "Jumlah worker client yang sukses dan gagal", "Jumlah worker server yang sukses dan gagal"],
+    10: ["Nomor", "Operasi (Client Pool Mode)", "Volume (Label)", "Jumlah client worker pool",
+         "Jumlah server worker pool (Reported)", "Waktu rata-rata per tugas klien (s)",
+         "Throughput rata-rata per tugas klien sukses (KB/s)",
+         "Jumlah worker client sukses", "Jumlah worker client gagal", "Pesan Error Pertama (jika ada)"],
+}
+# kolom hasil bench.py -> kolom RunTable (sisanya bernama sama)
+BENCH_COLUMNS = {"latency_mean": "time", "latency_p50": "p50", "latency_p99": "p99"}
+
+
+def to_float(values):
+    """Teks seperti '0.627s', '21772.08 KB/s', '13.33MB' -> float64 (kosong/'-' menjadi nan)."""
+    text = np.char.strip(np.char.rstrip(np.asarray(values, dtype=str), ' KMGBs/'))
+    text = np.where((text == '') | (text == '-'), 'nan', text)
+    try:
+        return text.astype(np.float64)
+    except ValueError:
+        out = np.full(text.shape, np.nan)
+        for i, value in enumerate(text):
+            try:
+                out[i] = float(value)
+            except ValueError:
+                pass
+        return out
+
+
+class RunTable:
+    """Hasil benchmark dalam bentuk kolom: {nama: np.ndarray}, satu elemen per baris."""
+
+    def __init__(self, columns):
+        self.columns = columns
+
+    def __len__(self):
+        return len(next(iter(self.columns.values()))) if self.columns else 0
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def __contains__(self, name):
+        return name in self.columns
+
+    def filter(self, mask):
+        return RunTable({name: values[mask] for name, values in self.columns.items()})
+
+    @classmethod
+    def empty(cls, n):
+        columns = {key: np.zeros(n) if key in NUMERIC_KEYS else np.full(n, '', dtype=object) for key in KEYS}
+        columns.update({metric: np.full(n, np.nan) for metric in METRICS})
+        columns['source'] = np.full(n, '', dtype=object)
+        return cls(columns)
+
+    @classmethod
+    def concat(cls, tables):
+        tables = [t for t in tables if len(t)]
+        if not tables:
+            return cls.empty(0)
+        return cls({name: np.concatenate([t[name] for t in tables]) for name in tables[0].columns})
+
+    def group(self, keys=KEYS):
+        """(kunci unik sebagai array (g, len(keys)), indeks grup untuk setiap baris)."""
+        if not len(self):
+            return np.empty((0, len(keys)), dtype=str), np.empty(0, dtype=np.intp)
+        stacked = np.stack([key_text(self[key]) for key in keys], axis=1)
+        unique, inverse = np.unique(stacked, axis=0, return_inverse=True)
+        return unique, inverse.ravel()
+
+
+def key_text(values):
+    """Kolom kunci sebagai teks yang bisa dibandingkan antar file (13.0 dan 13 sama)."""
+    if values.dtype.kind == 'f':
+        return np.array([f"{v:g}" for v in values], dtype=str)
+    return values.astype(str)
+
+
+def _report_table(header, rows, server_mode, source):
+    """Satu blok baris laporan upload.py/download.py dengan header yang sama -> RunTable."""
+    table = RunTable.empty(len(rows))
+    cells = np.array(rows, dtype=str).reshape(len(rows), len(header))
+    for i, name in enumerate(header):
+        column = REPORT_COLUMNS.get(name)
+        if column is None:
+            continue
+        values = cells[:, i]
+        if column == 'success_failed':
+            # "1 sukses, 0 gagal"
+            parts = np.char.partition(values, ' sukses,')
+            table['success'][:] = to_float(parts[:, 0])
+            table['failed'][:] = to_float(np.char.replace(parts[:, 2], 'gagal', ''))
+        elif column == 'throughput':
+            # format lama menulis "... KB/s", upload.py sekarang menulis byte/s tanpa satuan
+            kbs = np.char.endswith(values, 'KB/s') | ('KB/s' in name)
+            numbers = to_float(values)
+            table['throughput'][:] = np.where(kbs, numbers, numbers / 1024)
+        elif column in METRICS or column in NUMERIC_KEYS:
+            table[column][:] = to_float(values)
+        else:
+            table[column][:] = np.where(np.isin(values, ('', '-')), '', values)
+    table['operation'][:] = 'upload' if 'Jumlah worker client yang sukses dan gagal' in header else 'download'
+    table['server_mode'][:] = server_mode
+    table['source'][:] = source
+    return table
+
+
+def read_report(path):
+    """Laporan CSV upload.py/download.py (format lama maupun baru) -> RunTable."""
+    match = re.search(r'(thread|process)', os.path.basename(path))
+    server_mode = match.group(1) if match else ''
+    blocks = []  # [(header, rows)] berurutan
+    header = None
+    skipped = 0
+    with open(path, newline='', encoding='utf-8') as f:
+        for row in csv.reader(f):
+            if not row:
+                continue
+            if row[0] == 'Nomor':
+                header = row
+                continue
+            layout = header if header and len(row) == len(header) else LEGACY_HEADERS.get(len(row))
+            if layout is None:
+                skipped += 1
+                continue
+            if blocks and blocks[-1][0] is layout:
+                blocks[-1][1].append(row)
+            else:
+                blocks.append((layout, [row]))
+    if skipped:
+        print(f"Peringatan: {skipped} baris {path} dilewati (layout kolom tidak dikenal)", file=sys.stderr)
+    return RunTable.concat([_report_table(h, rows, server_mode, path) for h, rows in blocks])
+
+
+def read_bench(path):
+    """Hasil bench.py (.csv atau .jsonl) -> RunTable."""
+    with open(path, newline='', encoding='utf-8') as f:
+        if path.endswith(('.jsonl', '.json')):
+            records = [json.loads(line) for line in f if line.strip()]
+        else:
+            records = [row for row in csv.DictReader(f) if row.get('timestamp') != 'timestamp']
+    table = RunTable.empty(len(records))
+    if not records:
+        return table
+    for name in records[0]:
+        column = BENCH_COLUMNS.get(name, name)
+        if column not in table or column == 'source':
+            continue
+        values = np.array([str(r.get(name, '')) for r in records], dtype=str)
+        if column in METRICS or column in NUMERIC_KEYS:
+            table[column][:] = to_float(values)
+        else:
+            table[column][:] = values
+    if 'bytes_per_sec' in records[0]:
+        total = to_float([str(r.get('bytes_per_sec', '')) for r in records])
+        table['throughput'][:] = total / 1024 / np.maximum(table['clients'], 1)
+    table['source'][:] = path
+    return table
+
+
+def load_runs(paths):
+    """Gabungkan semua file hasil menjadi satu RunTable; format dikenali dari baris pertama."""
+    tables = []
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            first = f.readline()
+        if path.endswith(('.jsonl', '.json')) or first.startswith('timestamp'):
+            tables.append(read_bench(path))
+        else:
+            tables.append(read_report(path))
+    return RunTable.concat(tables)
+
+
+def aggregate(table, metrics=tuple(METRICS), keys=KEYS):
+    """Satu baris per konfigurasi: kolom kunci + '<metrik>_<mean|std|min|max|n>'."""
+    unique, inverse = table.group(keys)
+    g = len(unique)
+    columns = {key: unique[:, i] for i, key in enumerate(keys)}
+    for metric in metrics:
+        values = table[metric]
+        valid = ~np.isnan(values)
+        idx, vals = inverse[valid], values[valid]
+        n = np.bincount(idx, minlength=g)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = np.bincount(idx, weights=vals, minlength=g) / n
+            sq = np.bincount(idx, weights=(vals - mean[idx]) ** 2, minlength=g)
+            std = np.where(n > 1, np.sqrt(sq / np.maximum(n - 1, 1)), 0.0)
+        low = np.full(g, np.inf)
+        high = np.full(g, -np.inf)
+        np.minimum.at(low, idx, vals)
+        np.maximum.at(high, idx, vals)
+        empty = n == 0
+        columns[f"{metric}_mean"] = np.where(empty, np.nan, mean)
+        columns[f"{metric}_std"] = np.where(empty, np.nan, std)
+        columns[f"{metric}_min"] = np.where(empty, np.nan, low)
+        columns[f"{metric}_max"] = np.where(empty, np.nan, high)
+        columns[f"{metric}_n"] = n
+    return RunTable(columns)
+
+
+def _sort_key(value):
+    try:
+        return (0, float(value), value)
+    except ValueError:
+        return (1, 0.0, value)
+
+
+def speedups(summary, dimension, metric, base=None):
+    """
+    Speedup metric untuk setiap nilai dimension terhadap nilai dasar (base, default
+    nilai terkecil) pada konfigurasi yang kolom lainnya sama. Kolom 'speedup' nan jika
+    konfigurasi itu tidak punya baris dengan nilai dasar.
+    """
+    if not len(summary):
+        return RunTable({**summary.columns, 'base': np.empty(0), 'speedup': np.empty(0)})
+    _, inverse = summary.group([key for key in KEYS if key != dimension])
+    dim = summary[dimension]
+    mean = summary[f"{metric}_mean"]
+    if base is None:
+        base_of = {}
+        for group, value in zip(inverse, dim):
+            if group not in base_of or _sort_key(value) < _sort_key(base_of[group]):
+                base_of[group] = value
+        is_base = np.array([base_of[group] == value for group, value in zip(inverse, dim)], dtype=bool)
+    else:
+        is_base = dim == str(base)
+    base_mean = np.full(inverse.max() + 1, np.nan)
+    base_mean[inverse[is_base]] = mean[is_base]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        ratio = mean / base_mean[inverse]
+        if not METRICS[metric]:
+            ratio = 1.0 / ratio
+    return RunTable({**summary.columns, 'base': base_mean[inverse], 'speedup': ratio})
+
+
+def permutation_pvalue(baseline, candidate, higher_is_better, permutations=PERMUTATIONS, rng=None):
+    """
+    p-value satu arah bahwa candidate lebih buruk dari baseline: proporsi permutasi
+    label yang selisih rata-ratanya sama buruk atau lebih buruk dari yang teramati.
+    nan jika salah satu sisi punya kurang dari 2 sampel.
+    """
+    if len(baseline) < 2 or len(candidate) < 2:
+        return np.nan
+    rng = rng if rng is not None else np.random.default_rng(SEED)
+    pooled = np.concatenate([baseline, candidate])
+    split = len(baseline)
+    observed = candidate.mean() - baseline.mean()
+    order = np.argsort(rng.random((permutations, len(pooled))), axis=1)
+    shuffled = pooled[order]
+    diffs = shuffled[:, split:].mean(axis=1) - shuffled[:, :split].mean(axis=1)
+    worse = diffs <= observed if higher_is_better else diffs >= observed
+    return (np.count_nonzero(worse) + 1) / (permutations + 1)
+
+
+def compare(baseline, candidate, metrics=('time', 'throughput'), threshold=THRESHOLD, alpha=ALPHA,
+            permutations=PERMUTATIONS, seed=SEED):
+    """
+    Bandingkan dua RunTable per konfigurasi dan metrik. Kembalikan (rows, only_baseline,
+    only_candidate); setiap row berisi config, metric, rata-rata, n, change (relatif,
+    positif = lebih baik), p_value, dan status 'REGRESI' / 'lebih baik' / 'sama'.
+    """
+    rng = np.random.default_rng(seed)
+    base_keys, base_inverse = baseline.group()
+    cand_keys, cand_inverse = candidate.group()
+    base_index = {tuple(k): i for i, k in enumerate(base_keys)}
+    cand_index = {tuple(k): i for i, k in enumerate(cand_keys)}
+    rows = []
+    for config in sorted(base_index.keys() & cand_index.keys(), key=lambda c: [_sort_key(v) for v in c]):
+        base_rows = base_inverse == base_index[config]
+        cand_rows = cand_inverse == cand_index[config]
+        for metric in metrics:
+            b = baseline[metric][base_rows]
+            c = candidate[metric][cand_rows]
+            b, c = b[~np.isnan(b)], c[~np.isnan(c)]
+            if not len(b) or not len(c):
+                continue
+            higher = METRICS[metric]
+            base_mean, cand_mean = b.mean(), c.mean()
+            if base_mean == 0:
+                change = 0.0 if cand_mean == 0 else (np.inf if (cand_mean > 0) == higher else -np.inf)
+            else:
+                change = (cand_mean - base_mean) / abs(base_mean) * (1 if higher else -1)
+            p_value = permutation_pvalue(b, c, higher, permutations, rng)
+            if change < -threshold and (np.isnan(p_value) or p_value < alpha):
+                status = 'REGRESI'
+            elif change > threshold:
+                status = 'lebih baik'
+            else:
+                status = 'sama'
+            rows.append({
+                'config': dict(zip(KEYS, config)), 'metric': metric,
+                'baseline_mean': float(base_mean), 'candidate_mean': float(cand_mean),
+                'baseline_n': int(len(b)), 'candidate_n': int(len(c)),
+                'change': float(change), 'p_value': None if np.isnan(p_value) else float(p_value),
+                'status': status,
+            })
+    only_baseline = [dict(zip(KEYS, c)) for c in base_index.keys() - cand_index.keys()]
+    only_candidate = [dict(zip(KEYS, c)) for c in cand_index.keys() - base_index.keys()]
+    return rows, only_baseline, only_candidate
+
+
+def format_config(config):
+    return " ".join(f"{key}={value}" for key, value in config.items() if value not in ('', '0', 'nan'))
+
+
+def format_summary(summary, metrics):
+    lines = []
+    for i in sorted(range(len(summary)), key=lambda i: [_sort_key(summary[key][i]) for key in KEYS]):
+        config = {key: summary[key][i] for key in KEYS}
+        values = []
+        for metric in metrics:
+            n = summary[f"{metric}_n"][i]
+            if n > 1:
+                values.append(f"{metric}={summary[f'{metric}_mean'][i]:.3f}±{summary[f'{metric}_std'][i]:.3f}")
+            elif n:
+                values.append(f"{metric}={summary[f'{metric}_mean'][i]:.3f}")
+        lines.append(f"{format_config(config)}  n={max(summary[f'{m}_n'][i] for m in metrics)}  {' '.join(values)}")
+    return "\n".join(lines)
+
+
+def format_speedups(table, dimension, metric):
+    lines = []
+    order = sorted(range(len(table)), key=lambda i: [_sort_key(table[key][i]) for key in KEYS if key != dimension]
+                   + [_sort_key(table[dimension][i])])
+    for i in order:
+        config = {key: table[key][i] for key in KEYS if key != dimension}
+        speedup = table['speedup'][i]
+        text = "-" if np.isnan(speedup) else f"{speedup:.2f}x"
+        lines.append(f"{format_config(config)}  {dimension}={table[dimension][i]}  "
+                     f"{metric}={table[f'{metric}_mean'][i]:.3f}  speedup {text}")
+    return "\n".join(lines)
+
+
+def format_comparison(rows):
+    lines = []
+    for row in rows:
+        p = "-" if row['p_value'] is None else f"{row['p_value']:.4f}"
+        lines.append(f"[{row['status']}] {format_config(row['config'])}  {row['metric']}: "
+                     f"{row['baseline_mean']:.3f} (n={row['baseline_n']}) -> {row['candidate_mean']:.3f} "
+                     f"(n={row['candidate_n']})  {row['change'] * 100:+.1f}%  p={p}")
+    return "\n".join(lines)
+
+
+def summary_records(summary):
+    return [{name: values[i].item() if hasattr(values[i], 'item') else values[i]
+             for name, values in summary.columns.items()} for i in range(len(summary))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ringkasan dan perbandingan hasil benchmark ETS (report_*.csv, hasil bench.py).")
+    parser.add_argument('files', nargs='*', help='File hasil yang diringkas (report_thread.csv, report_process.csv, hasil bench.py .csv/.jsonl)')
+    parser.add_argument('--metrics', nargs='+', choices=list(METRICS), default=['time', 'throughput'], help='Metrik yang ditampilkan/dibandingkan (default: time throughput)')
+    parser.add_argument('--speedup', choices=KEYS, help='Tampilkan speedup setiap nilai kolom ini, misalnya server_workers atau client_mode')
+    parser.add_argument('--speedup_base', help='Nilai dasar untuk --speedup (default: nilai terkecil)')
+    parser.add_argument('--baseline', nargs='+', help='File hasil baseline untuk perbandingan')
+    parser.add_argument('--candidate', nargs='+', help='File hasil kandidat yang dibandingkan dengan --baseline')
+    parser.add_argument('--threshold', type=float, default=THRESHOLD, help=f'Perubahan relatif minimal yang dianggap regresi (default: {THRESHOLD})')
+    parser.add_argument('--alpha', type=float, default=ALPHA, help=f'Batas p-value uji permutasi (default: {ALPHA})')
+    parser.add_argument('--permutations', type=int, default=PERMUTATIONS, help=f'Jumlah permutasi per uji (default: {PERMUTATIONS})')
+    parser.add_argument('--seed', type=int, default=SEED, help=f'Seed uji permutasi (default: {SEED})')
+    parser.add_argument('--json', help='Tulis ringkasan atau hasil perbandingan ke file JSON ini')
+    args = parser.parse_args()
+
+    if bool(args.baseline) != bool(args.candidate):
+        parser.error("--baseline dan --candidate harus diisi bersama")
+    if not args.files and not args.baseline:
+        parser.error("isi file hasil, atau --baseline dan --candidate")
+
+    if args.baseline:
+        rows, only_baseline, only_candidate = compare(load_runs(args.baseline), load_runs(args.candidate),
+                                                      args.metrics, args.threshold, args.alpha,
+                                                      args.permutations, args.seed)
+        print(format_comparison(rows))
+        for label, configs in (("hanya di baseline", only_baseline), ("hanya di kandidat", only_candidate)):
+            if configs:
+                print(f"{len(configs)} konfigurasi {label} (tidak dibandingkan)")
+        regressions = sum(1 for row in rows if row['status'] == 'REGRESI')
+        print(f"{len(rows)} perbandingan, {regressions} regresi")
+        if args.json:
+            with open(args.json, 'w') as f:
+                json.dump({'comparisons': rows, 'only_baseline': only_baseline,
+                           'only_candidate': only_candidate}, f, indent=2)
+        sys.exit(1 if regressions else 0)
+
+    table = load_runs(args.files)
+    summary = aggregate(table, args.metrics)
+    print(f"{len(table)} baris dari {len(args.files)} file, {len(summary)} konfigurasi")
+    print(format_summary(summary, args.metrics))
+    if args.speedup:
+        for metric in args.metrics:
+            print(f"\nSpeedup {metric} per {args.speedup}:")
+            print(format_speedups(speedups(summary, args.speedup, metric, args.speedup_base), args.speedup, metric))
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(summary_records(summary), f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+#!/usr/bin/env bash
+# Gate performa lokal ala CI: matriks kecil dijalankan REPEAT kali ke satu file kandidat,
+# lalu dibandingkan dengan baseline oleh report.py (exit 1 jika ada regresi).
+# Baseline pertama kali dibuat dari run ini; hapus file baseline untuk memperbaruinya.
+
+BASELINE="${1:-bench_baseline.csv}"
+CANDIDATE="bench_candidate.csv"
+REPEAT="${REPEAT:-5}"
+
+rm -f "$CANDIDATE"
+for i in $(seq "$REPEAT"); do
+  python3 bench.py \
+    --operations upload download \
+    --sizes 10 \
+    --clients 1 5 \
+    --server_workers 5 \
+    --server_modes thread process \
+    --requests 10 \
+    --output "$CANDIDATE" || exit 2
+done
+
+if [ ! -f "$BASELINE" ]; then
+  cp "$CANDIDATE" "$BASELINE"
+  echo "Baseline baru disimpan di $BASELINE"
+  exit 0
+fi
+
+python3 report.py --baseline "$BASELINE" --candidate "$CANDIDATE" --metrics throughput p99
@@ -1,31 +1,15 @@
 #!/usr/bin/env bash
+# Server dijalankan otomatis oleh bench.py di loopback dengan --workers yang sesuai.
 
-SERVER_IP="172.16.16.101"
-PORT=8889
-FILE_PATH="./doc/file_50mb.txt"
-OUTPUT_CSV="report_process.csv"
-POOL_MODE="process"      
+OUTPUT="bench_upload.csv"
 
-# rm -f "$OUTPUT_CSV"
+python3 bench.py \
+  --operations upload \
+  --sizes 10 50 100 \
+  --clients 1 5 50 \
+  --client_modes thread process \
+  --server_workers 1 5 50 \
+  --server_modes thread process \
+  --output "$OUTPUT"
 
-TEST_NUM=1
-
-for CLIENTS in 1 5 50; do
-  for SERVER_WORKERS in 5; do
-    echo "Menjalankan stress test: CLIENTS=$CLIENTS, SERVER_WORKERS=$SERVER_WORKERS"
-    python3 upload.py \
-      --server "$SERVER_IP" \
-      --port "$PORT" \
-      --mode stress \
-      --file "$FILE_PATH" \
-      --pool_mode "$POOL_MODE" \
-      --pool_size "$CLIENTS" \
-      --server_workers "$SERVER_WORKERS" \
-      --nomor "$TEST_NUM" \
-      --output "$OUTPUT_CSV"
-
-    TEST_NUM=$(( TEST_NUM + 1 ))
-  done
-done
-
-echo "Stress test selesai. Lihat hasil di $OUTPUT_CSV"
+echo "Stress test selesai. Lihat hasil di $OUTPUT"
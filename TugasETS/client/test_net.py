@@ -0,0 +1,49 @@
+"""
+Test net.connect dengan resolver stub lokal, tanpa DNS.
+
+Jalankan dari folder ini: python -m pytest -q  (atau python -m unittest)
+"""
+
+import os
+import socket
+import unittest
+from unittest import mock
+
+import net
+from resolver import Resolver, static_resolve_fn
+
+
+class ConnectTest(unittest.TestCase):
+    def setUp(self):
+        self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.server.bind(('127.0.0.1', 0))
+        self.server.listen(8)
+        self.port = self.server.getsockname()[1]
+        self.resolver = Resolver(resolve_fn=static_resolve_fn({'ets-server': ['::1', '127.0.0.1']}))
+        net.use_resolver(self.resolver)
+
+    def tearDown(self):
+        net.use_resolver(None)
+        self.server.close()
+
+    def test_connect_falls_back_to_ipv4(self):
+        with net.connect('ets-server', self.port, timeout=2) as sock:
+            self.assertEqual(sock.getpeername(), ('127.0.0.1', self.port))
+
+    def test_connect_reuses_cached_lookup(self):
+        for _ in range(3):
+            net.connect('ets-server', self.port, timeout=2).close()
+        self.assertEqual((self.resolver.hits, self.resolver.misses), (2, 1))
+
+    def test_socket_options_from_env(self):
+        with mock.patch.dict(os.environ, {'SOCK_NODELAY': '1'}):
+            with net.connect('ets-server', self.port, timeout=2) as sock:
+                self.assertTrue(sock.getsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY))
+
+    def test_unknown_host(self):
+        with self.assertRaises(socket.gaierror):
+            net.connect('nowhere', self.port, timeout=2)
+
+
+if __name__ == '__main__':
+    unittest.main()
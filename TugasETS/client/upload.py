@@ -1,72 +1,157 @@
 import os
+import sys
 import socket
-import json
 import base64
 import logging
 import argparse
 import time
-import csv
-from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from functools import partial
+# modul checksum dan kompresi dipakai bersama dengan server
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "server"))
+from integrity import CHECKSUMS, TimedChecksum, trailer
+from compression import COMPRESSIONS, TimedCompressor
+from loadgen import (run_load, format_summary, add_load_args, fetch_stats, worker_delta, format_worker_delta,
+                     append_report_row)
+from worker_pool import encoded_source, mapped
+from net import connect, options_from_env
+# opsi socket bersama dengan server (Tugas1/sockopts.py)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "Tugas1"))
+from sockopts import add_socket_args, options_from_args as socket_options_from_args
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
-def send_command(server_ip, server_port, command_str=""):
-    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    try:
-        sock.connect((server_ip, server_port))
-        sock.sendall((command_str + "\r\n\r\n").encode())
-        data_received = ""
-        while True:
-            data = sock.recv(65536)
-            if data:
-                data_received += data.decode()
-                if "\r\n\r\n" in data_received:
-                    break
-            else:
-                break
-        return json.loads(data_received.strip())
-    except Exception as e:
-        return {"status": "ERROR", "data": str(e)}
-    finally:
-        sock.close()
+CHUNK_SIZE = 8192
+ENCODE_BLOCK = 3 * 16384  # kelipatan 3 agar setiap blok base64 bisa di-encode terpisah
+SEND_BLOCK = 256 * 1024
+SOCKET_TIMEOUT = 60.0
+
+def read_response(sock, buffer=b""):
+    while b"\r\n\r\n" not in buffer:
+        data = sock.recv(CHUNK_SIZE)
+        if not data:
+            raise ConnectionError("Koneksi ditutup server sebelum respons lengkap.")
+        buffer += data
+    return buffer.split(b"\r\n\r\n", 1)[0].decode()
+
+def remote_upload(server_ip, server_port, filepath="", checksum_algo=None, compress_algo=None, encoded_path=None):
+    """
+    Upload satu file memakai protokol streaming server ETS:
+    UPLOAD <nama> <ukuran_base64> [checksum=<algo>] [compress=<algo>], tunggu 'OK Ready',
+    kirim isi file dalam base64 per blok (dikompresi jika diminta), lalu trailer
+    CHECKSUM jika diminta.
+    Jika encoded_path (hasil worker_pool.encoded_source) diberikan dan tanpa checksum
+    maupun kompresi, base64 yang sudah jadi dikirim langsung dari mmap.
+    """
+    checksum = TimedChecksum(checksum_algo) if checksum_algo else None
+    compressor = TimedCompressor(compress_algo) if compress_algo else None
+
+    def stats():
+        return {
+            "checksum_seconds": checksum.seconds if checksum else 0.0,
+            "wire_bytes": compressor.wire_bytes if compressor else 0,
+            "compression_seconds": compressor.seconds if compressor else 0.0,
+        }
+
+    cached = mapped(encoded_path) if encoded_path and not checksum and not compressor else None
 
-def remote_upload(server_ip, server_port, filepath=""):
+    sock = None
     try:
-        with open(filepath, 'rb') as f:
-            encoded = base64.b64encode(f.read()).decode()
         filename = os.path.basename(filepath)
-        command_str = f"upload {filename} {encoded}"
-        return send_command(server_ip, server_port, command_str)
+        raw_size = os.path.getsize(filepath)
+        encoded_size = 4 * ((raw_size + 2) // 3)
+        if cached is not None and len(cached) != encoded_size:
+            raise ValueError(f"Cache base64 {encoded_path} tidak cocok dengan {filepath}")
+
+        sock = connect(server_ip, server_port, SOCKET_TIMEOUT)
+        command_str = f"UPLOAD {filename} {encoded_size}"
+        if checksum:
+            command_str += f" checksum={checksum.name}"
+        if compressor:
+            command_str += f" compress={compressor.name}"
+        sock.sendall((command_str + "\r\n\r\n").encode())
+
+        response = read_response(sock)
+        if not response.startswith("OK"):
+            return {"status": "ERROR", "data": response, **stats()}
+
+        if cached is not None:
+            send_block = options_from_env().chunk(SEND_BLOCK)
+            for offset in range(0, encoded_size, send_block):
+                sock.sendall(cached[offset:offset + send_block])
+        else:
+            with open(filepath, 'rb') as f:
+                while True:
+                    block = f.read(ENCODE_BLOCK)
+                    if not block:
+                        break
+                    if checksum:
+                        checksum.update(block)
+                    encoded = base64.b64encode(block)
+                    if compressor:
+                        encoded = compressor.compress(encoded)
+                    if encoded:
+                        sock.sendall(encoded)
+        if compressor:
+            sock.sendall(compressor.flush())
+        if checksum:
+            sock.sendall(trailer(checksum))
+
+        response = read_response(sock)
+        status = "OK" if response.startswith("OK") else "ERROR"
+        return {"status": status, "data": response, **stats()}
     except Exception as e:
-        return {"status": "ERROR", "data": str(e)}
+        return {"status": "ERROR", "data": str(e), **stats()}
+    finally:
+        if sock:
+            sock.close()
 
-def worker_task(server_ip, server_port, operation, filepath):
+def worker_task(server_ip, server_port, operation, filepath, checksum_algo=None, compress_algo=None, encoded_path=None):
     start_time = time.time()
     if operation == "upload":
-        result = remote_upload(server_ip, server_port, filepath)
+        result = remote_upload(server_ip, server_port, filepath, checksum_algo, compress_algo, encoded_path)
         byte_size = os.path.getsize(filepath) if result.get('status') == 'OK' else 0
     else:
         result = {"status": "ERROR", "data": "Unknown operation"}
         byte_size = 0
+    if result.get('status') != 'OK':
+        logging.error(f"Upload gagal: {result.get('data')}")
     duration = time.time() - start_time
-    return (result.get('status') == 'OK', duration, byte_size)
+    wire_bytes = result.get('wire_bytes') or 4 * ((byte_size + 2) // 3)
+    return (result.get('status') == 'OK', duration, byte_size, result.get('checksum_seconds', 0.0),
+            wire_bytes if byte_size else 0, result.get('compression_seconds', 0.0))
 
-def stress_test(server_ip, server_port, operation, file_path, pool_mode, pool_size, server_workers, nomor, output_csv):
-    executor_cls = ThreadPoolExecutor if pool_mode == "thread" else ProcessPoolExecutor
-    results = []
-    start_all = time.time()
+def stress_test(server_ip, server_port, operation, file_path, pool_mode, pool_size, server_workers, nomor, output_csv,
+                checksum_algo=None, compress_algo=None, loop="closed", rate=None, duration=None, requests=None, warmup=0.0,
+                preencode=False):
+    # base64 di-encode sekali sebelum pengukuran, bukan di setiap request
+    encoded_path = encoded_source(file_path) if preencode and not checksum_algo and not compress_algo else None
+    request_fn = partial(worker_task, server_ip, server_port, operation, file_path, checksum_algo, compress_algo,
+                         encoded_path)
+    stats_before = fetch_stats(server_ip, server_port)
+    load = run_load(request_fn, loop=loop, concurrency=pool_size, rate=rate, duration=duration,
+                    requests=requests, warmup=warmup, pool_mode=pool_mode,
+                    on_error=lambda e: (False, 0.0, 0, 0.0, 0, 0.0))
+    server_workers_result = format_worker_delta(worker_delta(stats_before, fetch_stats(server_ip, server_port)))
+    results = load.results
+    latency = load.summary()
+    print(f"Hasil load: {format_summary(load)}")
+    num_requests = len(results)
 
-    with executor_cls(max_workers=pool_size) as executor:
-        futures = [executor.submit(worker_task, server_ip, server_port, operation, file_path) for _ in range(pool_size)]
-        for f in futures:
-            results.append(f.result())
-
-    total_time = time.time() - start_all
+    total_time = load.elapsed
     success_count = sum(1 for r in results if r[0])
-    fail_count = pool_size - success_count
+    fail_count = num_requests - success_count
     total_bytes = sum(r[2] for r in results)
     throughput = total_bytes / total_time if total_time > 0 else 0
-    avg_time = total_time / pool_size if pool_size > 0 else 0
+    avg_time = total_time / num_requests if num_requests > 0 else 0
+    # Overhead verifikasi: porsi waktu transfer yang habis untuk hashing di klien
+    total_checksum_seconds = sum(r[3] for r in results)
+    sum_of_durations = sum(r[1] for r in results)
+    checksum_overhead_pct = (total_checksum_seconds / sum_of_durations * 100) if sum_of_durations > 0 else 0
+    # Throughput efektif (byte file) vs throughput di jaringan (byte base64/terkompresi)
+    total_wire_bytes = sum(r[4] for r in results)
+    wire_throughput = total_wire_bytes / total_time if total_time > 0 else 0
+    compression_ratio = total_bytes / total_wire_bytes if total_wire_bytes > 0 else 0
+    total_compression_seconds = sum(r[5] for r in results)
 
     # Menulis ke CSV
     file_volume = os.path.getsize(file_path) if os.path.exists(file_path) else 0
@@ -75,21 +160,28 @@ def stress_test(server_ip, server_port, operation, file_path, pool_mode, pool_si
     header = [
         "Nomor", "Operasi", "Volume", "Jumlah client worker pool", "Jumlah server worker pool",
         "Waktu total per client", "Throughput per client",
-        "Jumlah worker client yang sukses dan gagal", "Jumlah worker server yang sukses dan gagal"
+        "Jumlah worker client yang sukses dan gagal", "Jumlah worker server yang sukses dan gagal",
+        "Checksum", "Waktu checksum rata-rata per client (s)", "Overhead checksum (%)",
+        "Kompresi", "Throughput wire per client", "Rasio file/wire", "Waktu kompresi rata-rata per client (s)",
+        "Loop", "Jumlah request terukur", "Request per detik",
+        "Latency p50 (s)", "Latency p90 (s)", "Latency p99 (s)", "Latency p99.9 (s)"
     ]
     row = [
         nomor, operation, file_volume_str, pool_size, server_workers,
         round(avg_time, 3), round(throughput / pool_size, 3),
         f"{success_count} sukses, {fail_count} gagal",
-        f"{server_workers} server worker (manual input)"
+        server_workers_result,
+        checksum_algo or "-",
+        round(total_checksum_seconds / num_requests, 3) if num_requests > 0 else 0,
+        round(checksum_overhead_pct, 2),
+        compress_algo or "-",
+        round(wire_throughput / pool_size, 3) if pool_size > 0 else 0,
+        round(compression_ratio, 2),
+        round(total_compression_seconds / num_requests, 3) if num_requests > 0 else 0,
+        loop, num_requests, round(latency['rps'], 2),
+        round(latency['p50'], 3), round(latency['p90'], 3), round(latency['p99'], 3), round(latency['p99.9'], 3)
     ]
-    write_header = not os.path.exists(output_csv)
-
-    with open(output_csv, mode="a", newline="") as csvfile:
-        writer = csv.writer(csvfile)
-        if write_header:
-            writer.writerow(header)
-        writer.writerow(row)
+    append_report_row(output_csv, header, row)
 
     print(f"Hasil stress test disimpan ke {output_csv}")
     print("Data:", row)
@@ -104,14 +196,20 @@ def main():
     parser.add_argument("--pool_size", type=int, default=1, help="Number of concurrent workers")
     parser.add_argument("--server_workers", type=int, default=1, help="Number of server workers (for logging only)")
     parser.add_argument("--nomor", type=int, default=1, help="Nomor test case untuk laporan")
+    parser.add_argument("--checksum", choices=CHECKSUMS, help="Verify uploads end-to-end with this checksum")
+    parser.add_argument("--compress", choices=COMPRESSIONS, help="Compress the upload stream with this codec")
+    parser.add_argument("--preencode", action="store_true", help="Encode the file to base64 once (cached in .upload_cache) and send it from mmap, ignored with --checksum/--compress")
+    add_load_args(parser)
     parser.add_argument("--output", default="stress_test_report.csv", help="Output CSV file name")
+    add_socket_args(parser)
     args = parser.parse_args()
+    socket_options_from_args(args).export()
 
-    if args.mode == "UPLOAD":
+    if args.mode == "upload":
         if not args.file:
             print("Upload mode requires --file argument")
             return
-        res = remote_upload(args.server, args.port, args.file)
+        res = remote_upload(args.server, args.port, args.file, args.checksum, args.compress)
         print(res)
     elif args.mode == "stress":
         if not args.file:
@@ -120,7 +218,8 @@ def main():
         stress_test(
             args.server, args.port, "upload", args.file,
             args.pool_mode, args.pool_size, args.server_workers,
-            args.nomor, args.output
+            args.nomor, args.output, args.checksum, args.compress,
+            args.loop, args.rate, args.duration, args.requests, args.warmup, args.preencode
         )
 
 if __name__ == "__main__":
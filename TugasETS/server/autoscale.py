@@ -0,0 +1,294 @@
+"""
+Autoscaling jumlah worker untuk server ETS (--max_workers).
+
+Tanpa --max_workers jumlah worker tetap --workers. Dengan --max_workers,
+--workers menjadi jumlah minimum dan pool berubah antara keduanya:
+
+* thread_pool.py : ElasticThreadPool menggantikan ThreadPoolExecutor. Thread
+  Autoscaler memeriksa antrean setiap --scale_interval detik (atau
+  --scale_wait jika lebih kecil, begitu juga di supervisor proses); jika request
+  tertua sudah menunggu >= --scale_wait detik, thread baru ditambahkan
+  sebanyak request yang belum kebagian worker (sampai --max_workers).
+  Worker yang menganggur --scale_idle detik berhenti selama jumlahnya masih
+  di atas minimum.
+* processing_pool.py : ProcessSupervisor menggantikan ProcessPoolExecutor.
+  Setiap worker process menghitung dirinya sibuk selama melayani koneksi; jika
+  semua worker sibuk dan masih ada koneksi di antrean listen (socket listening
+  readable) selama >= --scale_wait detik, satu proses ditambahkan.
+  Worker yang tidak mendapat koneksi selama --scale_idle detik keluar sendiri
+  (jumlah hidup dicek di bawah lock, jadi tidak pernah turun di bawah minimum),
+  dan worker yang mati karena crash diganti oleh supervisor. Berbeda dengan
+  ProcessPoolExecutor, satu worker yang mati tidak merusak seluruh pool.
+
+Setiap keputusan dicatat di log dengan format
+
+    Autoscale up: 2 -> 4 workers (...)
+    Autoscale down: 4 -> 3 workers (...)
+    Autoscale respawn: 2 -> 3 workers (...)
+
+yang dibaca log_analyzer.py untuk kolom workers di timeline throughput.
+"""
+
+import os
+import time
+import select
+import socket
+import copy
+import logging
+import threading
+import multiprocessing
+from collections import deque
+
+SCALE_WAIT = 0.1
+SCALE_IDLE = 30.0
+SCALE_INTERVAL = 0.5
+
+
+class ElasticThreadPool:
+    """Pengganti ThreadPoolExecutor (hanya submit) dengan jumlah thread min_workers..max_workers."""
+
+    def __init__(self, min_workers, max_workers, scale_wait=SCALE_WAIT, idle_timeout=SCALE_IDLE,
+                 interval=SCALE_INTERVAL, thread_name_prefix='Worker'):
+        self.min_workers = max(1, min_workers)
+        self.max_workers = max(self.min_workers, max_workers)
+        self.scale_wait = scale_wait
+        self.idle_timeout = idle_timeout
+        self.interval = interval
+        self.prefix = thread_name_prefix
+        self.cond = threading.Condition()
+        self.tasks = deque()
+        self.threads = set()
+        self.workers = 0
+        self.busy = 0
+        self.next_id = 0
+        self.stopped = False
+        with self.cond:
+            for _ in range(self.min_workers):
+                self._spawn()
+        threading.Thread(target=self._scale_loop, name='Autoscaler', daemon=True).start()
+
+    def submit(self, fn, *args):
+        with self.cond:
+            self.tasks.append((time.perf_counter(), fn, args))
+            self.cond.notify()
+
+    def _spawn(self):
+        # dipanggil dengan self.cond dipegang
+        self.workers += 1
+        name = f"{self.prefix}_{self.next_id}"
+        self.next_id += 1
+        # bukan daemon, seperti ThreadPoolExecutor: upload yang sedang berjalan diselesaikan saat shutdown
+        thread = threading.Thread(target=self._run, name=name)
+        self.threads.add(thread)
+        thread.start()
+
+    def _exit(self):
+        # dipanggil dengan self.cond dipegang
+        self.workers -= 1
+        self.threads.discard(threading.current_thread())
+
+    def _run(self):
+        while True:
+            with self.cond:
+                idle_since = time.monotonic()
+                while not self.tasks:
+                    if self.stopped:
+                        self._exit()
+                        return
+                    idle = time.monotonic() - idle_since
+                    if idle >= self.idle_timeout:
+                        if self.workers > self.min_workers:
+                            self._exit()
+                            logging.info(f"Autoscale down: {self.workers + 1} -> {self.workers} workers "
+                                         f"({threading.current_thread().name} idle {idle:.1f}s)")
+                            return
+                        idle_since = time.monotonic()
+                    self.cond.wait(self.idle_timeout - (time.monotonic() - idle_since))
+                _, fn, args = self.tasks.popleft()
+                self.busy += 1
+            try:
+                fn(*args)
+            except Exception as e:
+                logging.error(f"Unhandled error in {threading.current_thread().name}: {e}", exc_info=True)
+            finally:
+                with self.cond:
+                    self.busy -= 1
+
+    def _scale_loop(self):
+        while not self.stopped:
+            time.sleep(min(self.interval, self.scale_wait))
+            with self.cond:
+                if not self.tasks or self.workers >= self.max_workers:
+                    continue
+                wait = time.perf_counter() - self.tasks[0][0]
+                if wait < self.scale_wait:
+                    continue
+                before = self.workers
+                waiting = len(self.tasks) - (self.workers - self.busy)
+                for _ in range(min(self.max_workers - self.workers, max(1, waiting))):
+                    self._spawn()
+                logging.info(f"Autoscale up: {before} -> {self.workers} workers "
+                             f"(queue {len(self.tasks)}, oldest wait {wait:.3f}s)")
+
+    def shutdown(self, wait=True):
+        """Hentikan pool; task yang sudah di-submit tetap dijalankan sampai antrean kosong."""
+        with self.cond:
+            self.stopped = True
+            self.cond.notify_all()
+            threads = list(self.threads)
+        if wait:
+            for thread in threads:
+                thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        return False
+
+
+class ScaleState:
+    """Penghitung bersama antara supervisor dan worker process."""
+
+    def __init__(self, ctx, min_workers, idle_timeout):
+        self.min_workers = min_workers
+        self.idle_timeout = idle_timeout
+        self.alive = ctx.Value('i', 0)
+        self.busy = ctx.Value('i', 0)
+        # penanda sibuk milik satu worker, dibuat oleh for_worker
+        self.current = None
+
+    def for_worker(self, ctx):
+        """Salinan untuk satu worker process dengan penanda sibuk sendiri (dibaca supervisor jika worker mati)."""
+        worker = copy.copy(self)
+        worker.current = ctx.Value('b', 0, lock=False)
+        return worker
+
+    def set_busy(self, delta):
+        with self.busy.get_lock():
+            self.busy.value += delta
+            if self.current is not None:
+                self.current.value = 1 if delta > 0 else 0
+
+    def release(self, worker):
+        """Worker mati tanpa keluar normal: kurangi alive, dan busy jika ia mati saat melayani koneksi."""
+        with self.busy.get_lock():
+            if worker.current.value:
+                worker.current.value = 0
+                self.busy.value -= 1
+        with self.alive.get_lock():
+            self.alive.value -= 1
+            return self.alive.value
+
+    def try_retire(self):
+        """True jika worker ini boleh keluar karena idle (jumlah hidup tetap >= minimum)."""
+        with self.alive.get_lock():
+            if self.alive.value <= self.min_workers:
+                return False
+            self.alive.value -= 1
+            logging.info(f"Autoscale down: {self.alive.value + 1} -> {self.alive.value} workers "
+                         f"(worker {os.getpid()} idle {self.idle_timeout:.1f}s)")
+            return True
+
+
+def accept_or_idle(server_socket, scale):
+    """
+    accept untuk worker process. Dengan autoscaling, kembalikan None jika worker
+    boleh berhenti karena tidak ada koneksi selama idle_timeout.
+    """
+    if scale is None:
+        return server_socket.accept()
+    # timeout dipasang di semua worker: status non-blocking fd listening dipakai bersama antar proses
+    server_socket.settimeout(scale.idle_timeout)
+    while True:
+        try:
+            return server_socket.accept()
+        except socket.timeout:
+            if scale.try_retire():
+                return None
+
+
+class ProcessSupervisor:
+    def __init__(self, server_socket, target, args, min_workers, max_workers, scale_wait=SCALE_WAIT,
+                 idle_timeout=SCALE_IDLE, interval=SCALE_INTERVAL):
+        # fork eksplisit: worker mewarisi chunk size, pipeline logging dan sys.path dari
+        # proses induk, yang hilang jika start method default forkserver/spawn dipakai
+        self.ctx = multiprocessing.get_context('fork')
+        self.server_socket = server_socket
+        self.target = target
+        self.args = args
+        self.min_workers = max(1, min_workers)
+        self.max_workers = max(self.min_workers, max_workers)
+        self.scale_wait = scale_wait
+        self.interval = interval
+        self.state = ScaleState(self.ctx, self.min_workers, idle_timeout)
+        # proses -> ScaleState miliknya
+        self.processes = {}
+
+    def _spawn(self):
+        with self.state.alive.get_lock():
+            self.state.alive.value += 1
+        worker = self.state.for_worker(self.ctx)
+        # bukan daemon: worker boleh punya proses anak (decode pool, lihat decode_pool.py);
+        # supervisor menghentikan semua worker sendiri di run()
+        p = self.ctx.Process(target=self.target, args=(self.server_socket,) + self.args + (worker,))
+        p.start()
+        self.processes[p] = worker
+
+    def _reap(self):
+        for p in [p for p in self.processes if not p.is_alive()]:
+            worker = self.processes.pop(p)
+            p.join()
+            if p.exitcode != 0:
+                # worker yang keluar normal sudah mengurangi alive sendiri dan tidak sedang sibuk
+                before = self.state.release(worker)
+                self._spawn()
+                logging.warning(f"Autoscale respawn: {before} -> {before + 1} workers "
+                                f"(worker {p.pid} exited with code {p.exitcode})")
+
+    def run(self):
+        for _ in range(self.min_workers):
+            self._spawn()
+        logging.info(f"Autoscaling worker processes between {self.min_workers} and {self.max_workers}")
+        saturated_since = None
+        try:
+            while True:
+                time.sleep(min(self.interval, self.scale_wait))
+                self._reap()
+                alive = len(self.processes)
+                backlog = select.select([self.server_socket], [], [], 0)[0]
+                if not backlog or self.state.busy.value < alive or alive >= self.max_workers:
+                    saturated_since = None
+                    continue
+                now = time.monotonic()
+                if saturated_since is None:
+                    saturated_since = now
+                elif now - saturated_since >= self.scale_wait:
+                    self._spawn()
+                    logging.info(f"Autoscale up: {alive} -> {alive + 1} workers "
+                                 f"(all {alive} busy with connections waiting for {now - saturated_since:.2f}s)")
+                    saturated_since = None
+        finally:
+            for p in self.processes:
+                p.terminate()
+            for p in self.processes:
+                p.join()
+
+
+def add_autoscale_args(parser):
+    parser.add_argument('--max_workers', type=int, default=0,
+                        help='Enable autoscaling between --workers and this many workers, 0 keeps a fixed pool (default: 0)')
+    parser.add_argument('--scale_wait', type=float, default=SCALE_WAIT,
+                        help=f'Seconds requests may wait (or all workers stay busy) before adding workers (default: {SCALE_WAIT})')
+    parser.add_argument('--scale_idle', type=float, default=SCALE_IDLE,
+                        help=f'Seconds a worker may stay idle before it is removed (default: {SCALE_IDLE})')
+    parser.add_argument('--scale_interval', type=float, default=SCALE_INTERVAL,
+                        help=f'Seconds between autoscaling checks (default: {SCALE_INTERVAL})')
+
+
+def options_from_args(args):
+    """(max_workers, scale_wait, scale_idle, scale_interval), atau None untuk pool tetap."""
+    if args.max_workers <= args.workers:
+        return None
+    return (args.max_workers, args.scale_wait, args.scale_idle, args.scale_interval)
@@ -0,0 +1,209 @@
+"""
+Pembatasan bandwidth untuk server ETS (--bw_global / --bw_client).
+
+Setiap alamat IP klien punya satu TokenBucket yang dipakai bersama oleh
+semua koneksinya, jadi klien yang membuka banyak koneksi tidak mendapat
+bandwidth lebih besar. Dengan --bw_global, batas global dibagi ke klien yang
+sedang aktif sesuai bobotnya (--bw_weight IP=W, default 1):
+
+    rate klien = bw_global * bobot / total bobot klien aktif
+
+dibatasi lagi oleh --bw_client jika diisi. Pembagian dihitung ulang setiap
+ada klien yang mulai atau selesai, sehingga jumlah rate semua klien aktif
+selalu sama dengan batas global dan tidak ada klien yang bisa memonopoli
+worker. Tanpa --bw_global, setiap klien dibatasi --bw_client saja.
+
+ThrottledConnection membungkus socket di handle_client, jadi recv upload,
+sendall GET, dan sendfile semuanya melewati bucket per potongan QUANTUM byte.
+Di processing_pool.py batas global dibagi rata ke setiap worker process. Dengan
+autoscaling pembaginya adalah jumlah worker yang sedang hidup (ScaleState.alive),
+dibaca ulang setiap ada koneksi baru, sehingga saat pool masih di jumlah minimum
+setiap worker mendapat bagian yang lebih besar.
+"""
+
+import os
+import time
+import logging
+import threading
+
+QUANTUM = 64 * 1024
+BURST_SECONDS = 0.05
+
+
+class TokenBucket:
+    """Token bucket dengan utang: consume mengambil token lalu menunggu sampai saldonya tidak negatif."""
+
+    def __init__(self, rate, burst=None):
+        self.lock = threading.Lock()
+        self.rate = float(rate)
+        self.burst = burst or max(QUANTUM, self.rate * BURST_SECONDS)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+
+    def set_rate(self, rate, burst=None):
+        with self.lock:
+            self._refill()
+            self.rate = float(rate)
+            self.burst = burst or max(QUANTUM, self.rate * BURST_SECONDS)
+            self.tokens = min(self.tokens, self.burst)
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def consume(self, n):
+        with self.lock:
+            self._refill()
+            self.tokens -= n
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
+
+
+class _Client:
+    __slots__ = ('bucket', 'weight', 'flows')
+
+    def __init__(self, weight):
+        self.bucket = None
+        self.weight = weight
+        self.flows = 0
+
+
+class BandwidthLimiter:
+    def __init__(self, global_rate=0, client_rate=0, weights=None, share=1):
+        self.total_rate = global_rate
+        # share: jumlah proses yang memakai batas global, angka tetap atau multiprocessing.Value
+        self.share = share
+        self.current_share = self._read_share()
+        self.global_rate = global_rate / self.current_share
+        self.client_rate = client_rate
+        self.weights = weights or {}
+        self.lock = threading.Lock()
+        self.clients = {}
+
+    def _read_share(self):
+        return max(1, getattr(self.share, 'value', self.share))
+
+    def _rebalance(self):
+        self.current_share = self._read_share()
+        self.global_rate = self.total_rate / self.current_share
+        total = sum(c.weight for c in self.clients.values())
+        for ip, client in self.clients.items():
+            rate = self.global_rate * client.weight / total if self.global_rate else self.client_rate
+            if self.client_rate:
+                rate = min(rate, self.client_rate)
+            if client.bucket is None:
+                client.bucket = TokenBucket(rate)
+            elif client.bucket.rate != rate:
+                client.bucket.set_rate(rate)
+        logging.debug("Bandwidth shares: " + ", ".join(
+            f"{ip}={c.bucket.rate / 1024:.0f}KB/s" for ip, c in self.clients.items()))
+
+    def open(self, ip):
+        with self.lock:
+            client = self.clients.get(ip)
+            if client is None:
+                client = self.clients[ip] = _Client(self.weights.get(ip, 1.0))
+            client.flows += 1
+            if client.flows == 1 or (self.total_rate and self._read_share() != self.current_share):
+                self._rebalance()
+            return client.bucket
+
+    def close(self, ip):
+        with self.lock:
+            client = self.clients[ip]
+            client.flows -= 1
+            if not client.flows:
+                del self.clients[ip]
+                if self.clients:
+                    self._rebalance()
+
+    def connection(self, conn, addr):
+        return ThrottledConnection(conn, self, addr[0])
+
+
+class ThrottledConnection:
+    """Pembungkus socket klien yang menahan recv/sendall/sendfile sesuai bucket IP klien."""
+
+    def __init__(self, conn, limiter, ip):
+        self.conn = conn
+        self.limiter = limiter
+        self.ip = ip
+        self.bucket = limiter.open(ip)
+
+    def recv(self, bufsize, *args):
+        data = self.conn.recv(min(bufsize, QUANTUM), *args)
+        if data:
+            self.bucket.consume(len(data))
+        return data
+
+    def sendall(self, data, *args):
+        view = memoryview(data).cast('B')
+        for start in range(0, len(view), QUANTUM):
+            chunk = view[start:start + QUANTUM]
+            self.bucket.consume(len(chunk))
+            self.conn.sendall(chunk, *args)
+
+    def sendfile(self, file, offset=0, count=None):
+        if count is None:
+            count = os.fstat(file.fileno()).st_size - offset
+        total = 0
+        while total < count:
+            n = min(QUANTUM, count - total)
+            self.bucket.consume(n)
+            sent = self.conn.sendfile(file, offset + total, n)
+            if not sent:
+                break
+            total += sent
+        return total
+
+    def close(self):
+        if self.limiter is not None:
+            self.limiter.close(self.ip)
+            self.limiter = None
+        self.conn.close()
+
+    def __getattr__(self, name):
+        return getattr(self.conn, name)
+
+
+def parse_weights(values):
+    """Ubah daftar 'IP=W' dari --bw_weight menjadi {ip: bobot}."""
+    weights = {}
+    for value in values or []:
+        ip, _, weight = value.partition('=')
+        try:
+            weights[ip] = float(weight)
+        except ValueError:
+            raise ValueError(f"Invalid --bw_weight value: {value}")
+        if not ip or weights[ip] <= 0:
+            raise ValueError(f"Invalid --bw_weight value: {value}")
+    return weights
+
+
+def add_bandwidth_args(parser):
+    parser.add_argument('--bw_global', type=int, default=0,
+                        help='Total bytes per second shared by all clients, 0 is unlimited (default: 0)')
+    parser.add_argument('--bw_client', type=int, default=0,
+                        help='Bytes per second per client IP, 0 is unlimited (default: 0)')
+    parser.add_argument('--bw_weight', action='append', metavar='IP=W',
+                        help='Weight of a client IP in the --bw_global share, can be repeated (default weight: 1)')
+
+
+def options_from_args(args):
+    """(global_rate, client_rate, weights) dari argumen CLI, atau None tanpa batas."""
+    if not args.bw_global and not args.bw_client:
+        return None
+    return (args.bw_global, args.bw_client, parse_weights(args.bw_weight))
+
+
+def create_limiter(options, share=1):
+    """
+    BandwidthLimiter untuk satu proses; share membagi batas global: jumlah
+    worker process, atau Value jumlah worker yang hidup saat autoscaling.
+    """
+    if not options:
+        return None
+    global_rate, client_rate, weights = options
+    return BandwidthLimiter(global_rate, client_rate, weights, share)
@@ -0,0 +1,116 @@
+"""
+Kompresi on-the-fly untuk stream GET/UPLOAD di server ETS.
+
+Klien meminta kompresi dengan opsi header compress=<nama>[:<level>], misal
+compress=zlib atau compress=lzma:3. Stream terkompresi mengakhiri dirinya sendiri
+(decompressor tahu kapan stream selesai lewat atribut eof), sehingga ukuran di
+header tetap ukuran data asli dan trailer CHECKSUM bisa langsung menyusul.
+
+Decompressor mengembalikan paling banyak max_length byte per panggilan (default
+MAX_OUTPUT), sehingga potongan kecil yang mengembang sangat besar tidak dibuka
+sekaligus ke memori. Selama pending bernilai True, sisa output diambil dengan
+decompress(b"") sebelum menerima data baru.
+
+Setiap compressor/decompressor mencatat jumlah byte asli (raw_bytes), byte di
+jaringan (wire_bytes) dan waktu CPU yang dipakai (seconds).
+"""
+
+import time
+import zlib
+import lzma
+
+COMPRESSIONS = ('zlib', 'lzma')
+DEFAULT_LEVELS = {'zlib': 1, 'lzma': 1}
+LEVELS = {'zlib': range(-1, 10), 'lzma': range(0, 10)}
+MAX_OUTPUT = 1024 * 1024
+
+
+def parse_compression(value):
+    """'zlib' atau 'lzma:3' -> (nama, level)"""
+    name, _, level = value.partition(':')
+    if name not in COMPRESSIONS:
+        raise ValueError(f"Unsupported compression: {name}")
+    if not level:
+        return name, DEFAULT_LEVELS[name]
+    level = int(level)
+    if level not in LEVELS[name]:
+        raise ValueError(f"Invalid {name} level {level}, use {LEVELS[name].start}..{LEVELS[name].stop - 1}")
+    return name, level
+
+
+class TimedCompressor:
+    def __init__(self, name, level=None):
+        self.name = name
+        self.level = DEFAULT_LEVELS[name] if level is None else level
+        if name == 'zlib':
+            self.obj = zlib.compressobj(self.level)
+        else:
+            self.obj = lzma.LZMACompressor(preset=self.level)
+        self.seconds = 0.0
+        self.raw_bytes = 0
+        self.wire_bytes = 0
+
+    def compress(self, data):
+        start = time.perf_counter()
+        out = self.obj.compress(data)
+        self.seconds += time.perf_counter() - start
+        self.raw_bytes += len(data)
+        self.wire_bytes += len(out)
+        return out
+
+    def flush(self):
+        start = time.perf_counter()
+        out = self.obj.flush()
+        self.seconds += time.perf_counter() - start
+        self.wire_bytes += len(out)
+        return out
+
+    @property
+    def ratio(self):
+        return self.raw_bytes / self.wire_bytes if self.wire_bytes else 0.0
+
+
+class TimedDecompressor:
+    def __init__(self, name, max_length=MAX_OUTPUT):
+        self.name = name
+        self.max_length = max_length
+        if name == 'zlib':
+            self.obj = zlib.decompressobj()
+        else:
+            self.obj = lzma.LZMADecompressor()
+        self.seconds = 0.0
+        self.raw_bytes = 0
+        self.fed_bytes = 0
+        self.pending = False
+
+    def decompress(self, data):
+        start = time.perf_counter()
+        self.fed_bytes += len(data)
+        if self.name == 'zlib':
+            # input yang belum diproses karena batas max_length disimpan zlib di unconsumed_tail
+            out = self.obj.decompress(self.obj.unconsumed_tail + data, self.max_length)
+            more = bool(self.obj.unconsumed_tail) or len(out) == self.max_length
+        else:
+            out = self.obj.decompress(data, self.max_length)
+            more = not self.obj.needs_input
+        self.pending = more and not self.obj.eof
+        self.seconds += time.perf_counter() - start
+        self.raw_bytes += len(out)
+        return out
+
+    @property
+    def wire_bytes(self):
+        unconsumed = self.obj.unconsumed_tail if self.name == 'zlib' else b""
+        return self.fed_bytes - len(self.obj.unused_data) - len(unconsumed)
+
+    @property
+    def eof(self):
+        return self.obj.eof
+
+    @property
+    def unused_data(self):
+        return self.obj.unused_data
+
+    @property
+    def ratio(self):
+        return self.raw_bytes / self.wire_bytes if self.wire_bytes else 0.0
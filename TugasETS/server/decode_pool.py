@@ -0,0 +1,108 @@
+"""
+Decode base64 paralel untuk upload besar di processing_pool.py (--decode_workers).
+
+Base64 bisa di-decode per blok yang panjangnya kelipatan 4 tanpa saling
+bergantung, jadi payload upload dipotong menjadi blok besar (--decode_block)
+dan setiap blok dikirim ke pool proses decode. Hasilnya diambil kembali
+sesuai urutan pengiriman, lalu diteruskan ke checksum dan writer storage
+seperti decode biasa: offset setiap blok di file sama dengan offset-nya di
+stream, sehingga verifikasi checksum, hash dedup, dan write-behind tetap
+melihat data yang urut. Blok tidak ditulis dengan pwrite per offset begitu
+selesai di-decode: checksum dan sha256 dedup harus dihitung berurutan, dan
+write-behind sudah menggabungkan blok menjadi write besar yang sejajar, jadi
+yang diparalelkan hanya decode-nya.
+
+Paling banyak `window` blok dalam proses sekaligus per upload, sehingga memori
+per koneksi dibatasi window x decode_block. Upload yang lebih kecil dari
+min_size tetap di-decode langsung di worker karena biaya IPC lebih besar
+daripada decode-nya.
+
+Pool dibuat per worker process dengan start method forkserver (worker sudah
+punya thread untuk logging dan metrik, fork langsung dari sana tidak aman).
+"""
+
+import base64
+import logging
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+DECODE_BLOCK = 1024 * 1024
+MIN_SIZE = 4 * 1024 * 1024
+
+
+def _decode(block):
+    return base64.b64decode(block)
+
+
+class ParallelDecoder:
+    """Mengumpulkan payload base64 per blok, decode di pool, kembalikan hasil sesuai urutan."""
+
+    def __init__(self, executor, workers, block_size=DECODE_BLOCK, window=None):
+        self.executor = executor
+        self.block_size = max(4, block_size // 4 * 4)
+        self.window = window or 2 * workers
+        self.buffer = bytearray()
+        self.pending = deque()
+
+    def feed(self, data):
+        """Tambahkan payload, kembalikan list hasil decode yang sudah siap (urut)."""
+        self.buffer += data
+        ready = []
+        while len(self.buffer) >= self.block_size:
+            block = bytes(self.buffer[:self.block_size])
+            del self.buffer[:self.block_size]
+            if len(self.pending) >= self.window:
+                ready.append(self.pending.popleft().result())
+            self.pending.append(self.executor.submit(_decode, block))
+        while self.pending and self.pending[0].done():
+            ready.append(self.pending.popleft().result())
+        return ready
+
+    def finish(self):
+        """Decode sisa buffer dan tunggu semua blok yang masih diproses."""
+        if self.buffer:
+            self.pending.append(self.executor.submit(_decode, bytes(self.buffer)))
+            self.buffer = bytearray()
+        ready = []
+        while self.pending:
+            ready.append(self.pending.popleft().result())
+        return ready
+
+    def cancel(self):
+        for future in self.pending:
+            future.cancel()
+        self.pending.clear()
+        self.buffer = bytearray()
+
+
+class DecodePool:
+    def __init__(self, workers, block_size=DECODE_BLOCK, min_size=MIN_SIZE):
+        self.workers = workers
+        self.block_size = block_size
+        self.min_size = min_size
+        self.executor = None
+
+    def decoder(self, expected_size):
+        """ParallelDecoder untuk satu upload, atau None jika upload terlalu kecil."""
+        if expected_size < self.min_size:
+            return None
+        if self.executor is None:
+            ctx = multiprocessing.get_context('forkserver')
+            ctx.set_forkserver_preload(['base64', 'decode_pool'])
+            self.executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=ctx)
+            logging.info(f"Started decode pool with {self.workers} processes")
+        return ParallelDecoder(self.executor, self.workers, self.block_size)
+
+
+def add_decode_args(parser):
+    parser.add_argument('--decode_workers', type=int, default=0,
+                        help='Decode processes per worker for large uploads, 0 decodes inline (default: 0)')
+    parser.add_argument('--decode_block', type=int, default=DECODE_BLOCK,
+                        help=f'Base64 bytes per parallel decode block, multiple of 4 (default: {DECODE_BLOCK})')
+    parser.add_argument('--decode_min_size', type=int, default=MIN_SIZE,
+                        help=f'Smallest upload (base64 bytes) decoded in parallel (default: {MIN_SIZE})')
+
+
+def create_decode_pool(workers, block_size=DECODE_BLOCK, min_size=MIN_SIZE):
+    return DecodePool(workers, block_size, min_size) if workers > 0 else None
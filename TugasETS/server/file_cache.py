@@ -0,0 +1,152 @@
+"""
+Cache mmap untuk GET file besar di server ETS (--get_mode mmap).
+
+Setiap file besar (>= min_size) di-mmap sekali per proses dan dipakai bersama
+oleh semua GET yang sedang berjalan: potongan memoryview dari mapping langsung
+diberikan ke sendall, tanpa open/read/copy per request.
+
+* acquire/release menghitung referensi, mapping hanya ditutup saat tidak ada
+  GET yang memakainya
+* mapping tanpa referensi ditutup setelah idle_timeout detik oleh thread
+  sweeper yang dijalankan saat acquire pertama (jadi di mode process thread
+  itu hidup di worker, bukan di proses utama)
+* identitas file (inode, ukuran, mtime) dicek setiap acquire; storage selalu
+  mempublikasikan upload dengan rename/link atomik, jadi file yang diganti
+  mendapat inode baru dan mapping lama ditandai stale lalu ditutup setelah
+  GET terakhir yang memakainya selesai
+
+Di mode process setiap worker punya cache sendiri; page cache kernel tetap
+dipakai bersama antar proses.
+"""
+
+import os
+import mmap
+import time
+import logging
+import threading
+
+GET_MODES = ('read', 'mmap', 'sendfile')
+MIN_SIZE = 1024 * 1024
+IDLE_TIMEOUT = 30.0
+SWEEP_INTERVAL = 1.0
+
+
+def _identity(st):
+    return (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+class MappedFile:
+    __slots__ = ('path', 'identity', 'size', 'mm', 'view', 'refs', 'last_used', 'stale')
+
+    def __init__(self, path, identity, mm):
+        self.path = path
+        self.identity = identity
+        self.size = identity[2]
+        self.mm = mm
+        self.view = memoryview(mm)
+        self.refs = 0
+        self.last_used = time.monotonic()
+        self.stale = False
+
+    def chunks(self, block):
+        for offset in range(0, self.size, block):
+            yield self.view[offset:offset + block]
+
+    def close(self):
+        try:
+            self.view.release()
+            self.mm.close()
+            return True
+        except BufferError:
+            # masih ada potongan memoryview yang hidup, coba lagi di sweep berikutnya
+            return False
+
+
+class MmapCache:
+    def __init__(self, min_size=MIN_SIZE, idle_timeout=IDLE_TIMEOUT):
+        self.min_size = min_size
+        self.idle_timeout = idle_timeout
+        self.lock = threading.Lock()
+        self.entries = {}
+        self.retired = []
+        self.sweeper = None
+
+    def acquire(self, path):
+        """MappedFile untuk path (refcount +1), atau None jika file terlalu kecil untuk di-mmap."""
+        st = os.stat(path)
+        if st.st_size < max(self.min_size, 1):
+            return None
+        with self.lock:
+            if self.sweeper is None:
+                self.sweeper = threading.Thread(target=self._sweep_loop, name='MmapSweeper', daemon=True)
+                self.sweeper.start()
+            entry = self.entries.get(path)
+            if entry is not None and entry.identity == _identity(st):
+                entry.refs += 1
+                return entry
+
+        with open(path, 'rb') as f:
+            # identitas diambil dari fd, jadi tetap benar walau path diganti setelah stat di atas
+            identity = _identity(os.fstat(f.fileno()))
+            if identity[2] < max(self.min_size, 1):
+                return None
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if hasattr(mm, 'madvise'):
+            mm.madvise(mmap.MADV_SEQUENTIAL)
+
+        with self.lock:
+            current = self.entries.get(path)
+            if current is not None and current.identity == identity:
+                # thread lain sudah memetakan versi yang sama lebih dulu
+                mm.close()
+                current.refs += 1
+                return current
+            entry = MappedFile(path, identity, mm)
+            entry.refs = 1
+            if current is not None:
+                logging.info(f"mmap cache: {os.path.basename(path)} replaced, remapping")
+                self._retire(current)
+            self.entries[path] = entry
+        return entry
+
+    def release(self, entry):
+        with self.lock:
+            entry.refs -= 1
+            entry.last_used = time.monotonic()
+            if entry.stale and entry.refs == 0 and entry.close():
+                self.retired.remove(entry)
+
+    def _retire(self, entry):
+        entry.stale = True
+        if entry.refs == 0 and entry.close():
+            return
+        self.retired.append(entry)
+
+    def _sweep_loop(self):
+        while True:
+            time.sleep(SWEEP_INTERVAL)
+            with self.lock:
+                self.sweep()
+
+    def sweep(self):
+        """Tutup mapping yang idle; dipanggil dengan self.lock dipegang."""
+        now = time.monotonic()
+        for path, entry in list(self.entries.items()):
+            if entry.refs == 0 and now - entry.last_used >= self.idle_timeout:
+                del self.entries[path]
+                logging.debug(f"mmap cache: unmapped idle {os.path.basename(path)}")
+                self._retire(entry)
+        self.retired = [e for e in self.retired if not (e.refs == 0 and e.close())]
+
+
+def add_get_mode_args(parser):
+    parser.add_argument('--get_mode', choices=GET_MODES, default='read',
+                        help='How GET sends file data: read loop, shared mmap slices, or os.sendfile (default: read)')
+    parser.add_argument('--mmap_min_size', type=int, default=MIN_SIZE,
+                        help=f'Smallest file served from mmap, smaller files use the read loop (default: {MIN_SIZE})')
+    parser.add_argument('--mmap_idle', type=float, default=IDLE_TIMEOUT,
+                        help=f'Seconds an unused mapping stays open before it is unmapped (default: {IDLE_TIMEOUT:g})')
+
+
+def create_file_cache(get_mode, min_size=MIN_SIZE, idle_timeout=IDLE_TIMEOUT):
+    return MmapCache(min_size, idle_timeout) if get_mode == 'mmap' else None
@@ -0,0 +1,74 @@
+"""
+Checksum end-to-end untuk transfer ETS.
+
+Checksum dihitung incremental selama streaming (update per chunk) dan waktu
+yang dihabiskan untuk hashing dicatat di atribut seconds, sehingga overhead
+verifikasi terhadap throughput bisa diukur.
+
+* sha256, md5, blake2b : hash kriptografis dari hashlib
+* crc32, adler32       : checksum non-kriptografis yang jauh lebih cepat (zlib)
+"""
+
+import time
+import zlib
+import hashlib
+
+CHECKSUMS = ('sha256', 'md5', 'blake2b', 'crc32', 'adler32')
+
+
+class _ZlibChecksum:
+    def __init__(self, func):
+        self.func = func
+        self.value = func(b'')
+
+    def update(self, data):
+        self.value = self.func(data, self.value)
+
+    def hexdigest(self):
+        return f"{self.value:08x}"
+
+
+class TimedChecksum:
+    def __init__(self, name):
+        if name not in CHECKSUMS:
+            raise ValueError(f"Unsupported checksum: {name}")
+        self.name = name
+        if name == 'crc32':
+            self.hasher = _ZlibChecksum(zlib.crc32)
+        elif name == 'adler32':
+            self.hasher = _ZlibChecksum(zlib.adler32)
+        else:
+            self.hasher = hashlib.new(name)
+        self.seconds = 0.0
+        self.nbytes = 0
+
+    def update(self, data):
+        start = time.perf_counter()
+        self.hasher.update(data)
+        self.seconds += time.perf_counter() - start
+        self.nbytes += len(data)
+
+    def hexdigest(self):
+        return self.hasher.hexdigest()
+
+
+def parse_options(tokens):
+    """Ambil opsi berbentuk key=value dari token header, misal checksum=sha256"""
+    options = {}
+    for token in tokens:
+        if '=' in token:
+            key, value = token.split('=', 1)
+            options[key.lower()] = value
+    return options
+
+
+def trailer(checksum):
+    return f"CHECKSUM {checksum.name} {checksum.hexdigest()}\r\n\r\n".encode('utf-8')
+
+
+def parse_trailer(data):
+    """Kembalikan (nama, hexdigest) dari trailer 'CHECKSUM <nama> <hex>'"""
+    parts = data.decode('utf-8').strip().split()
+    if len(parts) != 3 or parts[0].upper() != 'CHECKSUM':
+        raise ValueError(f"Invalid checksum trailer: {data[:64]!r}")
+    return parts[1], parts[2].lower()
@@ -0,0 +1,365 @@
+"""
+Analisis log server ETS (server_thread.log / server_process.log) secara streaming.
+
+Log dibaca baris per baris dan memori yang dipakai hanya sebanding dengan jumlah
+koneksi yang sedang terbuka, bukan panjang log. Dari event per alamat klien:
+
+* "Accepted connection from X"            (thread_pool, --log_level DEBUG)
+* "Connection from X assigned to thread"  / "Worker N accepted connection from X"
+* "OK: Stream-decoded and saved ... from X", WARNING/ERROR "... from X"
+* "Closed connection from X"
+* "STATS request from X" (koneksi STATS tidak ikut dihitung)
+
+direkonstruksi per koneksi:
+* waktu tunggu antrean  = assigned - accepted (hanya jika baris Accepted ada)
+* waktu layanan         = closed - assigned (tanpa baris Closed: event terakhir)
+* sukses/gagal          = gagal jika ada WARNING/ERROR untuk koneksi itu
+
+Log dipecah menjadi run: run baru dimulai saat server start atau setelah tidak
+ada aktivitas selama --gap detik. Setiap run dilaporkan dengan percentile waktu
+layanan/antrean, utilisasi per worker, dan sukses/gagal per worker. Timeline
+throughput per --bucket detik bisa ditulis ke CSV (termasuk jumlah worker dari
+baris "Autoscale ...", lihat autoscale.py), dan kolom server pada laporan
+CSV klien bisa diisi otomatis (baris ke-i laporan = run ke-i).
+"""
+
+import re
+import os
+import csv
+import sys
+import json
+import argparse
+from datetime import datetime
+
+from metrics import Histogram
+
+LINE_RE = re.compile(r'^(\d{4}-\d\d-\d\d \d\d:\d\d:\d\d,\d{3}) - (\w+) - (\S+) - (.*)$')
+ADDR_RE = re.compile(r"from (\('[^']*', \d+\))")
+WORKERS_RE = re.compile(r'^Autoscale \w+: \d+ -> (\d+) workers| with (\d+) workers')
+SERVER_COLUMN = "Jumlah worker server yang sukses dan gagal"
+
+
+def parse_time(text):
+    return datetime.strptime(text, '%Y-%m-%d %H:%M:%S,%f').timestamp()
+
+
+class Connection:
+    __slots__ = ('addr', 'worker', 'accepted', 'start', 'last', 'failed', 'done', 'run', 'ignored')
+
+    def __init__(self, addr, worker, start, run, accepted=None):
+        self.addr = addr
+        self.worker = worker
+        self.accepted = accepted
+        self.start = start
+        self.last = start
+        self.failed = False
+        self.done = False
+        self.run = run
+        self.ignored = False
+
+
+class Run:
+    def __init__(self, index, target=None):
+        self.index = index
+        self.start = None
+        self.end = None
+        self.target = target
+        self.assigned = 0
+        self.service = Histogram()
+        self.queueing = Histogram()
+        self.workers = {}
+        self.success = 0
+        self.failed = 0
+
+    @property
+    def full(self):
+        return self.target is not None and self.assigned >= self.target
+
+    @property
+    def complete(self):
+        return self.full and self.service.count >= self.assigned
+
+    def add(self, conn, end):
+        service = max(0.0, end - conn.start)
+        self.start = conn.start if self.start is None else min(self.start, conn.start)
+        self.end = end if self.end is None else max(self.end, end)
+        self.service.record(service)
+        if conn.accepted is not None:
+            self.queueing.record(max(0.0, conn.start - conn.accepted))
+        stats = self.workers.setdefault(conn.worker, {'success': 0, 'failed': 0, 'busy': 0.0})
+        stats['busy'] += service
+        if conn.failed:
+            stats['failed'] += 1
+            self.failed += 1
+        else:
+            stats['success'] += 1
+            self.success += 1
+
+    def summary(self):
+        duration = max(self.end - self.start, 1e-9)
+        return {
+            "run": self.index,
+            "start": datetime.fromtimestamp(self.start).isoformat(timespec='milliseconds'),
+            "duration": round(duration, 3),
+            "connections": self.service.count,
+            "success": self.success,
+            "failed": self.failed,
+            "connections_per_sec": round(self.service.count / duration, 3),
+            "service_time": self.service.summary(),
+            "queueing_delay": self.queueing.summary() if self.queueing.count else None,
+            "workers": {name: {'success': s['success'], 'failed': s['failed'],
+                               'busy': round(s['busy'], 3),
+                               'utilization': round(s['busy'] / duration, 3)}
+                        for name, s in sorted(self.workers.items())},
+        }
+
+
+class Timeline:
+    """Menulis jumlah koneksi selesai per bucket waktu ke CSV, satu bucket di memori."""
+
+    def __init__(self, path, bucket):
+        self.bucket = bucket
+        self.file = open(path, 'w', newline='')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(["time", "completed", "success", "failed", "connections_per_sec", "workers"])
+        self.current = None
+        self.counts = [0, 0]
+        # jumlah worker terakhir dari log dan nilainya saat koneksi terakhir bucket selesai
+        self.workers = ""
+        self.bucket_workers = ""
+
+    def add(self, end, failed):
+        slot = int(end // self.bucket)
+        if self.current is not None and slot != self.current:
+            self.flush()
+        self.current = slot
+        self.counts[1 if failed else 0] += 1
+        self.bucket_workers = self.workers
+
+    def flush(self):
+        if self.current is None:
+            return
+        success, failed = self.counts
+        self.writer.writerow([datetime.fromtimestamp(self.current * self.bucket).isoformat(timespec='seconds'),
+                              success + failed, success, failed, round((success + failed) / self.bucket, 3),
+                              self.bucket_workers])
+        self.counts = [0, 0]
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+
+class LogAnalyzer:
+    """
+    Tanpa plan, run dipisah oleh restart server atau jeda --gap detik. Dengan plan
+    (daftar jumlah koneksi per run, misal dari kolom jumlah client di laporan CSV),
+    run ke-i berisi tepat plan[i] koneksi berikutnya, cocok untuk stress test yang
+    dijalankan berurutan tanpa jeda.
+    """
+
+    def __init__(self, gap=2.0, timeline=None, plan=None):
+        self.gap = gap
+        self.timeline = timeline
+        self.plan = list(plan) if plan is not None else None
+        self.open = {}
+        self.by_worker = {}
+        self.accepted = {}
+        self.run = None
+        self.run_count = 0
+        self.pending = []
+        self.runs = []
+        self.last_activity = None
+
+    def _new_run(self):
+        self.run_count += 1
+        index = self.run_count
+        target = None
+        if self.plan is not None:
+            target = self.plan[index - 1] if index <= len(self.plan) else None
+        self.run = Run(index, target)
+        self.pending.append(self.run)
+
+    def _emit(self, run):
+        self.pending.remove(run)
+        if run.service.count:
+            self.runs.append(run.summary())
+
+    def _finish(self, conn, end):
+        if conn.ignored:
+            conn.run.assigned -= 1
+        else:
+            conn.run.add(conn, end)
+            if self.timeline:
+                self.timeline.add(end, conn.failed)
+        if conn.run.complete:
+            self._emit(conn.run)
+
+    def _close_run(self):
+        # koneksi yang tidak pernah ditutup di log dianggap selesai di event terakhirnya
+        for conn in list(self.open.values()):
+            self._finish(conn, conn.last)
+        self.open.clear()
+        self.by_worker.clear()
+        self.accepted.clear()
+        for run in list(self.pending):
+            self._emit(run)
+        self.run = None
+
+    def feed(self, line):
+        match = LINE_RE.match(line)
+        if not match:
+            return
+        ts, level, worker, message = match.groups()
+        t = parse_time(ts)
+
+        if self.timeline:
+            workers_match = WORKERS_RE.search(message)
+            if workers_match:
+                self.timeline.workers = int(workers_match.group(1) or workers_match.group(2))
+        if 'listening on' in message:
+            self._close_run()
+            self.last_activity = t
+            return
+        # upload besar bisa berjalan lama tanpa baris log, jadi run hanya dipisah jika
+        # semua koneksi yang masih terbuka sudah mencatat hasil akhirnya
+        if (self.plan is None and self.last_activity is not None and t - self.last_activity > self.gap
+                and all(c.done for c in self.open.values())):
+            self._close_run()
+
+        addr_match = ADDR_RE.search(message)
+        if not addr_match:
+            return
+        addr = addr_match.group(1)
+        self.last_activity = t
+
+        if message.startswith('Accepted connection from'):
+            self.accepted[addr] = t
+        elif ' assigned to thread ' in message or ' accepted connection from ' in message:
+            previous = self.by_worker.pop(worker, None)
+            if previous in self.open:
+                # worker hanya melayani satu koneksi sekaligus: koneksi lama pasti sudah selesai
+                conn = self.open.pop(previous)
+                self._finish(conn, conn.last)
+            if self.run is None or self.run.full:
+                self._new_run()
+            self.run.assigned += 1
+            self.open[addr] = Connection(addr, worker, t, self.run, self.accepted.pop(addr, None))
+            self.by_worker[worker] = addr
+        else:
+            conn = self.open.get(addr)
+            if conn is None:
+                return
+            conn.last = t
+            if message.startswith('STATS request from'):
+                conn.ignored = True
+            elif level in ('WARNING', 'ERROR'):
+                conn.failed = conn.done = True
+            elif message.startswith('OK:'):
+                conn.done = True
+            if message.startswith('Closed connection from'):
+                self._finish(self.open.pop(addr), t)
+                if self.by_worker.get(conn.worker) == addr:
+                    del self.by_worker[conn.worker]
+
+    def finish(self):
+        self._close_run()
+        if self.timeline:
+            self.timeline.close()
+        return sorted(self.runs, key=lambda r: r["run"])
+
+
+def analyze(path, gap=2.0, timeline_path=None, bucket=1.0, plan=None):
+    timeline = Timeline(timeline_path, bucket) if timeline_path else None
+    analyzer = LogAnalyzer(gap, timeline, plan)
+    with open(path, errors='replace') as f:
+        for line in f:
+            analyzer.feed(line.rstrip('\n'))
+    return analyzer.finish()
+
+
+def format_run(run):
+    s = run["service_time"]
+    lines = [
+        f"Run {run['run']} @ {run['start']}  durasi {run['duration']:.3f}s  koneksi {run['connections']} "
+        f"({run['success']} sukses, {run['failed']} gagal)  {run['connections_per_sec']:.2f} koneksi/s",
+        f"  waktu layanan  p50={s['p50']:.4f}s p90={s['p90']:.4f}s p99={s['p99']:.4f}s "
+        f"p99.9={s['p99.9']:.4f}s max={s['max']:.4f}s",
+    ]
+    q = run["queueing_delay"]
+    if q:
+        lines.append(f"  waktu antrean  p50={q['p50']:.4f}s p90={q['p90']:.4f}s p99={q['p99']:.4f}s max={q['max']:.4f}s")
+    for name, w in run["workers"].items():
+        lines.append(f"  {name:14s} {w['success']:5d} sukses {w['failed']:4d} gagal  "
+                     f"sibuk {w['busy']:.3f}s  utilisasi {w['utilization'] * 100:.1f}%")
+    return "\n".join(lines)
+
+
+def read_report(report_path):
+    with open(report_path, newline='', encoding='utf-8') as f:
+        return list(csv.reader(f))
+
+
+def report_plan(rows):
+    """Jumlah koneksi yang diharapkan per baris laporan: request terukur, atau jumlah client."""
+    header = rows[0]
+    plan = []
+    for row in rows[1:]:
+        value = ""
+        for column in ("Jumlah request terukur", "Jumlah client worker pool"):
+            if column in header and header.index(column) < len(row):
+                value = row[header.index(column)]
+                if value:
+                    break
+        plan.append(int(value) if value.isdigit() else 1)
+    return plan
+
+
+def fill_report(rows, runs, output_path):
+    """Isi kolom server di laporan CSV klien, baris ke-i diisi dari run ke-i."""
+    header = rows[0]
+    if SERVER_COLUMN not in header:
+        header.append(SERVER_COLUMN)
+    col = header.index(SERVER_COLUMN)
+    data_rows = rows[1:]
+    if len(data_rows) != len(runs):
+        print(f"Peringatan: {len(data_rows)} baris laporan tetapi {len(runs)} run di log, "
+              f"hanya {min(len(data_rows), len(runs))} baris pertama yang diisi", file=sys.stderr)
+    for row, run in zip(data_rows, runs):
+        row.extend([""] * (col + 1 - len(row)))
+        row[col] = f"{run['success']} sukses, {run['failed']} gagal ({len(run['workers'])} worker aktif)"
+
+    tmp = output_path + ".tmp"
+    with open(tmp, 'w', newline='', encoding='utf-8') as f:
+        csv.writer(f).writerows(rows)
+    os.replace(tmp, output_path)
+    return min(len(data_rows), len(runs))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analisis latency dan throughput dari log server ETS.")
+    parser.add_argument('log', help='File log server (server_thread.log / server_process.log)')
+    parser.add_argument('--gap', type=float, default=2.0, help='Jeda tanpa aktivitas (detik) yang memisahkan dua run (default: 2)')
+    parser.add_argument('--bucket', type=float, default=1.0, help='Lebar bucket timeline dalam detik (default: 1)')
+    parser.add_argument('--timeline', help='Tulis timeline throughput ke file CSV ini')
+    parser.add_argument('--json', help='Tulis ringkasan semua run ke file JSON ini')
+    parser.add_argument('--fill', help='Laporan CSV klien yang kolom servernya diisi dari run di log (run dipotong per jumlah koneksi tiap baris)')
+    parser.add_argument('--fill_output', help='Simpan laporan yang sudah diisi ke file lain (default: timpa --fill)')
+    args = parser.parse_args()
+
+    report = read_report(args.fill) if args.fill else None
+    # laporan tersedia: run dipotong sesuai jumlah koneksi per baris, bukan berdasarkan jeda
+    plan = report_plan(report) if report else None
+    runs = analyze(args.log, args.gap, args.timeline, args.bucket, plan)
+    for run in runs:
+        print(format_run(run))
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(runs, f, indent=2)
+    if args.fill:
+        filled = fill_report(report, runs, args.fill_output or args.fill)
+        print(f"{filled} baris laporan diisi dari log")
+
+
+if __name__ == '__main__':
+    main()
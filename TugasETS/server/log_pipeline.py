@@ -0,0 +1,191 @@
+"""
+Pipeline logging untuk server ETS.
+
+Mode (--log_mode):
+* async : thread request hanya memasukkan record ke antrean (QueueHandler),
+          penulisan ke file dan stdout dilakukan satu thread QueueListener
+* sync  : perilaku lama, FileHandler dan StreamHandler dipanggil langsung
+* off   : semua logging dimatikan (untuk benchmark pembanding)
+
+Sebelum masuk antrean, record bisa disaring:
+* --log_sample 0.1    : hanya 10% record INFO/DEBUG yang disimpan, WARNING ke atas selalu
+* --log_rate INFO=50  : maksimal 50 record INFO per detik, sisanya dibuang dan
+                        jumlahnya ditambahkan ke record berikutnya yang lolos
+
+Antrean dibatasi --log_queue record. Jika penuh, record dibuang (dihitung) dan
+thread request tidak pernah menunggu penulisan log. Jumlah yang dibuang
+ditambahkan ke record berikutnya yang masuk antrean, dicatat sekali lagi saat
+pipeline berhenti, dan ikut di snapshot metrik (log_dropped di STATS).
+"""
+
+import os
+import sys
+import time
+import queue
+import random
+import logging
+import threading
+from logging.handlers import QueueHandler, QueueListener
+
+LOG_MODES = ('async', 'sync', 'off')
+DEFAULT_QUEUE_SIZE = 10000
+
+
+class SamplingFilter(logging.Filter):
+    def __init__(self, rate, max_level=logging.INFO):
+        super().__init__()
+        self.rate = rate
+        self.max_level = max_level
+
+    def filter(self, record):
+        return record.levelno > self.max_level or random.random() < self.rate
+
+
+class RateLimitFilter(logging.Filter):
+    """Token bucket per level, limits = {levelno: record per detik}."""
+
+    def __init__(self, limits):
+        super().__init__()
+        self.lock = threading.Lock()
+        self.buckets = {level: [float(rate), time.monotonic()] for level, rate in limits.items()}
+        self.limits = dict(limits)
+        self.dropped = {level: 0 for level in limits}
+
+    def filter(self, record):
+        rate = self.limits.get(record.levelno)
+        if rate is None:
+            return True
+        with self.lock:
+            bucket = self.buckets[record.levelno]
+            now = time.monotonic()
+            bucket[0] = min(rate, bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+            if bucket[0] < 1:
+                self.dropped[record.levelno] += 1
+                return False
+            bucket[0] -= 1
+            dropped, self.dropped[record.levelno] = self.dropped[record.levelno], 0
+        if dropped:
+            record.msg = f"{record.getMessage()} (+{dropped} log {record.levelname} dibuang rate limit)"
+            record.args = None
+        return True
+
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler yang membuang record saat antrean penuh alih-alih memblokir atau error."""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self.unreported = 0
+
+    def enqueue(self, record):
+        # dipanggil dari Handler.handle dengan lock handler dipegang
+        if self.unreported:
+            record.msg = f"{record.msg} (+{self.unreported} log dibuang karena antrean penuh)"
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            self.unreported += 1
+        else:
+            self.unreported = 0
+
+
+class LogPipeline:
+    def __init__(self, handlers, filters, level, queue_size=DEFAULT_QUEUE_SIZE):
+        self.handlers = handlers
+        self.filters = filters
+        self.level = level
+        self.queue_size = queue_size
+        self.queue_handler = None
+        self.listener = None
+
+    def start(self):
+        root = logging.getLogger()
+        if self.queue_handler is not None:
+            root.removeHandler(self.queue_handler)
+        self.queue_handler = DroppingQueueHandler(queue.Queue(self.queue_size))
+        for f in self.filters:
+            self.queue_handler.addFilter(f)
+        root.addHandler(self.queue_handler)
+        root.setLevel(self.level)
+        self.listener = QueueListener(self.queue_handler.queue, *self.handlers, respect_handler_level=True)
+        self.listener.start()
+
+    def restart_in_child(self):
+        # thread listener tidak ikut ter-fork: worker process butuh antrean dan listener sendiri
+        self.listener = None
+        for f in self.filters:
+            if hasattr(f, 'lock'):
+                f.lock = threading.Lock()
+        self.start()
+
+    def stop(self):
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+            if self.queue_handler.dropped:
+                # listener sudah berhenti, jadi ringkasan ditulis langsung ke handler
+                record = logging.makeLogRecord({
+                    'name': 'log_pipeline', 'levelno': logging.WARNING, 'levelname': 'WARNING',
+                    'msg': f"Log pipeline dropped {self.queue_handler.dropped} records (queue full)"})
+                for handler in self.handlers:
+                    handler.handle(record)
+
+
+def dropped_records():
+    """Jumlah record yang dibuang karena antrean penuh di proses ini."""
+    return sum(h.dropped for h in logging.getLogger().handlers if isinstance(h, DroppingQueueHandler))
+
+
+def parse_rate_limits(values):
+    """['INFO=50', 'WARNING=10'] -> {logging.INFO: 50.0, logging.WARNING: 10.0}"""
+    limits = {}
+    for value in values or ():
+        name, _, rate = value.partition('=')
+        level = logging.getLevelName(name.upper())
+        if not isinstance(level, int) or not rate:
+            raise ValueError(f"Invalid --log_rate value: {value}")
+        limits[level] = float(rate)
+    return limits
+
+
+def add_logging_args(parser):
+    parser.add_argument('--log_mode', choices=LOG_MODES, default='async', help='async: log written by a background thread, sync: written inline, off: disabled (default: async)')
+    parser.add_argument('--log_level', default='INFO', help='Minimum log level (default: INFO)')
+    parser.add_argument('--log_sample', type=float, default=1.0, help='Fraction of INFO/DEBUG records kept, WARNING and above are always kept (default: 1.0)')
+    parser.add_argument('--log_rate', action='append', metavar='LEVEL=N', help='Keep at most N records per second for LEVEL, can be repeated (e.g. --log_rate INFO=50)')
+    parser.add_argument('--log_queue', type=int, default=DEFAULT_QUEUE_SIZE, help=f'Max queued records in async mode before dropping (default: {DEFAULT_QUEUE_SIZE})')
+
+
+def configure_logging(args, log_file, fmt):
+    """Pasang logging sesuai argumen CLI, kembalikan LogPipeline (mode async) atau None."""
+    if args.log_mode == 'off':
+        logging.disable(logging.CRITICAL)
+        return None
+
+    level = args.log_level.upper()
+    filters = []
+    if args.log_sample < 1.0:
+        filters.append(SamplingFilter(args.log_sample))
+    limits = parse_rate_limits(args.log_rate)
+    if limits:
+        filters.append(RateLimitFilter(limits))
+
+    formatter = logging.Formatter(fmt)
+    handlers = [logging.FileHandler(log_file), logging.StreamHandler(sys.stdout)]
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    if args.log_mode == 'sync':
+        logging.basicConfig(level=level, handlers=handlers)
+        # filter di root logger agar sampling/rate limit dihitung sekali per record, bukan per handler
+        for f in filters:
+            logging.getLogger().addFilter(f)
+        return None
+
+    pipeline = LogPipeline(handlers, filters, level, args.log_queue)
+    pipeline.start()
+    os.register_at_fork(after_in_child=pipeline.restart_in_child)
+    return pipeline
@@ -0,0 +1,345 @@
+"""
+Registry metrik in-process untuk server ETS.
+
+Yang dicatat:
+* koneksi aktif dan total koneksi
+* kedalaman antrean (koneksi yang sudah di-accept tapi belum dipegang worker,
+  hanya bermakna di mode thread; di mode process antrean ada di backlog kernel)
+* byte masuk/keluar lewat socket klien
+* histogram latency per command (UPLOAD, GET) beserta jumlah sukses/gagal
+* jumlah sukses/gagal per worker (nama thread atau pid proses)
+* histogram waktu per fase request (hanya dengan --profile, lihat profiler.py)
+* jumlah record log yang dibuang karena antrean log penuh (log_pipeline.py)
+
+Snapshot bisa diambil lewat command protokol STATS atau endpoint HTTP
+GET /stats di --stats_port. Di mode process setiap worker menulis snapshot-nya
+ke <storage>/.stats/worker-<pid>.json dan snapshot semua worker digabung saat
+dibaca.
+"""
+
+import os
+import json
+import time
+import uuid
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from log_pipeline import dropped_records
+
+FLUSH_INTERVAL = 1.0
+
+
+class Histogram:
+    """
+    Histogram log-linear ala HdrHistogram: nilai disimpan dalam mikrodetik,
+    setiap rentang pangkat dua dibagi 128 sub-bucket sehingga error relatif
+    percentile < 1% dengan memori yang tetap kecil. Dipakai juga oleh
+    loadgen.py di klien.
+    """
+    SUB_BUCKETS = 128
+
+    def __init__(self):
+        self.counts = {}
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = 0.0
+
+    def _index(self, us):
+        magnitude = max(0, us.bit_length() - 8)
+        return magnitude * self.SUB_BUCKETS + (us >> magnitude)
+
+    def _value(self, index):
+        if index < 2 * self.SUB_BUCKETS:
+            return index
+        magnitude = (index - self.SUB_BUCKETS) // self.SUB_BUCKETS
+        sub = index - magnitude * self.SUB_BUCKETS
+        return ((sub + 1) << magnitude) - 1
+
+    def record(self, seconds):
+        index = self._index(max(0, int(seconds * 1_000_000)))
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.total += seconds
+        self.min = seconds if self.min is None else min(self.min, seconds)
+        self.max = max(self.max, seconds)
+
+    def merge(self, other):
+        for index, n in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + n
+        self.count += other.count
+        self.total += other.total
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def percentile(self, p):
+        if not self.count:
+            return 0.0
+        target = max(1, int(round(p / 100.0 * self.count + 0.5 - 1e-9)))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= target:
+                return min(self._value(index) / 1_000_000, self.max)
+        return self.max
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def to_dict(self):
+        return {"counts": {str(k): v for k, v in self.counts.items()},
+                "count": self.count, "total": self.total, "min": self.min, "max": self.max}
+
+    @classmethod
+    def from_dict(cls, data):
+        hist = cls()
+        hist.counts = {int(k): v for k, v in data["counts"].items()}
+        hist.count, hist.total, hist.max = data["count"], data["total"], data["max"]
+        hist.min = data.get("min")
+        return hist
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "min": self.min or 0.0,
+            "mean": self.mean,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "p99.9": self.percentile(99.9),
+            "max": self.max,
+        }
+
+
+class Metrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.active_connections = 0
+        self.total_connections = 0
+        self.queue_depth = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.commands = {}
+        self.workers = {}
+        self.phases = {}
+
+    def queued(self):
+        with self.lock:
+            self.queue_depth += 1
+
+    def connection_opened(self, dequeued=False):
+        with self.lock:
+            if dequeued:
+                self.queue_depth -= 1
+            self.active_connections += 1
+            self.total_connections += 1
+
+    def connection_closed(self):
+        with self.lock:
+            self.active_connections -= 1
+
+    def add_bytes(self, received=0, sent=0):
+        with self.lock:
+            self.bytes_in += received
+            self.bytes_out += sent
+
+    def record(self, command, worker, seconds, ok):
+        key = 'success' if ok else 'failed'
+        with self.lock:
+            stats = self.commands.setdefault(command, {'success': 0, 'failed': 0, 'latency': Histogram()})
+            stats[key] += 1
+            stats['latency'].record(seconds)
+            counts = self.workers.setdefault(str(worker), {'success': 0, 'failed': 0})
+            counts[key] += 1
+
+    def record_phases(self, command, phases):
+        with self.lock:
+            hists = self.phases.setdefault(command, {})
+            for name, seconds in phases.items():
+                hist = hists.get(name)
+                if hist is None:
+                    hist = hists[name] = Histogram()
+                hist.record(seconds)
+
+    def snapshot(self):
+        """Snapshot mentah (histogram lengkap) yang bisa digabung dengan merge_snapshots."""
+        with self.lock:
+            return {
+                "started": self.started,
+                "active_connections": self.active_connections,
+                "total_connections": self.total_connections,
+                "queue_depth": self.queue_depth,
+                "bytes_in": self.bytes_in,
+                "bytes_out": self.bytes_out,
+                "commands": {name: {'success': s['success'], 'failed': s['failed'],
+                                    'latency': s['latency'].to_dict()}
+                             for name, s in self.commands.items()},
+                "workers": {name: dict(c) for name, c in self.workers.items()},
+                "phases": {command: {name: h.to_dict() for name, h in hists.items()}
+                           for command, hists in self.phases.items()},
+                "log_dropped": dropped_records(),
+            }
+
+
+def merge_snapshots(snapshots):
+    merged = {"started": None, "active_connections": 0, "total_connections": 0, "queue_depth": 0,
+              "bytes_in": 0, "bytes_out": 0, "commands": {}, "workers": {}, "phases": {}, "log_dropped": 0}
+    histograms = {}
+    phases = {}
+    for snap in snapshots:
+        started = snap["started"]
+        merged["started"] = started if merged["started"] is None else min(merged["started"], started)
+        for key in ("active_connections", "total_connections", "queue_depth", "bytes_in", "bytes_out"):
+            merged[key] += snap[key]
+        merged["log_dropped"] += snap.get("log_dropped", 0)
+        for name, stats in snap["commands"].items():
+            target = merged["commands"].setdefault(name, {'success': 0, 'failed': 0})
+            target['success'] += stats['success']
+            target['failed'] += stats['failed']
+            histograms.setdefault(name, Histogram()).merge(Histogram.from_dict(stats['latency']))
+        for name, counts in snap["workers"].items():
+            target = merged["workers"].setdefault(name, {'success': 0, 'failed': 0})
+            target['success'] += counts['success']
+            target['failed'] += counts['failed']
+        for command, hists in snap.get("phases", {}).items():
+            for name, data in hists.items():
+                phases.setdefault(command, {}).setdefault(name, Histogram()).merge(Histogram.from_dict(data))
+    for name, hist in histograms.items():
+        merged["commands"][name]['latency'] = hist.to_dict()
+    merged["phases"] = {command: {name: h.to_dict() for name, h in hists.items()}
+                        for command, hists in phases.items()}
+    return merged
+
+
+def render(snapshot):
+    """Bentuk snapshot untuk dikirim ke klien: histogram diringkas menjadi percentile."""
+    data = dict(snapshot)
+    data["uptime"] = time.time() - snapshot["started"] if snapshot["started"] else 0.0
+    data["success"] = sum(c['success'] for c in snapshot["workers"].values())
+    data["failed"] = sum(c['failed'] for c in snapshot["workers"].values())
+    data["commands"] = {name: {'success': s['success'], 'failed': s['failed'],
+                               'latency': Histogram.from_dict(s['latency']).summary()}
+                        for name, s in snapshot["commands"].items()}
+    data["phases"] = {command: _phase_table(hists) for command, hists in snapshot.get("phases", {}).items()}
+    return data
+
+
+def _phase_table(hists):
+    """Ringkasan per fase plus porsi waktu rata-rata tiap fase terhadap total."""
+    summaries = {name: Histogram.from_dict(data).summary() for name, data in hists.items()}
+    total = summaries.get('total', {}).get('mean', 0.0) * summaries.get('total', {}).get('count', 0)
+    for name, s in summaries.items():
+        s['share'] = round(s['mean'] * s['count'] / total, 4) if total and name != 'total' else None
+    return summaries
+
+
+class SnapshotStore:
+    """Snapshot per worker di direktori bersama, untuk mode process."""
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def reset(self):
+        os.makedirs(self.directory, exist_ok=True)
+        for name in os.listdir(self.directory):
+            os.remove(os.path.join(self.directory, name))
+
+    def write(self, metrics):
+        path = os.path.join(self.directory, f"worker-{os.getpid()}.json")
+        tmp = os.path.join(self.directory, f".{uuid.uuid4().hex}.tmp")
+        with open(tmp, 'w') as f:
+            json.dump(metrics.snapshot(), f)
+        os.replace(tmp, path)
+
+    def read_all(self):
+        snapshots = []
+        for name in os.listdir(self.directory):
+            if not name.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(self.directory, name)) as f:
+                    snap = json.load(f)
+            except (OSError, ValueError):
+                # worker sedang menulis ulang file, lewati untuk putaran ini
+                continue
+            if not self._alive(name):
+                # worker sudah pensiun/mati: counter kumulatifnya tetap dihitung,
+                # gauge terakhirnya tidak lagi berlaku
+                snap["active_connections"] = 0
+                snap["queue_depth"] = 0
+            snapshots.append(snap)
+        return merge_snapshots(snapshots)
+
+    @staticmethod
+    def _alive(name):
+        try:
+            os.kill(int(name[len("worker-"):-len(".json")]), 0)
+        except ValueError:
+            return True
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            pass
+        return True
+
+    def start_flusher(self, metrics, interval=FLUSH_INTERVAL):
+        def loop():
+            while True:
+                try:
+                    self.write(metrics)
+                except OSError as e:
+                    logging.warning(f"Failed to write metrics snapshot: {e}")
+                time.sleep(interval)
+        threading.Thread(target=loop, name='MetricsFlusher', daemon=True).start()
+
+
+class MeteredConnection:
+    """Pembungkus socket klien yang menghitung byte masuk/keluar ke registry."""
+
+    def __init__(self, conn, metrics):
+        self.conn = conn
+        self.metrics = metrics
+
+    def recv(self, bufsize, *args):
+        data = self.conn.recv(bufsize, *args)
+        self.metrics.add_bytes(received=len(data))
+        return data
+
+    def sendall(self, data, *args):
+        self.conn.sendall(data, *args)
+        self.metrics.add_bytes(sent=len(data))
+
+    def sendfile(self, file, offset=0, count=None):
+        sent = self.conn.sendfile(file, offset, count)
+        self.metrics.add_bytes(sent=sent)
+        return sent
+
+    def __getattr__(self, name):
+        return getattr(self.conn, name)
+
+
+def start_stats_http(host, port, snapshot_fn):
+    """Endpoint HTTP kecil: GET /stats mengembalikan render(snapshot_fn()) sebagai JSON."""
+    class StatsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.rstrip('/') not in ('', '/stats'):
+                self.send_error(404)
+                return
+            body = json.dumps(render(snapshot_fn())).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), StatsHandler)
+    threading.Thread(target=server.serve_forever, name='StatsHTTP', daemon=True).start()
+    logging.info(f"Stats endpoint listening on http://{host}:{port}/stats")
+    return server
@@ -3,119 +3,57 @@ import os
 import argparse
 import logging
 import sys
-import base64
-import binascii
+import time
+from storage import BACKENDS, CONFLICT_POLICIES, create_storage
+import transfer
+from transfer import MAX_HEADER_SIZE, handle_upload_streaming, handle_get, handle_stats, set_chunk_size
+from log_pipeline import add_logging_args, configure_logging
+from profiler import RequestProfile, install_dump_handler
+from write_behind import add_write_args, options_from_args
+from decode_pool import DECODE_BLOCK, MIN_SIZE as DECODE_MIN_SIZE, add_decode_args, create_decode_pool
+from file_cache import MIN_SIZE, IDLE_TIMEOUT, add_get_mode_args, create_file_cache
+from bandwidth import add_bandwidth_args, options_from_args as bandwidth_from_args, create_limiter
+from autoscale import ProcessSupervisor, accept_or_idle, add_autoscale_args, options_from_args as autoscale_from_args
+from metrics import Metrics, MeteredConnection, SnapshotStore, start_stats_http
 from concurrent.futures import ProcessPoolExecutor
 
-CHUNK_SIZE = 8192
-MAX_HEADER_SIZE = 8192
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "Tugas1"))
+from sockopts import SocketOptions, add_socket_args, options_from_args as socket_options_from_args
 
 # --- Fungsi parse_args dan setup_logging (tidak berubah) ---
 def parse_args():
     parser = argparse.ArgumentParser(description="High-performance multiprocessing file server")
     parser.add_argument('--host', default='0.0.0.0', help='Host IP to bind the server (default: 0.0.0.0)')
     parser.add_argument('--port', type=int, default=8889, help='TCP port to listen on (default: 8889)')
-    parser.add_argument('--workers', type=int, default=os.cpu_count(), help=f'Number of worker processes (default: all CPU cores, {os.cpu_count()})')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help=f'Number of worker processes, the minimum with --max_workers (default: all CPU cores, {os.cpu_count()})')
     parser.add_argument('--storage', default='files', help='Directory to store uploaded files (default: files)')
+    parser.add_argument('--backend', choices=BACKENDS, default='plain', help='Storage backend: plain copies or content-addressed dedup (default: plain)')
+    parser.add_argument('--on_conflict', choices=CONFLICT_POLICIES, default='overwrite', help='What to do when an uploaded filename already exists (default: overwrite)')
     parser.add_argument('--log', default='server_process.log', help='Log file path (default: server_process.log)')
+    add_logging_args(parser)
+    add_socket_args(parser)
+    add_get_mode_args(parser)
+    add_write_args(parser)
+    add_bandwidth_args(parser)
+    add_decode_args(parser)
+    add_autoscale_args(parser)
+    parser.add_argument('--profile', action='store_true', help='Record per-phase timings (header, recv, decode, write, send, ...) for every request')
+    parser.add_argument('--profile_dump', default='profile.json', help='File written with the phase profile on SIGUSR1 (default: profile.json)')
+    parser.add_argument('--stats_port', type=int, help='Serve metrics as JSON on http://<host>:<stats_port>/stats (default: disabled, use the STATS command)')
     return parser.parse_args()
 
-def setup_logging(log_file):
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(levelname)s - %(processName)s - %(message)s',
-        handlers=[logging.FileHandler(log_file), logging.StreamHandler(sys.stdout)]
-    )
-
-def handle_upload_streaming(conn, addr, parts, filepath, initial_payload):
-    if len(parts) < 3:
-        logging.warning(f"UPLOAD command from {addr} is missing the data size.")
-        conn.sendall(b"ERROR No size provided for UPLOAD\r\n\r\n")
-        return
-    try:
-        expected_size = int(parts[2])
-    except ValueError:
-        logging.warning(f"Invalid size format in UPLOAD from {addr}: {parts[2]}")
-        conn.sendall(b"ERROR Invalid size format\r\n\r\n")
-        return
-
-    conn.sendall(b"OK Ready to receive\r\n\r\n")
-    
-    bytes_received = len(initial_payload)
-    # Buffer untuk menampung sisa data yang belum kelipatan 4
-    decode_buffer = initial_payload 
-    
-    try:
-        with open(filepath, 'wb') as f:
-            # menerima dan langsung memproses data
-            while bytes_received < expected_size:
-                # 1. Pastikan buffer bisa di-decode (panjangnya kelipatan 4)
-                len_to_decode = (len(decode_buffer) // 4) * 4
-                
-                if len_to_decode > 0:
-                    # Ambil bagian yang akan di-decode
-                    chunk_to_decode = decode_buffer[:len_to_decode]
-                    
-                    # Simpan sisa datanya di buffer untuk digabung dengan data berikutnya
-                    decode_buffer = decode_buffer[len_to_decode:]
-                    
-                    # 2. Decode dan langsung tulis ke disk
-                    try:
-                        decoded_data = base64.b64decode(chunk_to_decode)
-                        f.write(decoded_data)
-                    except binascii.Error as e:
-                        logging.error(f"Streaming Base64 decode error from {addr}: {e}")
-                        conn.sendall(b"ERROR Invalid Base64 data stream\r\n\r\n")
-                        # Hapus file parsial jika terjadi error
-                        f.close()
-                        os.remove(filepath)
-                        return
-
-                # 3. Terima data berikutnya dari klien
-                chunk = conn.recv(CHUNK_SIZE)
-                if not chunk:
-                    logging.warning(f"Connection lost during UPLOAD of {os.path.basename(filepath)} from {addr}.")
-                    return
-                decode_buffer += chunk
-                bytes_received += len(chunk)
-
-            # proses sisa data terakhir di buffer
-            if decode_buffer:
-                try:
-                    decoded_data = base64.b64decode(decode_buffer)
-                    f.write(decoded_data)
-                except binascii.Error as e:
-                    logging.error(f"Final Base64 decode error from {addr}: {e}")
-                    f.close()
-                    os.remove(filepath)
-                    return
-            
-        logging.info(f"OK: Stream-decoded and saved {os.path.basename(filepath)} from {addr}")
-        conn.sendall(b"OK Upload complete\r\n\r\n")
-
-    except IOError as e:
-        logging.error(f"File write error during streaming upload from {addr}: {e}")
-        conn.sendall(b"ERROR Server file error\r\n\r\n")
-    except Exception as e:
-        logging.error(f"Unhandled exception during streaming upload: {e}", exc_info=True)
-
-def handle_get(conn, addr, filepath):
-    if not os.path.exists(filepath):
-        conn.sendall(b"ERROR File not found\r\n\r\n")
-        return
-    try:
-        file_size = os.path.getsize(filepath)
-        conn.sendall(f"OK {file_size}\r\n\r\n".encode('utf-8'))
-        with open(filepath, 'rb') as f:
-            while True:
-                chunk = f.read(65536)
-                if not chunk: break
-                conn.sendall(chunk)
-    except Exception as e:
-        logging.error(f"Error sending file {os.path.basename(filepath)} to {addr}: {e}")
-
-
-def handle_client(conn, addr, storage_dir):
+def setup_logging(args):
+    return configure_logging(args, args.log, '%(asctime)s - %(levelname)s - %(processName)s - %(message)s')
+
+def handle_client(conn, addr, storage, metrics, snapshot_fn, profiling=False, get_mode='read', file_cache=None,
+                  decode_pool=None, limiter=None):
+    metrics.connection_opened()
+    conn = MeteredConnection(conn, metrics)
+    if limiter:
+        conn = limiter.connection(conn, addr)
+    start = time.perf_counter()
+    command, ok = None, False
+    profile = RequestProfile() if profiling else None
     try:
         header_data = b""
         while b"\r\n\r\n" not in header_data:
@@ -123,16 +61,24 @@ def handle_client(conn, addr, storage_dir):
                 logging.error(f"Header from {addr} exceeds max size.")
                 conn.sendall(b"ERROR Header too large\r\n\r\n")
                 return
-            chunk = conn.recv(CHUNK_SIZE)
+            chunk = conn.recv(transfer.CHUNK_SIZE)
+            if profile and not header_data:
+                profile.add('first_byte', time.perf_counter() - profile.started)
             if not chunk:
                 logging.warning(f"Connection from {addr} closed before sending header.")
                 return
             header_data += chunk
 
+        if profile:
+            profile.add('header', time.perf_counter() - profile.started - profile.phases.get('first_byte', 0.0))
         header_bytes, initial_payload = header_data.split(b"\r\n\r\n", 1)
         header_str = header_bytes.decode('utf-8')
         parts = header_str.strip().split()
-        
+
+        if parts and parts[0].upper() == "STATS":
+            logging.info(f"STATS request from {addr}")
+            handle_stats(conn, snapshot_fn)
+            return
         if len(parts) < 2:
             logging.warning(f"Invalid command format from {addr}: '{header_str}'")
             return
@@ -140,12 +86,15 @@ def handle_client(conn, addr, storage_dir):
 
         command = parts[0].upper()
         filename = os.path.basename(parts[1])
-        filepath = os.path.join(storage_dir, filename)
+        if not filename or filename.startswith('.'):
+            # nama diawali titik dipakai untuk .tmp/.blobs milik storage
+            conn.sendall(b"ERROR Invalid filename\r\n\r\n")
+            return
 
         if command == "UPLOAD":
-            handle_upload_streaming(conn, addr, parts, filepath, initial_payload)
+            ok = handle_upload_streaming(conn, addr, parts, storage, filename, initial_payload, profile, decode_pool)
         elif command == "GET":
-            handle_get(conn, addr, filepath)
+            ok = handle_get(conn, addr, storage.path(filename), parts, profile, get_mode, file_cache)
         else:
             logging.warning(f"Unknown command '{command}' from {addr}.")
             conn.sendall(b"ERROR Unknown command\r\n\r\n")
@@ -153,40 +102,110 @@ def handle_client(conn, addr, storage_dir):
     except Exception as e:
         logging.error(f"Exception in handle_client for {addr}: {e}", exc_info=False)
     finally:
+        if command in ("UPLOAD", "GET"):
+            metrics.record(command, os.getpid(), time.perf_counter() - start, bool(ok))
+        if profile and command in ("UPLOAD", "GET"):
+            metrics.record_phases(command, profile.finish())
+        metrics.connection_closed()
         try:
             conn.close()
+            logging.info(f"Closed connection from {addr}")
         except: pass
 
-def worker_process(server_socket, storage_dir):
+def worker_process(server_socket, storage, stats_dir, profiling=False, get_mode='read', mmap_min_size=MIN_SIZE,
+                   mmap_idle=IDLE_TIMEOUT, decode_workers=0, decode_block=DECODE_BLOCK, decode_min_size=DECODE_MIN_SIZE,
+                   bandwidth=None, bandwidth_share=1, scale=None):
     process_id = os.getpid()
+    metrics = Metrics()
+    # cache mmap dibuat di dalam worker: setiap proses memetakan file sendiri
+    file_cache = create_file_cache(get_mode, mmap_min_size, mmap_idle)
+    decode_pool = create_decode_pool(decode_workers, decode_block, decode_min_size)
+    # batas global dibagi rata antar worker process (yang sedang hidup, jika autoscaling)
+    limiter = create_limiter(bandwidth, scale.alive if scale else bandwidth_share)
+    store = SnapshotStore(stats_dir)
+    store.start_flusher(metrics)
+
+    def snapshot():
+        # snapshot worker ini ditulis dulu agar STATS selalu melihat data terbarunya
+        store.write(metrics)
+        return store.read_all()
+
     logging.info(f"Worker process {process_id} started and is ready to accept connections.")
     while True:
         try:
 
-            conn, addr = server_socket.accept()
+            accepted = accept_or_idle(server_socket, scale)
+            if accepted is None:
+                store.write(metrics)
+                return
+            conn, addr = accepted
             logging.info(f"Worker {process_id} accepted connection from {addr}")
             
-            handle_client(conn, addr, storage_dir)
+            if scale:
+                scale.set_busy(1)
+            try:
+                handle_client(conn, addr, storage, metrics, snapshot, profiling, get_mode, file_cache, decode_pool, limiter)
+            finally:
+                if scale:
+                    scale.set_busy(-1)
+            store.write(metrics)
             
         except Exception as e:
             logging.error(f"Error in worker process {process_id}: {e}", exc_info=True)
 
-def start_server(host, port, workers, storage_dir):
-    os.makedirs(storage_dir, exist_ok=True)
+def start_server(host, port, workers, storage_dir, backend='plain', on_conflict='overwrite', stats_port=None,
+                 profiling=False, profile_dump='profile.json', get_mode='read', mmap_min_size=MIN_SIZE,
+                 mmap_idle=IDLE_TIMEOUT, write_options=None, decode_workers=0, decode_block=DECODE_BLOCK,
+                 decode_min_size=DECODE_MIN_SIZE, bandwidth=None, autoscale=None, sock_options=None):
+    storage = create_storage(backend, storage_dir, on_conflict, write_options)
+    sock_options = sock_options or SocketOptions()
+    if sock_options.chunk_size:
+        set_chunk_size(sock_options.chunk_size)
+    logging.info(f"Socket options: {sock_options}")
+    stats_dir = os.path.join(storage_dir, '.stats')
+    store = SnapshotStore(stats_dir)
+    store.reset()
     
     try:
         server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
         server_socket.bind((host, port))
-        server_socket.listen(128)
-        logging.info(f"Main process started. Server listening on {host}:{port}")
+        sock_options.listen(server_socket, 128)
+        logging.info(f"Main process started. Server listening on {host}:{port} (GET mode: {get_mode})")
     except OSError as e:
         logging.error(f"FATAL: Failed to bind socket: {e}")
         sys.exit(1)
 
 
+    if autoscale:
+        max_workers, scale_wait, scale_idle, scale_interval = autoscale
+        # bagian bandwidth setiap worker mengikuti jumlah worker hidup (scale.alive), bukan bandwidth_share
+        supervisor = ProcessSupervisor(server_socket, worker_process,
+                                       (storage, stats_dir, profiling, get_mode, mmap_min_size, mmap_idle,
+                                        decode_workers, decode_block, decode_min_size, bandwidth, 1),
+                                       workers, max_workers, scale_wait, scale_idle, scale_interval)
+        if profiling:
+            install_dump_handler(profile_dump, store.read_all)
+        if stats_port:
+            start_stats_http(host, stats_port, store.read_all)
+        try:
+            supervisor.run()
+        except KeyboardInterrupt:
+            logging.info("Shutdown signal received. Shutting down server.")
+        server_socket.close()
+        logging.info("Server has been shut down.")
+        return
+
     with ProcessPoolExecutor(max_workers=workers) as executor:
-        futures = [executor.submit(worker_process, server_socket, storage_dir) for _ in range(workers)]
+        futures = [executor.submit(worker_process, server_socket, storage, stats_dir, profiling,
+                                   get_mode, mmap_min_size, mmap_idle, decode_workers, decode_block, decode_min_size,
+                                   bandwidth, workers)
+                   for _ in range(workers)]
+        if profiling:
+            # dipasang setelah worker di-fork agar hanya proses utama yang menangani SIGUSR1
+            install_dump_handler(profile_dump, store.read_all)
+        if stats_port:
+            start_stats_http(host, stats_port, store.read_all)
         
         logging.info(f"Submitted {workers} worker processes to the pool.")
         
@@ -202,8 +221,16 @@ def start_server(host, port, workers, storage_dir):
 
 def main():
     args = parse_args()
-    setup_logging(args.log) 
-    start_server(args.host, args.port, args.workers, args.storage)
+    pipeline = setup_logging(args)
+    try:
+        start_server(args.host, args.port, args.workers, args.storage, args.backend, args.on_conflict, args.stats_port,
+                     args.profile, args.profile_dump, args.get_mode, args.mmap_min_size, args.mmap_idle,
+                     options_from_args(args), args.decode_workers, args.decode_block, args.decode_min_size,
+                     bandwidth_from_args(args), autoscale_from_args(args),
+                     socket_options_from_args(args))
+    finally:
+        if pipeline:
+            pipeline.stop()
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -0,0 +1,97 @@
+"""
+Profiling per fase request untuk server ETS (opt-in dengan --profile).
+
+Setiap koneksi UPLOAD/GET mendapat satu RequestProfile yang menjumlahkan waktu
+per fase:
+
+    first_byte  accept sampai byte pertama dari klien
+    header      byte pertama sampai header lengkap
+    queue       header lengkap sampai diambil worker (--scheduler sjf)
+    recv        menunggu data payload dari socket
+    decompress  dekompresi stream upload
+    decode      base64 decode
+    checksum    hashing untuk verifikasi end-to-end
+    write       menyerahkan data ke write-behind (termasuk menunggu batas in-flight)
+    commit      menulis sisa buffer, menunggu thread I/O, dan mempublikasikan file
+    fsync       total fsync file upload (bagian dari write/commit, lihat --fsync)
+    read        membaca file untuk GET
+    compress    kompresi stream GET
+    send        sendall ke klien
+    total       seluruh koneksi
+
+Hasilnya digabung ke histogram per command dan fase di Metrics, sehingga bisa
+dilihat lewat STATS / --stats_port, atau ditulis ke file JSON dengan SIGUSR1.
+Tanpa --profile handler menerima profile=None dan fase() tidak mengukur apa pun.
+"""
+
+import json
+import time
+import signal
+import logging
+
+from metrics import render
+
+
+class _PhaseTimer:
+    __slots__ = ('profile', 'name', 'start')
+
+    def __init__(self, profile, name):
+        self.profile = profile
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profile.add(self.name, time.perf_counter() - self.start)
+
+
+class _NullTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class RequestProfile:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = {}
+        self.timers = {}
+
+    def add(self, name, seconds):
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def phase(self, name):
+        timer = self.timers.get(name)
+        if timer is None:
+            timer = self.timers[name] = _PhaseTimer(self, name)
+        return timer
+
+    def finish(self):
+        self.phases['total'] = time.perf_counter() - self.started
+        return self.phases
+
+
+def phase(profile, name):
+    """with phase(profile, 'decode'): ...  -- no-op jika profiling tidak aktif"""
+    return profile.phase(name) if profile is not None else _NULL_TIMER
+
+
+def install_dump_handler(path, snapshot_fn):
+    """SIGUSR1 menulis ringkasan fase (per command) ke file JSON di path."""
+    def dump(signum, frame):
+        try:
+            phases = render(snapshot_fn()).get("phases", {})
+            with open(path, 'w') as f:
+                json.dump(phases, f, indent=2)
+            logging.info(f"Phase profile written to {path}")
+        except OSError as e:
+            logging.error(f"Failed to write phase profile to {path}: {e}")
+
+    signal.signal(signal.SIGUSR1, dump)
@@ -0,0 +1,216 @@
+"""
+Penjadwalan size-aware untuk thread_pool.py (--scheduler sjf).
+
+Dengan --scheduler fifo (default) koneksi langsung masuk antrean executor
+sesuai urutan accept, jadi GET kecil bisa menunggu di belakang puluhan upload
+100MB. Dengan sjf, thread utama menerima koneksi dan membaca header-nya
+dengan selectors (tanpa memakai worker), lalu memperkirakan biaya request
+dari header:
+
+    UPLOAD name size   size (byte base64 yang akan dikirim)
+    GET name           ukuran file di storage
+    STATS / lainnya    0
+
+Request masuk ke salah satu dari dua lajur SizeAwareQueue:
+
+* small : biaya < small_size, dilayani FIFO dan didahulukan
+* large : sisanya, dilayani dari biaya terkecil (shortest job first)
+
+Agar upload besar tidak menunggu selamanya, request besar yang sudah antre
+>= max_wait detik didahulukan (yang paling lama dulu), dan setelah itu satu
+request kecil yang sedang menunggu dilayani sebelum request besar berikutnya.
+"""
+
+import os
+import time
+import heapq
+import logging
+import selectors
+import threading
+from collections import deque
+
+import transfer
+from transfer import MAX_HEADER_SIZE
+from profiler import RequestProfile
+
+SCHEDULERS = ('fifo', 'sjf')
+SMALL_SIZE = 1024 * 1024
+MAX_WAIT = 5.0
+HEADER_TIMEOUT = 30.0
+
+
+class PendingRequest:
+    __slots__ = ('conn', 'addr', 'header_data', 'profile', 'cost', 'queued_at')
+
+    def __init__(self, conn, addr, header_data=b"", profile=None, cost=0):
+        self.conn = conn
+        self.addr = addr
+        self.header_data = header_data
+        self.profile = profile
+        self.cost = cost
+        self.queued_at = None
+
+
+def request_cost(header_data, storage):
+    """Perkiraan byte yang dipindahkan request, dari header yang sudah lengkap."""
+    parts = header_data.split(b"\r\n\r\n", 1)[0].split()
+    if len(parts) < 2:
+        return 0
+    command = parts[0].upper()
+    if command == b"UPLOAD" and len(parts) >= 3:
+        try:
+            return max(0, int(parts[2]))
+        except ValueError:
+            return 0
+    if command == b"GET":
+        try:
+            return os.path.getsize(storage.path(os.path.basename(parts[1].decode('utf-8', 'replace'))))
+        except OSError:
+            return 0
+    return 0
+
+
+class SizeAwareQueue:
+    def __init__(self, small_size=SMALL_SIZE, max_wait=MAX_WAIT):
+        self.small_size = small_size
+        self.max_wait = max_wait
+        self.cond = threading.Condition()
+        self.small = deque()
+        self.large = []  # heap (cost, seq, request)
+        self.seq = 0
+        self.last_aged = False
+        self.closed = False
+
+    def put(self, request):
+        with self.cond:
+            request.queued_at = time.perf_counter()
+            if request.cost < self.small_size:
+                self.small.append(request)
+            else:
+                heapq.heappush(self.large, (request.cost, self.seq, request))
+                self.seq += 1
+            self.cond.notify()
+
+    def _pop_aged(self, now):
+        # request besar paling lama = seq terkecil di heap
+        i = min(range(len(self.large)), key=lambda j: self.large[j][1])
+        request = self.large[i][2]
+        if now - request.queued_at < self.max_wait:
+            return None
+        self.large[i] = self.large[-1]
+        self.large.pop()
+        heapq.heapify(self.large)
+        return request
+
+    def get(self):
+        """Request berikutnya untuk worker, atau None setelah close()."""
+        with self.cond:
+            while not (self.small or self.large or self.closed):
+                self.cond.wait()
+            if not self.small and not self.large:
+                return None
+            if self.large and not (self.last_aged and self.small):
+                request = self._pop_aged(time.perf_counter())
+                if request is not None:
+                    self.last_aged = True
+                    logging.debug(f"Scheduling aged request from {request.addr} ({request.cost} bytes)")
+                    return request
+            self.last_aged = False
+            if self.small:
+                return self.small.popleft()
+            return heapq.heappop(self.large)[2]
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+
+    def __len__(self):
+        with self.cond:
+            return len(self.small) + len(self.large)
+
+
+class HeaderReader:
+    """
+    Loop accept + baca header dengan selectors. Setiap koneksi yang header-nya
+    lengkap (atau sudah melebihi MAX_HEADER_SIZE / ditutup klien, supaya worker
+    yang mengirim error-nya) diteruskan ke on_ready sebagai PendingRequest.
+    """
+
+    def __init__(self, server_socket, storage, on_ready, profiling=False, header_timeout=HEADER_TIMEOUT):
+        self.server_socket = server_socket
+        self.storage = storage
+        self.on_ready = on_ready
+        self.profiling = profiling
+        self.header_timeout = header_timeout
+        self.sel = selectors.DefaultSelector()
+        self.pending = {}
+
+    def serve_forever(self):
+        self.server_socket.setblocking(False)
+        self.sel.register(self.server_socket, selectors.EVENT_READ, None)
+        try:
+            while True:
+                for key, _ in self.sel.select(timeout=1.0):
+                    if key.data is None:
+                        self.accept()
+                    else:
+                        self.read(key.fileobj, key.data)
+                self.expire()
+        finally:
+            for conn in list(self.pending):
+                self.sel.unregister(conn)
+                conn.close()
+            self.sel.close()
+
+    def accept(self):
+        try:
+            conn, addr = self.server_socket.accept()
+        except BlockingIOError:
+            return
+        logging.debug(f"Accepted connection from {addr}")
+        conn.setblocking(False)
+        request = PendingRequest(conn, addr, profile=RequestProfile() if self.profiling else None)
+        self.pending[conn] = (request, time.monotonic() + self.header_timeout)
+        self.sel.register(conn, selectors.EVENT_READ, request)
+
+    def read(self, conn, request):
+        try:
+            chunk = conn.recv(transfer.CHUNK_SIZE)
+        except BlockingIOError:
+            return
+        except OSError:
+            chunk = b""
+        profile = request.profile
+        if profile and chunk and not request.header_data:
+            profile.add('first_byte', time.perf_counter() - profile.started)
+        request.header_data += chunk
+        complete = b"\r\n\r\n" in request.header_data
+        if chunk and not complete and len(request.header_data) <= MAX_HEADER_SIZE:
+            return
+        if profile and complete:
+            profile.add('header', time.perf_counter() - profile.started - profile.phases.get('first_byte', 0.0))
+        self.sel.unregister(conn)
+        del self.pending[conn]
+        conn.setblocking(True)
+        if complete:
+            request.cost = request_cost(request.header_data, self.storage)
+        self.on_ready(request)
+
+    def expire(self):
+        now = time.monotonic()
+        for conn, (request, deadline) in list(self.pending.items()):
+            if deadline <= now:
+                logging.warning(f"Header from {request.addr} not received within {self.header_timeout}s, closing.")
+                self.sel.unregister(conn)
+                del self.pending[conn]
+                conn.close()
+
+
+def add_scheduler_args(parser):
+    parser.add_argument('--scheduler', choices=SCHEDULERS, default='fifo',
+                        help='fifo: serve connections in accept order, sjf: read headers first and serve small transfers ahead of large ones (default: fifo)')
+    parser.add_argument('--small_size', type=int, default=SMALL_SIZE,
+                        help=f'Requests moving fewer bytes than this use the small lane with --scheduler sjf (default: {SMALL_SIZE})')
+    parser.add_argument('--max_wait', type=float, default=MAX_WAIT,
+                        help=f'Seconds a large request may wait before it is served ahead of small ones (default: {MAX_WAIT})')
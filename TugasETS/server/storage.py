@@ -0,0 +1,345 @@
+"""
+Backend penyimpanan untuk upload di server ETS.
+
+* FileStorage  : setiap upload ditulis utuh ke files/<nama>
+* DedupStorage : content-addressed, isi file di-hash (sha256) selama streaming,
+                 setiap isi unik hanya disimpan sekali di files/.blobs/<hash>
+                 dan nama file hanyalah hardlink ke blob tersebut
+
+Kedua backend memakai antarmuka yang sama:
+    writer = storage.open_upload(filename)
+    writer.write(data)   # berulang-ulang selama streaming
+    writer.commit()      # upload selesai, mengembalikan nama file yang tersimpan
+    writer.abort()       # upload gagal, buang data parsial
+
+Setiap upload selalu di-stream ke file sementara yang unik di files/.tmp/
+lalu dipublikasikan dengan rename/link atomik, sehingga upload bersamaan ke
+nama yang sama tidak pernah saling menimpa isi file di tengah jalan. Jika nama
+sudah ada, conflict policy menentukan hasilnya:
+
+* overwrite : last-writer-wins, upload yang selesai terakhir menjadi isi file
+* version   : simpan sebagai nama_1.ext, nama_2.ext, dst
+* reject    : tolak upload dengan UploadConflict
+
+File sementara ditulis lewat write_behind.WriteBehindFile (buffer besar, thread
+I/O opsional, kebijakan fsync); opsinya diberikan sebagai write_options.
+"""
+
+import os
+import time
+import uuid
+import shutil
+import hashlib
+import logging
+import threading
+
+from write_behind import BUFFER_SIZE, INFLIGHT_BYTES, WriteBehindFile, IOThread
+
+BACKENDS = ('plain', 'dedup')
+# digest blob disimpan di xattr inode-nya, sehingga terbaca lewat nama file manapun
+DIGEST_XATTR = 'user.sha256'
+CONFLICT_POLICIES = ('overwrite', 'version', 'reject')
+
+_io_lock = threading.Lock()
+
+
+class UploadConflict(Exception):
+    pass
+
+
+class UploadWriter:
+    def __init__(self, storage, filename):
+        self.storage = storage
+        self.filename = filename
+        self.tmp_path = storage.temp_path()
+        self.f = storage.open_temp(self.tmp_path)
+        self.done = False
+
+    def write(self, data):
+        self.f.write(data)
+
+    @property
+    def fsync_seconds(self):
+        """Total waktu fsync upload ini (untuk fase fsync di profiler)."""
+        return self.f.fsync_seconds
+
+    def _close(self):
+        # done diset dulu: jika close gagal, abort() tidak boleh menutup fd yang sama lagi
+        self.done = True
+        try:
+            self.f.close()
+        except BaseException:
+            self._remove_temp()
+            raise
+
+    def _remove_temp(self):
+        try:
+            os.remove(self.tmp_path)
+        except OSError:
+            pass
+
+    def commit(self):
+        self._close()
+        return self.storage.publish(self.tmp_path, self.filename)
+
+    def abort(self):
+        if self.done:
+            return
+        self.done = True
+        try:
+            self.f.discard()
+        finally:
+            self._remove_temp()
+
+
+class FileStorage:
+    def __init__(self, root, on_conflict='overwrite', write_options=None):
+        if on_conflict not in CONFLICT_POLICIES:
+            raise ValueError(f"Unknown conflict policy: {on_conflict}")
+        self.root = root
+        self.on_conflict = on_conflict
+        self.write_options = dict(write_options or {})
+        # thread I/O dibuat saat upload pertama, jadi di mode process setiap worker punya sendiri
+        self.io = None
+        self.tmp_dir = os.path.join(root, '.tmp')
+        os.makedirs(root, exist_ok=True)
+        # sisa upload yang terputus saat server mati tidak pernah dipublikasikan
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+        os.makedirs(self.tmp_dir, exist_ok=True)
+
+    def path(self, filename):
+        return os.path.join(self.root, filename)
+
+    def exists(self, filename):
+        return os.path.exists(self.path(filename))
+
+    def temp_path(self):
+        return os.path.join(self.tmp_dir, f"{uuid.uuid4().hex}.part")
+
+    def open_temp(self, tmp_path, **overrides):
+        options = dict(self.write_options, **overrides)
+        inflight = options.pop('inflight', INFLIGHT_BYTES)
+        if options.pop('io_thread', False):
+            with _io_lock:
+                if self.io is None:
+                    self.io = IOThread(inflight)
+            options['io'] = self.io
+        return WriteBehindFile(tmp_path, **options)
+
+    def publish(self, tmp_path, filename):
+        """Pindahkan tmp_path menjadi files/<filename> sesuai conflict policy"""
+        try:
+            if self.on_conflict == 'overwrite':
+                os.replace(tmp_path, self.path(filename))
+                return filename
+
+            base, ext = os.path.splitext(filename)
+            candidate = filename
+            counter = 1
+            while True:
+                # os.link gagal jika tujuan sudah ada, jadi klaim nama bersifat atomik
+                try:
+                    os.link(tmp_path, self.path(candidate))
+                    return candidate
+                except FileExistsError:
+                    if self.on_conflict == 'reject':
+                        raise UploadConflict(f"File {filename} already exists")
+                    candidate = f"{base}_{counter}{ext}"
+                    counter += 1
+        finally:
+            # rename() tidak melakukan apa-apa jika tujuan sudah hardlink ke inode yang sama
+            if os.path.lexists(tmp_path):
+                os.remove(tmp_path)
+
+    def open_upload(self, filename):
+        return UploadWriter(self, filename)
+
+
+class DedupUploadWriter(UploadWriter):
+    """
+    Upload ke DedupStorage. Data ditahan di memori sampai sebesar buffer
+    write-behind, jadi upload kecil yang isinya sudah ada di .blobs tidak pernah
+    ditulis ke disk. Upload yang lebih besar di-stream ke file sementara, tetapi
+    fsync (--fsync close) hanya dilakukan jika isinya menjadi blob baru.
+    """
+
+    def __init__(self, storage, filename):
+        self.storage = storage
+        self.filename = filename
+        self.tmp_path = storage.temp_path()
+        self.f = None
+        self.memory = bytearray()
+        self.spill_size = storage.write_options.get('buffer_size', BUFFER_SIZE)
+        self.fsync = storage.write_options.get('fsync', 'none')
+        self.blob_fsync_seconds = 0.0
+        self.hasher = hashlib.sha256()
+        self.done = False
+
+    def write(self, data):
+        self.hasher.update(data)
+        if self.f is None:
+            self.memory += data
+            if len(self.memory) < self.spill_size:
+                return
+            # fsync saat close ditunda ke _store_blob, duplikat tidak perlu di-fsync
+            self.f = self.storage.open_temp(self.tmp_path, fsync='none' if self.fsync == 'close' else self.fsync)
+            data, self.memory = self.memory, bytearray()
+        self.f.write(data)
+
+    @property
+    def fsync_seconds(self):
+        return (self.f.fsync_seconds if self.f else 0.0) + self.blob_fsync_seconds
+
+    def _close(self):
+        if self.f is None:
+            self.done = True
+        else:
+            super()._close()
+
+    def abort(self):
+        self.memory = bytearray()
+        if self.f is None:
+            self.done = True
+            return
+        super().abort()
+
+    def _store_blob(self, blob_path):
+        """Jadikan isi upload blob di blob_path; False jika blob yang sama sudah dibuat upload lain."""
+        if not os.path.exists(self.tmp_path):
+            # upload kecil yang masih di memori baru ditulis sekarang
+            with open(self.tmp_path, 'wb') as f:
+                f.write(self.memory)
+        self.storage.tag_blob(self.tmp_path, self.hasher.hexdigest())
+        if self.fsync != 'none':
+            start = time.perf_counter()
+            fd = os.open(self.tmp_path, os.O_RDONLY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+            self.blob_fsync_seconds += time.perf_counter() - start
+        try:
+            # os.link gagal jika blob sudah ada, sehingga aman dipakai bersamaan
+            os.link(self.tmp_path, blob_path)
+            return True
+        except FileExistsError:
+            return False
+
+    def commit(self):
+        self._close()
+        digest = self.hasher.hexdigest()
+        blob_path = self.storage.blob_path(digest)
+        os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+        tmp_link = self.storage.temp_path()
+        try:
+            while True:
+                if not os.path.exists(blob_path) and self._store_blob(blob_path):
+                    logging.info(f"Dedup: stored new blob {digest[:12]} for {self.filename}")
+                else:
+                    logging.info(f"Dedup: reused blob {digest[:12]} for {self.filename}")
+                try:
+                    os.link(blob_path, tmp_link)
+                    break
+                except FileNotFoundError:
+                    # blob yatim dihapus gc() proses lain tepat sebelum di-link, simpan ulang
+                    continue
+        finally:
+            self.memory = bytearray()
+            self._remove_temp()
+        return self.storage.publish(tmp_link, self.filename)
+
+
+class DedupStorage(FileStorage):
+    """
+    Blob dihitung referensinya lewat link count: setiap nama file adalah satu
+    hardlink, jadi blob dengan st_nlink == 1 tidak dirujuk nama manapun lagi.
+    Nama yang ditimpa (overwrite) dicek saat publish dan blob lamanya
+    dihapus jika menjadi yatim; blobnya dicari dari digest di xattr, tanpa
+    menelusuri seluruh .blobs. Scan penuh (gc) hanya dijalankan saat start.
+    """
+
+    def __init__(self, root, on_conflict='overwrite', write_options=None):
+        super().__init__(root, on_conflict, write_options)
+        self.blob_dir = os.path.join(root, '.blobs')
+        os.makedirs(self.blob_dir, exist_ok=True)
+        removed = self.gc()
+        if removed:
+            logging.info(f"Dedup: startup sweep removed {removed} orphan blob(s)")
+
+    def blob_path(self, digest):
+        return os.path.join(self.blob_dir, digest[:2], digest)
+
+    def open_upload(self, filename):
+        return DedupUploadWriter(self, filename)
+
+    def publish(self, tmp_path, filename):
+        # fd ke isi lama tetap menunjuk inode-nya setelah nama ditimpa
+        try:
+            old = os.open(self.path(filename), os.O_RDONLY)
+        except OSError:
+            old = None
+        try:
+            return super().publish(tmp_path, filename)
+        finally:
+            if old is not None:
+                try:
+                    if self.release(old):
+                        logging.info(f"Dedup: overwrite of {filename} released its old blob")
+                finally:
+                    os.close(old)
+
+    def tag_blob(self, path, digest):
+        try:
+            os.setxattr(path, DIGEST_XATTR, digest.encode())
+        except (OSError, AttributeError):
+            # filesystem tanpa xattr: release() menghitung ulang hash isi lama
+            pass
+
+    def _digest_of(self, fd):
+        try:
+            return os.getxattr(fd, DIGEST_XATTR).decode()
+        except (OSError, AttributeError):
+            pass
+        h = hashlib.sha256()
+        offset = 0
+        while True:
+            chunk = os.pread(fd, BUFFER_SIZE, offset)
+            if not chunk:
+                return h.hexdigest()
+            h.update(chunk)
+            offset += len(chunk)
+
+    def release(self, fd):
+        """Hapus blob milik isi lama (fd) jika tidak ada nama lain yang merujuknya."""
+        st = os.fstat(fd)
+        if st.st_nlink != 1:
+            return False
+        path = self.blob_path(self._digest_of(fd))
+        try:
+            blob = os.stat(path)
+            if (blob.st_ino, blob.st_dev) != (st.st_ino, st.st_dev) or blob.st_nlink != 1:
+                return False
+            os.remove(path)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def gc(self):
+        """Hapus semua blob yang sudah tidak dirujuk nama file manapun (scan penuh .blobs)"""
+        removed = 0
+        for dirpath, _, filenames in os.walk(self.blob_dir):
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                try:
+                    if os.stat(path).st_nlink == 1:
+                        os.remove(path)
+                        removed += 1
+                except OSError:
+                    pass
+        return removed
+
+
+def create_storage(backend, root, on_conflict='overwrite', write_options=None):
+    if backend == 'dedup':
+        return DedupStorage(root, on_conflict, write_options)
+    return FileStorage(root, on_conflict, write_options)
@@ -0,0 +1,383 @@
+"""
+Handler UPLOAD dan GET yang dipakai bersama oleh thread_pool.py dan processing_pool.py.
+
+Opsi tambahan dikirim klien sebagai token key=value setelah parameter biasa:
+
+    UPLOAD <nama> <ukuran_base64> [checksum=<algo>] [compress=<nama>[:level]]
+    GET <nama> [checksum=<algo>] [compress=<nama>[:level]]
+
+Jika checksum diminta, pengirim data menutup stream dengan trailer
+    CHECKSUM <algo> <hexdigest>\r\n\r\n
+yang dihitung dari isi file asli (hasil decode base64). Upload yang checksum-nya
+tidak cocok dibuang dan tidak pernah dipublikasikan ke files/.
+
+Jika kompresi diminta, payload dikirim sebagai stream zlib/lzma. Ukuran di header
+tetap ukuran data asli (base64 untuk UPLOAD, file untuk GET), akhir payload
+ditentukan oleh akhir stream terkompresi, dan trailer checksum menyusul sesudahnya.
+
+handle_upload_streaming dan handle_get mengembalikan True jika transfer sukses,
+dipakai untuk metrik sukses/gagal per worker. Jika profile (profiler.RequestProfile)
+diberikan, waktu tiap fase transfer dijumlahkan ke dalamnya.
+
+GET bisa mengirim isi file dengan tiga cara (get_mode, lihat file_cache.py):
+read loop per request, potongan memoryview dari mmap yang dipakai bersama
+(file_cache), atau os.sendfile. sendfile hanya dipakai tanpa checksum dan
+kompresi karena keduanya perlu melihat isi file; selain itu kembali ke read loop.
+"""
+
+import os
+import json
+import lzma
+import zlib
+import logging
+import base64
+import binascii
+from concurrent.futures import BrokenExecutor
+
+from storage import UploadConflict
+from integrity import CHECKSUMS, TimedChecksum, parse_options, trailer, parse_trailer
+from compression import COMPRESSIONS, TimedCompressor, TimedDecompressor, parse_compression
+from metrics import render
+from profiler import phase
+
+CHUNK_SIZE = 8192
+MAX_HEADER_SIZE = 8192
+READ_BLOCK = 65536
+# potongan mmap lebih besar: tidak ada salinan, sendall langsung dari page cache
+MMAP_BLOCK = 1024 * 1024
+
+
+def set_chunk_size(size):
+    """Ukuran recv payload upload dan blok baca GET (--chunk_size, lihat Tugas1/sockopts.py)."""
+    global CHUNK_SIZE, READ_BLOCK
+    CHUNK_SIZE = READ_BLOCK = size
+
+
+def read_block(conn, buffer=b"", max_size=MAX_HEADER_SIZE):
+    """Baca dari conn sampai ditemukan \r\n\r\n, kembalikan (block, sisa)"""
+    while b"\r\n\r\n" not in buffer:
+        if len(buffer) > max_size:
+            raise ValueError("Block exceeds max size")
+        chunk = conn.recv(CHUNK_SIZE)
+        if not chunk:
+            raise ConnectionError("Connection closed while reading block")
+        buffer += chunk
+    block, rest = buffer.split(b"\r\n\r\n", 1)
+    return block, rest
+
+
+def _checksum_from_options(conn, addr, options):
+    name = options.get('checksum')
+    if name is None:
+        return None, True
+    if name not in CHECKSUMS:
+        logging.warning(f"Unsupported checksum '{name}' requested by {addr}")
+        conn.sendall(f"ERROR Unsupported checksum, use one of {','.join(CHECKSUMS)}\r\n\r\n".encode('utf-8'))
+        return None, False
+    return TimedChecksum(name), True
+
+
+def _compression_from_options(conn, addr, options):
+    value = options.get('compress')
+    if value is None:
+        return None, True
+    try:
+        return parse_compression(value), True
+    except ValueError as e:
+        logging.warning(f"Unsupported compression '{value}' requested by {addr}: {e}")
+        conn.sendall(f"ERROR Unsupported compression, use one of {','.join(COMPRESSIONS)}\r\n\r\n".encode('utf-8'))
+        return None, False
+
+
+class PayloadReader:
+    """
+    Mengembalikan payload UPLOAD per chunk. Tanpa kompresi, payload berakhir setelah
+    expected_size byte. Dengan kompresi, payload berakhir saat stream terkompresi
+    selesai. Data sesudah payload (trailer) disimpan di leftover.
+    """
+    def __init__(self, conn, initial_payload, expected_size, decompressor=None, profile=None):
+        self.conn = conn
+        self.profile = profile
+        self.expected_size = expected_size
+        self.decompressor = decompressor
+        self.pending = initial_payload
+        self.bytes_received = 0
+        self.leftover = b""
+        self.finished = False
+        if decompressor is None and expected_size == 0:
+            self.pending, self.leftover, self.finished = b"", initial_payload, True
+
+    def read(self):
+        while not self.finished:
+            if self.decompressor and self.decompressor.pending:
+                # sisa output dari data sebelumnya (dibatasi max_length decompressor)
+                data = b""
+            elif self.pending:
+                data, self.pending = self.pending, b""
+            else:
+                size = CHUNK_SIZE if self.decompressor else min(CHUNK_SIZE, self.expected_size - self.bytes_received)
+                with phase(self.profile, 'recv'):
+                    data = self.conn.recv(size)
+                if not data:
+                    raise ConnectionError("Connection lost during payload")
+
+            if self.decompressor:
+                with phase(self.profile, 'decompress'):
+                    out = self.decompressor.decompress(data)
+                if self.decompressor.eof:
+                    self.leftover = self.decompressor.unused_data
+                    self.finished = True
+            else:
+                remaining = self.expected_size - self.bytes_received
+                out, self.leftover = data[:remaining], data[remaining:]
+                self.finished = len(out) == remaining
+
+            self.bytes_received += len(out)
+            if self.bytes_received > self.expected_size:
+                raise ValueError("Payload larger than declared size")
+            if out:
+                return out
+        return b""
+
+
+def handle_upload_streaming(conn, addr, parts, storage, filename, initial_payload, profile=None, decode_pool=None):
+    if len(parts) < 3:
+        logging.warning(f"UPLOAD command from {addr} is missing the data size.")
+        conn.sendall(b"ERROR No size provided for UPLOAD\r\n\r\n")
+        return
+    try:
+        expected_size = int(parts[2])
+    except ValueError:
+        logging.warning(f"Invalid size format in UPLOAD from {addr}: {parts[2]}")
+        conn.sendall(b"ERROR Invalid size format\r\n\r\n")
+        return
+    options = parse_options(parts[3:])
+    checksum, ok = _checksum_from_options(conn, addr, options)
+    if not ok:
+        return
+    compression, ok = _compression_from_options(conn, addr, options)
+    if not ok:
+        return
+    if storage.on_conflict == 'reject' and storage.exists(filename):
+        logging.warning(f"UPLOAD of existing file {filename} from {addr} rejected.")
+        conn.sendall(b"ERROR File already exists\r\n\r\n")
+        return
+
+    try:
+        # upload besar di-decode paralel jika server punya decode pool (lihat decode_pool.py)
+        decoder = decode_pool.decoder(expected_size) if decode_pool else None
+    except Exception as e:
+        logging.error(f"Cannot start decode pool for upload from {addr}: {e}", exc_info=True)
+        conn.sendall(b"ERROR Server decode error\r\n\r\n")
+        return
+
+    conn.sendall(b"OK Ready to receive\r\n\r\n")
+
+    decompressor = TimedDecompressor(compression[0]) if compression else None
+    reader = PayloadReader(conn, initial_payload, expected_size, decompressor, profile)
+    # Buffer untuk menampung sisa data yang belum kelipatan 4
+    decode_buffer = b""
+
+    try:
+        writer = storage.open_upload(filename)
+    except IOError as e:
+        logging.error(f"Cannot open {filename} for upload from {addr}: {e}")
+        conn.sendall(b"ERROR Server file error\r\n\r\n")
+        return
+
+    try:
+        # menerima dan langsung memproses data
+        while True:
+            # 1. Terima data berikutnya dari klien (sudah didekompresi jika perlu)
+            try:
+                chunk = reader.read()
+            except ConnectionError:
+                logging.warning(f"Connection lost during UPLOAD of {filename} from {addr}.")
+                writer.abort()
+                return
+            except (ValueError, zlib.error, lzma.LZMAError) as e:
+                logging.error(f"Invalid payload stream from {addr}: {e}")
+                writer.abort()
+                conn.sendall(b"ERROR Invalid payload stream\r\n\r\n")
+                return
+            final = not chunk
+
+            try:
+                with phase(profile, 'decode'):
+                    if decoder:
+                        # 2-3. Blok besar di-decode di pool proses, hasilnya diambil sesuai urutan
+                        decoded_blocks = decoder.finish() if final else decoder.feed(chunk)
+                    else:
+                        decode_buffer += chunk
+                        # 2. Pastikan buffer bisa di-decode (panjangnya kelipatan 4), sisa data terakhir di-decode utuh
+                        len_to_decode = len(decode_buffer) if final else (len(decode_buffer) // 4) * 4
+                        # Ambil bagian yang akan di-decode, simpan sisanya untuk digabung dengan data berikutnya
+                        chunk_to_decode = decode_buffer[:len_to_decode]
+                        decode_buffer = decode_buffer[len_to_decode:]
+                        # 3. Decode di worker ini
+                        decoded_blocks = [base64.b64decode(chunk_to_decode)] if chunk_to_decode else []
+
+                # 4. Hasil decode langsung ditulis ke disk
+                for decoded_data in decoded_blocks:
+                    if checksum:
+                        with phase(profile, 'checksum'):
+                            checksum.update(decoded_data)
+                    with phase(profile, 'write'):
+                        writer.write(decoded_data)
+            except binascii.Error as e:
+                logging.error(f"Streaming Base64 decode error from {addr}: {e}")
+                conn.sendall(b"ERROR Invalid Base64 data stream\r\n\r\n")
+                # Hapus file parsial jika terjadi error
+                writer.abort()
+                return
+            if final:
+                break
+
+        if reader.bytes_received != expected_size:
+            logging.error(f"UPLOAD of {filename} from {addr} ended after {reader.bytes_received} of {expected_size} bytes")
+            writer.abort()
+            conn.sendall(b"ERROR Payload size mismatch\r\n\r\n")
+            return
+        if decompressor:
+            logging.info(f"Decompressed {decompressor.name} upload of {filename} from {addr}: "
+                         f"{decompressor.wire_bytes} -> {decompressor.raw_bytes} bytes "
+                         f"(ratio {decompressor.ratio:.2f}, cpu {decompressor.seconds:.3f}s)")
+
+        verified = ""
+        if checksum:
+            try:
+                block, _ = read_block(conn, reader.leftover)
+                name, digest = parse_trailer(block)
+            except (ValueError, ConnectionError) as e:
+                logging.error(f"Invalid checksum trailer during upload from {addr}: {e}")
+                writer.abort()
+                conn.sendall(b"ERROR Invalid checksum trailer\r\n\r\n")
+                return
+            if name != checksum.name or digest != checksum.hexdigest():
+                logging.error(f"Checksum mismatch for {filename} from {addr}: client {name}={digest}, server {checksum.name}={checksum.hexdigest()}")
+                writer.abort()
+                conn.sendall(b"ERROR Checksum mismatch\r\n\r\n")
+                return
+            verified = f" {checksum.name}={digest}"
+            logging.info(f"Checksum {checksum.name} verified for {filename} from {addr} in {checksum.seconds:.3f}s")
+
+        try:
+            with phase(profile, 'commit'):
+                stored_name = writer.commit()
+            if profile and writer.fsync_seconds:
+                profile.add('fsync', writer.fsync_seconds)
+        except UploadConflict as e:
+            logging.warning(f"UPLOAD from {addr} rejected at commit: {e}")
+            conn.sendall(b"ERROR File already exists\r\n\r\n")
+            return
+
+        logging.info(f"OK: Stream-decoded and saved {stored_name} from {addr}")
+        with phase(profile, 'send'):
+            conn.sendall(f"OK Upload complete {stored_name}{verified}\r\n\r\n".encode('utf-8'))
+        return True
+
+    except IOError as e:
+        logging.error(f"File write error during streaming upload from {addr}: {e}")
+        writer.abort()
+        conn.sendall(b"ERROR Server file error\r\n\r\n")
+    except BrokenExecutor as e:
+        logging.error(f"Decode pool failed during upload from {addr}: {e}")
+        writer.abort()
+        conn.sendall(b"ERROR Server decode error\r\n\r\n")
+    except Exception as e:
+        logging.error(f"Unhandled exception during streaming upload: {e}", exc_info=True)
+        writer.abort()
+    finally:
+        if decoder:
+            decoder.cancel()
+
+def _read_chunks(f, profile):
+    while True:
+        with phase(profile, 'read'):
+            chunk = f.read(READ_BLOCK)
+        if not chunk:
+            return
+        yield chunk
+
+
+def handle_get(conn, addr, filepath, parts=(), profile=None, get_mode='read', file_cache=None):
+    if not os.path.exists(filepath):
+        conn.sendall(b"ERROR File not found\r\n\r\n")
+        return
+    options = parse_options(parts[2:])
+    checksum, ok = _checksum_from_options(conn, addr, options)
+    if not ok:
+        return
+    compression, ok = _compression_from_options(conn, addr, options)
+    if not ok:
+        return
+    try:
+        compressor = TimedCompressor(*compression) if compression else None
+    except (ValueError, lzma.LZMAError) as e:
+        logging.warning(f"Cannot create {compression[0]} compressor for {addr}: {e}")
+        conn.sendall(b"ERROR Invalid compression level\r\n\r\n")
+        return
+    mapped = None
+    f = None
+    try:
+        if get_mode == 'mmap' and file_cache is not None:
+            with phase(profile, 'read'):
+                mapped = file_cache.acquire(filepath)
+        if mapped:
+            file_size = mapped.size
+            chunks = mapped.chunks(MMAP_BLOCK)
+        else:
+            # file kecil (di bawah --mmap_min_size) tetap memakai read loop
+            f = open(filepath, 'rb')
+            file_size = os.fstat(f.fileno()).st_size
+            chunks = _read_chunks(f, profile)
+        header = f"OK {file_size}"
+        if checksum:
+            header += f" checksum={checksum.name}"
+        if compressor:
+            header += f" compress={compressor.name}"
+        conn.sendall(f"{header}\r\n\r\n".encode('utf-8'))
+        if f and get_mode == 'sendfile' and not checksum and not compressor:
+            # sendfile hanya bisa dipakai jika byte file dikirim apa adanya
+            with phase(profile, 'send'):
+                sent = conn.sendfile(f, 0, file_size)
+            if sent != file_size:
+                raise ConnectionError(f"sendfile sent {sent} of {file_size} bytes")
+            chunks = ()
+        for chunk in chunks:
+            if checksum:
+                with phase(profile, 'checksum'):
+                    checksum.update(chunk)
+            if compressor:
+                with phase(profile, 'compress'):
+                    chunk = compressor.compress(chunk)
+                if not chunk: continue
+            with phase(profile, 'send'):
+                conn.sendall(chunk)
+        if compressor:
+            with phase(profile, 'compress'):
+                tail = compressor.flush()
+            with phase(profile, 'send'):
+                conn.sendall(tail)
+            logging.info(f"Compressed {compressor.name} GET of {os.path.basename(filepath)} to {addr}: "
+                         f"{compressor.raw_bytes} -> {compressor.wire_bytes} bytes "
+                         f"(ratio {compressor.ratio:.2f}, cpu {compressor.seconds:.3f}s)")
+        if checksum:
+            conn.sendall(trailer(checksum))
+            logging.info(f"Checksum {checksum.name} for {os.path.basename(filepath)} to {addr} computed in {checksum.seconds:.3f}s")
+        return True
+    except Exception as e:
+        logging.error(f"Error sending file {os.path.basename(filepath)} to {addr}: {e}")
+        return False
+    finally:
+        # lepaskan potongan memoryview terakhir agar mapping bisa ditutup saat di-unmap
+        chunk = chunks = None
+        if f:
+            f.close()
+        if mapped:
+            file_cache.release(mapped)
+
+def handle_stats(conn, snapshot_fn):
+    """STATS -> OK <json>\r\n\r\n, json berisi metrik server (lihat metrics.render)"""
+    body = json.dumps(render(snapshot_fn()))
+    conn.sendall(f"OK {body}\r\n\r\n".encode('utf-8'))
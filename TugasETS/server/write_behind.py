@@ -0,0 +1,187 @@
+"""
+Write-behind untuk file upload di server ETS.
+
+Chunk hasil decode base64 (beberapa KB) tidak langsung di-write ke disk, tetapi
+dikumpulkan di buffer besar (--write_buffer, dibulatkan ke kelipatan 4096)
+dan di-write per blok penuh, sehingga offset setiap write selalu sejajar blok
+dan jumlah syscall write turun drastis.
+
+Dengan --io_thread blok penuh diserahkan ke satu thread I/O per proses, jadi
+worker koneksi bisa lanjut recv/decode selagi disk menulis blok sebelumnya.
+Jumlah byte yang sudah diserahkan tapi belum tertulis dibatasi --write_inflight
+untuk seluruh proses; worker yang melewati batas menunggu sampai thread I/O
+mengejar (backpressure ke klien lewat TCP).
+
+Kebijakan fsync (--fsync):
+    none      tidak pernah fsync, mengandalkan page cache
+    close     fsync sekali sebelum file dipublikasikan
+    periodic  fsync setelah write jika sudah lewat --fsync_interval detik
+              sejak fsync terakhir file itu
+"""
+
+import os
+import time
+import queue
+import logging
+import threading
+
+FSYNC_POLICIES = ('none', 'close', 'periodic')
+BLOCK_ALIGN = 4096
+BUFFER_SIZE = 1024 * 1024
+INFLIGHT_BYTES = 16 * 1024 * 1024
+FSYNC_INTERVAL = 1.0
+
+
+class InflightBudget:
+    """Batas byte yang sedang antre di thread I/O."""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.used = 0
+        self.cond = threading.Condition()
+
+    def acquire(self, n):
+        with self.cond:
+            # blok yang lebih besar dari limit tetap boleh lewat jika antrean kosong
+            while self.used and self.used + n > self.limit:
+                self.cond.wait()
+            self.used += n
+
+    def release(self, n):
+        with self.cond:
+            self.used -= n
+            self.cond.notify_all()
+
+
+class IOThread:
+    """Satu thread per proses yang menjalankan write blok dari semua upload."""
+
+    def __init__(self, inflight=INFLIGHT_BYTES):
+        self.budget = InflightBudget(inflight)
+        self.jobs = queue.SimpleQueue()
+        threading.Thread(target=self._run, name='DiskWriter', daemon=True).start()
+
+    def submit(self, target, block):
+        self.budget.acquire(len(block))
+        with target.cond:
+            target.pending += 1
+        self.jobs.put((target, block))
+
+    def _run(self):
+        while True:
+            target, block = self.jobs.get()
+            try:
+                if target.error is None and not target.discarded:
+                    target.write_block(block)
+            except OSError as e:
+                target.error = e
+            finally:
+                self.budget.release(len(block))
+                with target.cond:
+                    target.pending -= 1
+                    target.cond.notify_all()
+
+
+class WriteBehindFile:
+    def __init__(self, path, buffer_size=BUFFER_SIZE, io=None, fsync='none', fsync_interval=FSYNC_INTERVAL):
+        self.fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        self.buffer_size = max(BLOCK_ALIGN, -(-buffer_size // BLOCK_ALIGN) * BLOCK_ALIGN)
+        self.buffer = bytearray()
+        self.io = io
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self.last_fsync = time.monotonic()
+        self.fsync_seconds = 0.0
+        self.write_calls = 0
+        self.bytes_written = 0
+        self.pending = 0
+        self.cond = threading.Condition()
+        self.error = None
+        self.discarded = False
+        self.closed = False
+
+    def write(self, data):
+        if self.error:
+            raise self.error
+        self.buffer += data
+        if len(self.buffer) >= self.buffer_size:
+            aligned = len(self.buffer) - len(self.buffer) % self.buffer_size
+            block, self.buffer = self.buffer, self.buffer[aligned:]
+            del block[aligned:]
+            self._submit(block)
+
+    def _submit(self, block):
+        if self.io is None:
+            self.write_block(block)
+        else:
+            self.io.submit(self, block)
+
+    def write_block(self, block):
+        view = memoryview(block)
+        while view:
+            n = os.write(self.fd, view)
+            view = view[n:]
+            self.write_calls += 1
+        self.bytes_written += len(block)
+        if self.fsync == 'periodic' and time.monotonic() - self.last_fsync >= self.fsync_interval:
+            self._fsync()
+
+    def _fsync(self):
+        start = time.perf_counter()
+        os.fsync(self.fd)
+        self.last_fsync = time.monotonic()
+        self.fsync_seconds += time.perf_counter() - start
+
+    def _drain(self):
+        with self.cond:
+            while self.pending:
+                self.cond.wait()
+
+    def _close_fd(self):
+        # ditandai dulu agar fd tidak pernah ditutup dua kali (nomornya bisa sudah dipakai file lain)
+        self.closed = True
+        os.close(self.fd)
+
+    def close(self):
+        """Tulis sisa buffer, tunggu thread I/O, fsync sesuai kebijakan, lalu tutup fd."""
+        if self.closed:
+            return
+        try:
+            if self.buffer:
+                block, self.buffer = self.buffer, bytearray()
+                self._submit(block)
+            self._drain()
+            if self.error:
+                raise self.error
+            if self.fsync == 'close':
+                self._fsync()
+            logging.debug(f"Write-behind: {self.bytes_written} bytes in {self.write_calls} writes")
+        finally:
+            self._close_fd()
+
+    def discard(self):
+        """Upload gagal: blok yang masih antre tidak perlu ditulis lagi."""
+        self.discarded = True
+        self.buffer = bytearray()
+        self._drain()
+        if not self.closed:
+            self._close_fd()
+
+
+def add_write_args(parser):
+    parser.add_argument('--write_buffer', type=int, default=BUFFER_SIZE,
+                        help=f'Upload write buffer in bytes, rounded up to {BLOCK_ALIGN} (default: {BUFFER_SIZE})')
+    parser.add_argument('--io_thread', action='store_true',
+                        help='Write upload blocks on a dedicated I/O thread so receive and disk write overlap')
+    parser.add_argument('--write_inflight', type=int, default=INFLIGHT_BYTES,
+                        help=f'Max bytes queued for the I/O thread per process (default: {INFLIGHT_BYTES})')
+    parser.add_argument('--fsync', choices=FSYNC_POLICIES, default='none',
+                        help='fsync policy for uploads: none, close (before publish) or periodic (default: none)')
+    parser.add_argument('--fsync_interval', type=float, default=FSYNC_INTERVAL,
+                        help=f'Seconds between fsyncs with --fsync periodic (default: {FSYNC_INTERVAL:g})')
+
+
+def options_from_args(args):
+    """Opsi write-behind dari argparse, diteruskan ke create_storage."""
+    return {'buffer_size': args.write_buffer, 'io_thread': args.io_thread, 'inflight': args.write_inflight,
+            'fsync': args.fsync, 'fsync_interval': args.fsync_interval}